@@ -0,0 +1,185 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Comparison of the compositing engines of the stamped images, the VSE render and Pillow, on the same rendered
+images and stamped images.
+
+The VSE needs a window, so the benchmark runs in Blender with its interface and with the add-on enabled:
+    blender --addons stampinfo --python benchmarks/bench_compositing.py -- --frames 100 --output bench.json
+
+Blender quits once the benchmark is done. In background mode only the Pillow engine can be measured.
+Each engine runs several times, the first VSE run includes the creation of the compositing scene.
+The times are in milliseconds per frame.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+def _getStampedImages(dirPath, frames, resolution, layout, fileFormat):
+    """Write the rendered images and the stamped images of the frames 1 to frames.
+    Returns the arguments of compositeMedia() describing them"""
+    from PIL import Image
+
+    from stampinfo.properties import infoImage
+    from stampinfo.properties.stampInfoSnapshot import StampInfoSnapshot, getStaticFrameContexts
+
+    # the rendered images all have the same content, they are decoded for each frame anyway
+    renderPattern = os.path.join(dirPath, "render.####.png")
+    img = Image.linear_gradient("L").resize(resolution).convert("RGB")
+    img.save(renderPattern.replace("####", "0001"))
+    for frame in range(2, frames + 1):
+        shutil.copyfile(renderPattern.replace("####", "0001"), renderPattern.replace("####", f"{frame:04d}"))
+
+    snapshot = StampInfoSnapshot.fromDict({"frameStart": 1, "frameEnd": frames, "renderResolution": resolution})
+    renderW, renderH, innerH = snapshot.getStampedImageResolution()
+    ext = infoImage.getStampedImagesExtension(fileFormat)
+    stampPattern = os.path.join(dirPath, f"stamp.####{ext}")
+    stripsRows = infoImage.renderStampedImages(
+        snapshot,
+        renderW,
+        renderH,
+        innerH,
+        getStaticFrameContexts(1, frames, "Camera", 50.0),
+        [stampPattern.replace("####", f"{frame:04d}") for frame in range(1, frames + 1)],
+        layout=layout,
+        fileFormat=fileFormat,
+    )
+
+    fgFile, fgStrips = stampPattern, None
+    if stripsRows is not None:
+        fgFile = None
+        fgStrips = list(zip(infoImage.getBorderStripsFilepaths(stampPattern), stripsRows))
+
+    return {
+        "bg_file": renderPattern,
+        "bg_res": list(resolution),
+        "fg_file": fgFile,
+        "fg_res": [renderW, renderH],
+        "fg_strips": fgStrips,
+        "output_resolution": [renderW, renderH],
+    }
+
+
+def runBenchmark(dirPath, engines, frames, resolution, layout, fileFormat, repeat, numProcesses):
+    import bpy
+
+    scene = bpy.context.scene
+    vse_render = bpy.context.window_manager.stampinfo_vse_render
+    mediaArgs = _getStampedImages(dirPath, frames, resolution, layout, fileFormat)
+
+    results = []
+    for engine in engines:
+        for run in range(repeat):
+            outputDir = os.path.join(dirPath, f"output_{engine}_{run}")
+            start = time.perf_counter()
+            vse_render.compositeMedia(
+                scene,
+                frame_start=1,
+                frame_end=frames,
+                output_file=os.path.join(outputDir, "composited.####.png"),
+                postfix_scene_name="_StampInfoBench",
+                import_at_frame=1,
+                clean_temp_scene=False,
+                engine=engine,
+                num_processes=numProcesses,
+                **mediaArgs,
+            )
+            totalMs = (time.perf_counter() - start) * 1000.0
+            numWritten = len(os.listdir(outputDir)) if os.path.isdir(outputDir) else 0
+            results.append(
+                {
+                    "engine": engine,
+                    "run": run,
+                    "totalMs": round(totalMs, 1),
+                    "frameMs": round(totalMs / frames, 2),
+                    "framesWritten": numWritten,
+                }
+            )
+            print(f"{engine:>6} run {run}: {totalMs / frames:8.2f} ms per frame, {numWritten} frames written")
+            shutil.rmtree(outputDir, ignore_errors=True)
+
+    return {
+        "environment": {
+            "blender": bpy.app.version_string,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpuCount": os.cpu_count(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+        },
+        "frames": frames,
+        "renderResolution": list(resolution),
+        "layout": layout,
+        "fileFormat": fileFormat,
+        "processes": numProcesses,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Comparison of the VSE and Pillow compositing of Stamp Info")
+    parser.add_argument("--frames", type=int, default=100, help="number of composited frames")
+    parser.add_argument("--resolution", type=int, nargs=2, default=(1920, 1080), help="render resolution")
+    parser.add_argument("--layout", choices=("FULL", "BORDER_STRIPS"), default="FULL")
+    parser.add_argument("--format", choices=("PNG", "PNG_FAST", "TGA"), default="PNG")
+    parser.add_argument("--engines", nargs="+", choices=("VSE", "PILLOW"), default=["VSE", "PILLOW"])
+    parser.add_argument("--repeat", type=int, default=2, help="number of runs of each engine")
+    parser.add_argument("--processes", type=int, default=0, help="Pillow processes, 0 for one per CPU core")
+    parser.add_argument("--dir", help="directory where the images are written, a temporary directory by default")
+    parser.add_argument("--output", help="JSON file to write, the results are printed if not specified")
+    args = parser.parse_args(argv)
+
+    import bpy
+
+    if not hasattr(bpy.types.WindowManager, "stampinfo_vse_render"):
+        print("The Stamp Info add-on must be enabled, use: blender --addons stampinfo --python ...", file=sys.stderr)
+        return
+
+    engines = args.engines
+    if bpy.app.background and "VSE" in engines:
+        print("The VSE compositing needs a window, it is not measured in background mode", file=sys.stderr)
+        engines = [e for e in engines if "VSE" != e]
+
+    with tempfile.TemporaryDirectory(prefix="stampinfo_bench_", dir=args.dir) as tmpDir:
+        report = runBenchmark(
+            tmpDir, engines, args.frames, args.resolution, args.layout, args.format, args.repeat, args.processes
+        )
+
+    reportStr = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(reportStr)
+    else:
+        print(reportStr)
+
+
+# bpy is imported in the functions only: the Pillow worker processes import this module without Blender
+if __name__ == "__main__":
+    import bpy
+
+    # the arguments of the script follow the "--" of the Blender command line
+    main(sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else [])
+    if not bpy.app.background:
+        bpy.ops.wm.quit_blender()
@@ -0,0 +1,167 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Comparison of the encoding presets of the stamped movies: encoding time and size of the movie of a reference shot
+encoded with each preset by the FFmpeg pipe encoder.
+
+The reference shot is an image sequence, for example the output of a stamped render:
+    python benchmarks/bench_encoding_presets.py --input /shots/sh010/sh010_####.png --output bench.json
+
+Without --input a synthetic shot is generated, with moving content and stamped borders. FFmpeg has to be in the
+PATH or specified with --ffmpeg. The images are read from the disk for each preset, the reading time is included
+in the encoding time of all the presets.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _createSyntheticShot(dirPath, frames, resolution):
+    """Write an image sequence with grain and moving content and with static stamped borders, and return its path"""
+    from PIL import Image, ImageDraw
+
+    width, height = resolution
+    borderH = height // 8
+    for frame in range(1, frames + 1):
+        img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+        # grain changing at each frame, as in the rendered images
+        img = Image.blend(img, Image.effect_noise((width, height), 64).convert("RGB"), 0.12)
+        draw = ImageDraw.Draw(img)
+        # moving shapes so that the inter-frame compression has some motion to encode
+        for i in range(8):
+            x = (frame * (7 + i * 3) + i * width // 8) % width
+            y = borderH + (i * (height - 2 * borderH)) // 8
+            draw.ellipse((x, y, x + width // 10, y + height // 10), fill=(40 * i % 255, 180, 255 - 30 * i))
+        draw.rectangle((0, 0, width, borderH), fill=(0, 0, 0))
+        draw.rectangle((0, height - borderH, width, height), fill=(0, 0, 0))
+        draw.text(
+            (20, borderH // 3), f"Frame: {frame:04d}   Shot: sh010   Camera: Cam_sh010   Lens: 50 mm", fill=(140,) * 3
+        )
+        img.save(os.path.join(dirPath, f"reference_{frame:04d}.png"), compress_level=1)
+    return os.path.join(dirPath, "reference_####.png")
+
+
+def runBenchmark(inputSequence, ffmpegFilepath, presetNames, fps, verbose=True):
+    from PIL import Image
+
+    from stampinfo.utils import utils_ffmpeg
+    from stampinfo.utils.utils_compositing import compositeImageSequencesToStream
+    from stampinfo.utils.utils_filenames import getSequenceFrames
+
+    inputFilepaths = list(getSequenceFrames(inputSequence).values())
+    if not len(inputFilepaths):
+        raise FileNotFoundError(f"No image found for the sequence {inputSequence}")
+    with Image.open(inputFilepaths[0]) as img:
+        resolution = img.size
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="stampinfo_bench_") as tmpDir:
+        for presetName in presetNames:
+            movieFilepath = os.path.join(tmpDir, f"bench_{presetName}.mp4")
+            command = utils_ffmpeg.getFFmpegEncodeCommand(
+                ffmpegFilepath, movieFilepath, resolution, fps, encodingPreset=presetName
+            )
+
+            start = time.perf_counter()
+            with utils_ffmpeg.FFmpegPipeEncoder(command) as encoder:
+                compositeImageSequencesToStream(
+                    inputFilepaths, [[] for _ in inputFilepaths], resolution, encoder.write, numProcesses=1
+                )
+            encodeSeconds = time.perf_counter() - start
+
+            sizeBytes = os.path.getsize(movieFilepath)
+            result = {
+                "preset": presetName,
+                "encodeSeconds": round(encodeSeconds, 3),
+                "encodeFps": round(len(inputFilepaths) / encodeSeconds, 2),
+                "sizeMiB": round(sizeBytes / (1024 * 1024), 3),
+                "bitrateMbps": round(sizeBytes * 8 / (len(inputFilepaths) / fps) / 1e6, 3),
+            }
+            results.append(result)
+
+            if verbose:
+                print(
+                    f"{presetName:<18} {result['encodeSeconds']:8.2f} s  {result['encodeFps']:7.2f} fps  "
+                    f"{result['sizeMiB']:9.2f} MiB  {result['bitrateMbps']:8.2f} Mb/s",
+                    file=sys.stderr,
+                )
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpuCount": os.cpu_count(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+        },
+        "input": inputSequence,
+        "frames": len(inputFilepaths),
+        "resolution": list(resolution),
+        "fps": fps,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    from stampinfo.utils.utils_ffmpeg import ENCODING_PRESETS
+
+    parser = argparse.ArgumentParser(description="Comparison of the encoding presets of the Stamp Info movies")
+    parser.add_argument("--input", help="image sequence of the reference shot, with a # frame pattern")
+    parser.add_argument("--frames", type=int, default=250, help="number of frames of the synthetic shot")
+    parser.add_argument("--resolution", type=int, nargs=2, default=(1920, 1280), help="size of the synthetic shot")
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--presets", nargs="+", choices=list(ENCODING_PRESETS.keys()), default=list(ENCODING_PRESETS))
+    parser.add_argument("--ffmpeg", default="", help="FFmpeg executable, searched in the PATH if not specified")
+    parser.add_argument("--output", help="JSON file to write, the results are printed if not specified")
+    args = parser.parse_args(argv)
+
+    from stampinfo.config import config, sm_logging
+    from stampinfo.utils.utils_ffmpeg import getFFmpegFilepath
+
+    config.initGlobalVariables()
+    sm_logging.initialize(addonName="Stamp Info", prefix="SI")
+
+    ffmpegFilepath = getFFmpegFilepath(args.ffmpeg)
+    if ffmpegFilepath is None:
+        print("FFmpeg cannot be found, use --ffmpeg to specify it", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory(prefix="stampinfo_bench_shot_") as shotDir:
+        inputSequence = args.input
+        if inputSequence is None:
+            inputSequence = _createSyntheticShot(shotDir, args.frames, args.resolution)
+        report = runBenchmark(inputSequence, ffmpegFilepath, args.presets, args.fps)
+
+    reportStr = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(reportStr)
+    else:
+        print(reportStr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
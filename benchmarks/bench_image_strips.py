@@ -0,0 +1,192 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Benchmark of the creation of the image sequence strips used by the VSE compositing, on long sequences.
+
+The files of the sequences are looked up in a directory that also contains other files, as the render
+directories do. The previous implementation (glob, sort and regex over the whole directory then one
+elements.append() per frame) is measured as a reference.
+
+In a standard Python interpreter only the lookup of the files and the preparation of the names of the strip
+elements are measured:
+    python benchmarks/bench_image_strips.py --frames 10000 --output bench.json
+
+Run in Blender to also measure the creation of the strips:
+    blender --background --factory-startup --python benchmarks/bench_image_strips.py -- --frames 10000
+
+The latencies are in milliseconds.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+
+_SEQUENCE_NAME = "bench_####.png"
+
+
+def _createFiles(dirPath, frames, otherFiles, gapEvery):
+    """Create the empty files of the sequence, one frame every gapEvery frames being missing, and other files
+    that are not part of the sequence"""
+    for frame in range(1, frames + 1):
+        if 0 < gapEvery and 0 == frame % gapEvery:
+            continue
+        open(os.path.join(dirPath, f"bench_{frame:04d}.png"), "w").close()
+    for i in range(otherFiles):
+        open(os.path.join(dirPath, f"other_shot_{i:05d}.exr"), "w").close()
+
+
+def _legacyGetFrames(sequenceFilepath):
+    """Lookup of the files of the sequence as done before the directory index"""
+    p = Path(sequenceFilepath)
+    folder, name = p.parent, str(p.name)
+    padding_match = re.match(".*?(#+).*", name)
+    padding_length = len(padding_match[1])
+    file_re = re.compile(
+        r"^{1}({0}){2}$".format("\\d" * padding_length, name[: padding_match.start(1)], name[padding_match.end(1) :])
+    )
+    frames = dict()
+    for f in sorted(list(folder.glob("*"))):
+        re_match = file_re.match(f.name)
+        if re_match:
+            frames[int(re_match[1])] = f
+    return frames
+
+
+def _legacyNewStrip(sequences, frames):
+    frame_keys = list(frames.keys())
+    min_frame, max_frame = min(frame_keys), max(frame_keys)
+    seq = sequences.new_image("legacy", str(frames[frame_keys[0]]), 2, 1)
+    for i in range(min_frame + 1, max_frame + 1):
+        pp = frames.get(i, Path(""))
+        seq.elements.append(pp.name)
+    return seq
+
+
+def _newStrip(sequences, frames, elementNames):
+    seq = sequences.new_image("indexed", next(iter(frames.values())), 3, 1)
+    appendElement = seq.elements.append
+    for elementName in elementNames[1:]:
+        appendElement(elementName)
+    return seq
+
+
+def _timeMs(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1000.0, result
+
+
+def runBenchmark(frames, otherFiles, gapEvery, repeats):
+    from stampinfo.utils import utils_filenames
+
+    results = dict()
+    with tempfile.TemporaryDirectory(prefix="stampinfo_bench_") as tmpDir:
+        _createFiles(tmpDir, frames, otherFiles, gapEvery)
+        sequenceFilepath = os.path.join(tmpDir, _SEQUENCE_NAME)
+
+        legacyMs = [_timeMs(_legacyGetFrames, sequenceFilepath)[0] for _ in range(repeats)]
+
+        # first lookup: the directory is read and indexed
+        utils_filenames._sequenceDirectoryIndices.clear()
+        indexColdMs, sequenceFrames = _timeMs(utils_filenames.getSequenceFrames, sequenceFilepath)
+        indexCachedMs = [_timeMs(utils_filenames.getSequenceFrames, sequenceFilepath)[0] for _ in range(repeats)]
+
+        namesMs, (elementNames, gaps) = _timeMs(utils_filenames.getSequenceElementNames, sequenceFrames)
+
+        results["lookup"] = {
+            "legacyMs": round(min(legacyMs), 3),
+            "indexColdMs": round(indexColdMs, 3),
+            "indexCachedMs": round(min(indexCachedMs), 3),
+            "elementNamesMs": round(namesMs, 3),
+            "gaps": len(gaps),
+        }
+
+        if bpy is not None:
+            scene = bpy.data.scenes.new("StampInfo_Bench")
+            scene.sequence_editor_create()
+            sequences = scene.sequence_editor.sequences
+
+            legacyFrames = _legacyGetFrames(sequenceFilepath)
+            legacyStripMs, legacyStrip = _timeMs(_legacyNewStrip, sequences, legacyFrames)
+            newStripMs, newStrip = _timeMs(_newStrip, sequences, sequenceFrames, elementNames)
+
+            results["strip"] = {
+                "legacyMs": round(legacyStripMs, 3),
+                "indexedMs": round(newStripMs, 3),
+                "elements": [len(legacyStrip.elements), len(newStrip.elements)],
+            }
+            bpy.data.scenes.remove(scene)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "blender": bpy.app.version_string if bpy is not None else None,
+            "platform": platform.platform(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+        },
+        "frames": frames,
+        "otherFiles": otherFiles,
+        "gapEvery": gapEvery,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    if argv is None:
+        # in Blender the arguments of the script are after --
+        argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description="Benchmark of the creation of the Stamp Info image sequence strips")
+    parser.add_argument("--frames", type=int, default=10000, help="number of frames of the sequence")
+    parser.add_argument("--other-files", type=int, default=20000, help="number of other files in the directory")
+    parser.add_argument("--gap-every", type=int, default=1000, help="one frame missing every N frames, 0 for none")
+    parser.add_argument("--repeats", type=int, default=5, help="number of runs of the lookups, the fastest is kept")
+    parser.add_argument("--output", help="JSON file to write, the results are printed if not specified")
+    args = parser.parse_args(argv)
+
+    from stampinfo.config import config, sm_logging
+
+    config.initGlobalVariables()
+    sm_logging.initialize(addonName="Stamp Info", prefix="SI")
+
+    report = runBenchmark(args.frames, args.other_files, args.gap_every, args.repeats)
+
+    reportStr = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(reportStr)
+    else:
+        print(reportStr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Benchmark of the generation of the stamped images, at several resolutions and with several combinations
+of the Stamp Info settings.
+
+It runs in a standard Python interpreter with Pillow installed, Blender is not required:
+    python benchmarks/bench_stamped_images.py --output bench.json
+
+Each case runs in its own process so that its peak memory can be measured. The results are written as JSON:
+the latencies are in milliseconds and the memory in MiB.
+"""
+
+import argparse
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+# inner resolutions of the rendered images. The stamped images are higher since the borders are outside
+RESOLUTIONS = {
+    "HD": (1920, 1080),
+    "2K": (2048, 1080),
+    "4K": (3840, 2160),
+    "8K": (7680, 4320),
+}
+
+# settings switched on and off by the benchmark
+TOGGLES = ("logoUsed", "notesUsed", "borderUsed", "videoFrameUsed", "currentFrameUsed", "automaticTextSize")
+
+# Stamp Info settings changed from their default values for the benchmark, see getDefaultStampInfoSettings().
+# Most of the fields are enabled so that all the drawing code is measured
+BENCHMARK_SETTINGS = {
+    "logoBuiltinName": "StampInfo_Logo.png",
+    "projectUsed": True,
+    "userNameUsed": True,
+    "videoFrameUsed": True,
+    "handlesUsed": True,
+    "animDurationUsed": True,
+    "edit3DFrameUsed": True,
+    "edit3DFrame": 12,
+    "edit3DTotalNumberUsed": True,
+    "edit3DTotalNumber": 250,
+    "sequenceUsed": True,
+    "shotUsed": True,
+    "shotDurationUsed": True,
+    "takeUsed": True,
+    "notesUsed": True,
+    "notesLine01": "Notes line 01 with some text",
+    "notesLine02": "Notes line 02 with some text",
+    "notesLine03": "Notes line 03 with some text",
+    "cornerNoteUsed": True,
+    "cornerNote": "Corner note",
+    "bottomNoteUsed": True,
+    "bottomNote": "Bottom note",
+}
+
+_FRAME_START = 101
+_FRAME_END = 350
+
+
+def _getSnapshot(toggles, renderResolution):
+    from stampinfo.properties.stampInfoSnapshot import StampInfoSnapshot
+
+    settings = dict(BENCHMARK_SETTINGS)
+    settings.update(toggles)
+
+    return StampInfoSnapshot.fromDict(
+        {
+            "settings": settings,
+            "sceneName": "Scene",
+            "fps": 25,
+            "frameStart": _FRAME_START,
+            "frameEnd": _FRAME_END,
+            "filepath": "/projects/benchmark/shots/benchmark.blend",
+            "renderResolution": renderResolution,
+        }
+    )
+
+
+def _percentiles(values):
+    values = sorted(values)
+
+    def _at(p):
+        # nearest rank
+        index = min(len(values) - 1, max(0, int(round(p / 100.0 * len(values) + 0.5)) - 1))
+        return round(values[index], 3)
+
+    return {
+        "min": round(values[0], 3),
+        "p50": _at(50),
+        "p90": _at(90),
+        "p99": _at(99),
+        "max": round(values[-1], 3),
+        "mean": round(sum(values) / len(values), 3),
+    }
+
+
+def _getPeakRssMiB():
+    try:
+        import resource
+    except ImportError:
+        # not available on Windows
+        return None
+    # kilobytes on Linux, bytes on macOS
+    maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if "Darwin" == platform.system():
+        return round(maxRss / (1024 * 1024), 1)
+    return round(maxRss / 1024, 1)
+
+
+def runCase(case):
+    """Run a benchmark case in the current process and return its results"""
+    from stampinfo.config import config, sm_logging
+    from stampinfo.properties import infoImage
+    from stampinfo.properties.stampInfoSnapshot import getStaticFrameContexts
+
+    config.initGlobalVariables()
+    sm_logging.initialize(addonName="Stamp Info", prefix="SI")
+
+    snapshot = _getSnapshot(case["toggles"], case["renderResolution"])
+    renderW, renderH, innerH = snapshot.getStampedImageResolution()
+
+    numFrames = case["frames"] + case["warmup"]
+    frameContexts = getStaticFrameContexts(
+        _FRAME_START, _FRAME_START + numFrames - 1, "Camera", 50.0, "", datetime(2022, 6, 1, 12, 0, 0)
+    )
+
+    rssBeforeMiB = _getPeakRssMiB()
+
+    start = time.perf_counter()
+    staticLayer = infoImage.StampStaticLayer(snapshot, renderW, renderH, innerH, layout=case["layout"])
+    staticLayerMs = (time.perf_counter() - start) * 1000.0
+
+    # each frame is drawn, encoded and written once, as infoImage._renderFrame() does, with the time of each step
+    ext, saveOptions = infoImage._STAMPED_IMAGES_FORMATS[case["fileFormat"]]
+    pillowFormat = ext[1:].upper()
+    drawMs = []
+    encodeMs = []
+    writeMs = []
+    frameMs = []
+    with tempfile.TemporaryDirectory(prefix="stampinfo_bench_") as tmpDir:
+        for i, frameContext in enumerate(frameContexts):
+            filepath = os.path.join(tmpDir, f"bench_{frameContext.frame:05d}{ext}")
+            filepaths = infoImage.getBorderStripsFilepaths(filepath) if staticLayer.strips else [filepath]
+
+            start = time.perf_counter()
+            stampedImages = infoImage._drawFrame(staticLayer, frameContext)
+            drawEnd = time.perf_counter()
+
+            encodedImages = []
+            for img, _pos in stampedImages:
+                buffer = io.BytesIO()
+                img.save(buffer, format=pillowFormat, **saveOptions)
+                encodedImages.append(buffer.getvalue())
+            encodeEnd = time.perf_counter()
+
+            for encodedImage, imgFilepath in zip(encodedImages, filepaths):
+                with open(imgFilepath, "wb") as f:
+                    f.write(encodedImage)
+            writeEnd = time.perf_counter()
+
+            if case["warmup"] <= i:
+                drawMs.append((drawEnd - start) * 1000.0)
+                encodeMs.append((encodeEnd - drawEnd) * 1000.0)
+                writeMs.append((writeEnd - encodeEnd) * 1000.0)
+                frameMs.append((writeEnd - start) * 1000.0)
+
+    rssAfterMiB = _getPeakRssMiB()
+
+    return {
+        "resolution": case["resolution"],
+        "stampedImageSize": [renderW, renderH],
+        "innerHeight": innerH,
+        "layout": case["layout"],
+        "fileFormat": case["fileFormat"],
+        "toggles": case["toggles"],
+        "frames": case["frames"],
+        "staticLayerMs": round(staticLayerMs, 3),
+        # drawing of the values that change at each frame, in memory
+        "drawMs": _percentiles(drawMs),
+        # encoding of the stamped images of a frame in memory
+        "encodeMs": _percentiles(encodeMs),
+        # writing of the encoded images to the files
+        "writeMs": _percentiles(writeMs),
+        # drawing, encoding and writing of the stamped image of a frame
+        "frameMs": _percentiles(frameMs),
+        "peakRssMiB": rssAfterMiB,
+        "peakRssDeltaMiB": None if rssAfterMiB is None else round(rssAfterMiB - rssBeforeMiB, 1),
+    }
+
+
+def _runCaseInProcess(case, resultsQueue):
+    resultsQueue.put(runCase(case))
+
+
+def getCases(resolutions, toggleMode, frames, warmup, layout, fileFormat):
+    """Return the list of the cases to run.
+    toggleMode: "SINGLE" to run all the settings enabled then each toggle disabled in turn,
+        "MATRIX" to run all the combinations of the toggles
+    """
+    if "MATRIX" == toggleMode:
+        combinations = [dict(zip(TOGGLES, values)) for values in itertools.product((True, False), repeat=len(TOGGLES))]
+    else:
+        combinations = [{t: True for t in TOGGLES}]
+        for toggle in TOGGLES:
+            combination = {t: True for t in TOGGLES}
+            combination[toggle] = False
+            combinations.append(combination)
+
+    cases = []
+    for resolution in resolutions:
+        for toggles in combinations:
+            cases.append(
+                {
+                    "resolution": resolution,
+                    "renderResolution": RESOLUTIONS[resolution],
+                    "toggles": toggles,
+                    "frames": frames,
+                    "warmup": warmup,
+                    "layout": layout,
+                    "fileFormat": fileFormat,
+                }
+            )
+    return cases
+
+
+def runBenchmark(cases, isolate=True, verbose=True):
+    """Run the cases and return the results as a dictionary ready to be written as JSON.
+    isolate: if True each case runs in a new process so that its peak memory is not affected by the previous ones
+    """
+    from PIL import __version__ as pillowVersion
+
+    results = []
+    mpContext = multiprocessing.get_context("spawn")
+    for i, case in enumerate(cases):
+        if isolate:
+            resultsQueue = mpContext.Queue()
+            process = mpContext.Process(target=_runCaseInProcess, args=(case, resultsQueue))
+            process.start()
+            result = resultsQueue.get()
+            process.join()
+        else:
+            result = runCase(case)
+        results.append(result)
+
+        if verbose:
+            disabled = [t for t, used in case["toggles"].items() if not used]
+            print(
+                f"[{i + 1}/{len(cases)}] {case['resolution']:>2} off: {', '.join(disabled) or '-':<40} "
+                f"frame p50: {result['frameMs']['p50']:8.2f} ms  p99: {result['frameMs']['p99']:8.2f} ms  "
+                f"peak RSS: {result['peakRssMiB']} MiB",
+                file=sys.stderr,
+            )
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "pillow": pillowVersion,
+            "platform": platform.platform(),
+            "cpuCount": os.cpu_count(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark of the generation of the Stamp Info stamped images")
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS.keys()), default=list(RESOLUTIONS.keys()))
+    parser.add_argument(
+        "--toggles",
+        choices=("SINGLE", "MATRIX"),
+        default="SINGLE",
+        help="SINGLE: all the settings enabled then each one disabled in turn, MATRIX: all the combinations",
+    )
+    parser.add_argument("--frames", type=int, default=20, help="number of measured frames per case")
+    parser.add_argument("--warmup", type=int, default=2, help="number of frames rendered before measuring")
+    parser.add_argument("--layout", choices=("FULL", "BORDER_STRIPS"), default="FULL")
+    parser.add_argument("--format", choices=("PNG", "PNG_FAST", "TGA"), default="PNG")
+    parser.add_argument("--no-isolate", action="store_true", help="run all the cases in the current process")
+    parser.add_argument("--output", help="JSON file to write, the results are printed if not specified")
+    args = parser.parse_args(argv)
+
+    cases = getCases(args.resolutions, args.toggles, args.frames, args.warmup, args.layout, args.format)
+    report = runBenchmark(cases, isolate=not args.no_isolate)
+
+    reportStr = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(reportStr)
+    else:
+        print(reportStr)
+
+
+if __name__ == "__main__":
+    main()
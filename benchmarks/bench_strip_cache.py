@@ -0,0 +1,173 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Comparison of the formats of the temporary stamped images: time to write the border strips of all the frames of
+a shot, time for the compositor to read them back, number of files and size on disk.
+
+The files are written in the specified directory so that the storage to test, for example a network share,
+is the one measured:
+    python benchmarks/bench_strip_cache.py --dir /mnt/shared/tmp --frames 500 --output bench.json
+
+The stamped images are drawn and written in the current process only, the times are in milliseconds per frame.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _getDiskUsage(dirPath):
+    """Return the number of files of the directory and the space they use on disk, in bytes"""
+    numFiles, diskBytes = 0, 0
+    for entry in os.scandir(dirPath):
+        stat = entry.stat()
+        numFiles += 1
+        # st_blocks is not available on Windows
+        diskBytes += stat.st_blocks * 512 if hasattr(stat, "st_blocks") else stat.st_size
+    return numFiles, diskBytes
+
+
+def _readFrames(overFilepathsPerFrame):
+    from stampinfo.utils.utils_compositing import loadOverImages
+
+    for overFilepaths in overFilepathsPerFrame:
+        for img, _position in loadOverImages(overFilepaths):
+            # the images of the files are decoded when they are used
+            img.load()
+
+
+def runBenchmark(dirPath, fileFormats, frames, resolution):
+    from stampinfo.properties import infoImage
+    from stampinfo.properties.stampInfoSnapshot import StampInfoSnapshot, getStaticFrameContexts
+    from stampinfo.utils.utils_strip_cache import StripCacheSlot, closeStripCaches, getStripCacheFilepath
+
+    snapshot = StampInfoSnapshot.fromDict({"renderResolution": resolution, "frameStart": 1, "frameEnd": frames})
+    renderW, renderH, innerH = snapshot.getStampedImageResolution()
+    frameContexts = getStaticFrameContexts(1, frames, cameraName="Cam_sh010", lens=50.0)
+
+    results = []
+    for fileFormat in fileFormats:
+        formatDir = os.path.join(dirPath, f"bench_{fileFormat}", "")
+        Path(formatDir).mkdir(parents=True, exist_ok=True)
+
+        start = time.perf_counter()
+        if "RAW_CACHE" == fileFormat:
+            cacheFilepath = getStripCacheFilepath(formatDir)
+            infoImage.createStampedImagesCache(
+                cacheFilepath, snapshot, renderW, renderH, innerH, 1, frames, layout="BORDER_STRIPS"
+            )
+            filepaths = [cacheFilepath] * frames
+        else:
+            ext = infoImage.getStampedImagesExtension(fileFormat)
+            filepaths = [f"{formatDir}stamped_{frame:05d}{ext}" for frame in range(1, frames + 1)]
+        stripsRows = infoImage.renderStampedImages(
+            snapshot,
+            renderW,
+            renderH,
+            innerH,
+            frameContexts,
+            filepaths,
+            numProcesses=1,
+            layout="BORDER_STRIPS",
+            fileFormat=fileFormat,
+        )
+        writeSeconds = time.perf_counter() - start
+
+        if "RAW_CACHE" == fileFormat:
+            overFilepathsPerFrame = [
+                [(StripCacheSlot(cacheFilepath, i, frame), (0, rows[0])) for i, rows in enumerate(stripsRows)]
+                for frame in range(1, frames + 1)
+            ]
+        else:
+            overFilepathsPerFrame = [
+                [(f, (0, rows[0])) for f, rows in zip(infoImage.getBorderStripsFilepaths(filepath), stripsRows)]
+                for filepath in filepaths
+            ]
+
+        start = time.perf_counter()
+        _readFrames(overFilepathsPerFrame)
+        readSeconds = time.perf_counter() - start
+        closeStripCaches()
+
+        numFiles, diskBytes = _getDiskUsage(formatDir)
+        results.append(
+            {
+                "format": fileFormat,
+                "writeMsPerFrame": round(writeSeconds * 1000 / frames, 3),
+                "readMsPerFrame": round(readSeconds * 1000 / frames, 3),
+                "files": numFiles,
+                "diskMiB": round(diskBytes / (1024 * 1024), 3),
+            }
+        )
+        result = results[-1]
+        print(
+            f"{fileFormat:<10} write {result['writeMsPerFrame']:7.2f} ms  read {result['readMsPerFrame']:7.2f} ms"
+            f"  {numFiles:6d} files  {result['diskMiB']:9.2f} MiB",
+            file=sys.stderr,
+        )
+        shutil.rmtree(formatDir)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+        },
+        "frames": frames,
+        "renderResolution": list(resolution),
+        "stampedResolution": [renderW, renderH],
+        "stripsRows": [list(rows) for rows in stripsRows],
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Comparison of the formats of the Stamp Info temporary images")
+    parser.add_argument("--dir", help="directory where the images are written, a temporary directory by default")
+    parser.add_argument("--frames", type=int, default=500, help="number of frames of the shot")
+    parser.add_argument("--resolution", type=int, nargs=2, default=(1920, 1080), help="render resolution")
+    parser.add_argument("--formats", nargs="+", default=["PNG", "PNG_FAST", "TGA", "RAW_CACHE"])
+    parser.add_argument("--output", help="JSON file to write, the results are printed if not specified")
+    args = parser.parse_args(argv)
+
+    from stampinfo.config import config, sm_logging
+
+    config.initGlobalVariables()
+    sm_logging.initialize(addonName="Stamp Info", prefix="SI")
+
+    with tempfile.TemporaryDirectory(prefix="stampinfo_bench_", dir=args.dir) as tmpDir:
+        report = runBenchmark(tmpDir, args.formats, args.frames, args.resolution)
+
+    reportStr = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(reportStr)
+    else:
+        print(reportStr)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,25 +22,31 @@ Main init
 # import os
 # from pathlib import Path
 
-import bpy
-import bpy.utils.previews
-from bpy.props import IntProperty, PointerProperty
-
-
-from .config import config
-from .utils import utils
-from .utils.utils_render import Utils_LaunchRender
-from .utils import utils_vse_render
-from .properties import stampInfoSettings
-from .operators import debug
-from .properties import stamper
-from .ui import si_ui
-
-import importlib
-
-importlib.reload(stampInfoSettings)
-importlib.reload(stamper)
-importlib.reload(debug)
+# bpy is not available when the package is imported by the worker processes that generate the stamped
+# images (see properties/infoImage.py). In this case only the modules that don't depend on Blender are used
+try:
+    import bpy
+except ModuleNotFoundError:
+    bpy = None
+
+if bpy is not None:
+    import bpy.utils.previews
+    from bpy.props import IntProperty, PointerProperty
+
+    from .config import config
+    from .utils import utils
+    from .utils.utils_render import Utils_LaunchRender
+    from .utils import utils_vse_render
+    from .properties import stampInfoSettings
+    from .operators import debug
+    from .properties import stamper
+    from .ui import si_ui
+
+    import importlib
+
+    importlib.reload(stampInfoSettings)
+    importlib.reload(stamper)
+    importlib.reload(debug)
 
 from stampinfo.config import sm_logging
 
@@ -102,10 +108,11 @@ pil_logger.setLevel(logging.INFO)
 #         return s
 
 
-classes = (
-    stampInfoSettings.UAS_StampInfoSettings,
-    Utils_LaunchRender,
-)
+if bpy is not None:
+    classes = (
+        stampInfoSettings.UAS_StampInfoSettings,
+        Utils_LaunchRender,
+    )
 
 
 def stampInfo_resetProperties():
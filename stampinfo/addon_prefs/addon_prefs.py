@@ -21,7 +21,7 @@ This module defines the global preferences of the add-on
 
 import bpy
 from bpy.types import AddonPreferences
-from bpy.props import IntProperty, BoolProperty
+from bpy.props import IntProperty, BoolProperty, EnumProperty, StringProperty
 
 from .addon_prefs_ui import draw_addon_prefs
 
@@ -108,18 +108,142 @@ class UAS_StampInfo_AddonPrefs(AddonPreferences):
 
     delete_temp_scene: BoolProperty(
         name="Delete the temporary scene used for VSE rendering",
-        description="Delete temporary scene used for VSE rendering",
+        description="Delete the temporary scene used for VSE rendering at the end of the rendering of an animation.\n"
+        "The scene is kept between still renders so that its strips are reused, it is deleted before the file is saved",
         default=True,
         options=set(),
     )
 
     delete_temp_images: BoolProperty(
         name="Delete the temporary images used for VSE rendering",
-        description="Delete temporary images used for VSE rendering",
+        description="Delete temporary images used for VSE rendering.\n"
+        "When they are kept, only the stamped images whose content changed are generated at the next render",
         default=True,
         options=set(),
     )
 
+    stamped_images_processes: IntProperty(
+        name="Stamped Images Processes",
+        description="Number of processes used to generate the stamped images of an animation and to composite\n"
+        "them when the VSE is not used. 0 means one process per CPU core",
+        min=0,
+        soft_max=32,
+        default=0,
+        options=set(),
+    )
+
+    stamp_during_render: BoolProperty(
+        name="Stamp During Render",
+        description="When rendering an animation, generate the stamped image of each frame in the background as soon\n"
+        "as the frame is rendered, while the next frames are rendered, instead of after the whole animation",
+        default=False,
+        options=set(),
+    )
+
+    render_chunks_processes: IntProperty(
+        name="Background Render Processes",
+        description="Number of background Blender processes used by Render Animation in Background.\n"
+        "Each process renders a chunk of the frames of the animation",
+        min=1,
+        soft_max=16,
+        default=2,
+        options=set(),
+    )
+
+    stamped_images_layout: EnumProperty(
+        name="Stamped Images Layout",
+        description="Content of the temporary stamped images composited over the rendered images",
+        items=(
+            ("FULL", "Full Images", "Images with the size of the stamped output, transparent in the middle"),
+            (
+                "BORDER_STRIPS",
+                "Border Strips",
+                "Only the top and bottom borders and the logo are written and then placed by the compositor.\n"
+                "Faster and lighter, but the content drawn outside of the borders is not kept",
+            ),
+        ),
+        default="FULL",
+        options=set(),
+    )
+
+    stamped_images_format: EnumProperty(
+        name="Stamped Images Format",
+        description="File format of the temporary stamped images.\n"
+        "These images are read only once by the compositor, a fast encoding saves time on each frame",
+        items=(
+            ("PNG", "PNG", "Compressed PNG, small files but slow to write"),
+            ("PNG_FAST", "PNG - Fast", "PNG with a minimal compression, about 1.5 times faster to write"),
+            (
+                "TGA",
+                "TGA - Uncompressed",
+                "Uncompressed Targa, about 5 times faster to write than PNG but files are much bigger",
+            ),
+            (
+                "RAW_CACHE",
+                "Raw Strip Cache",
+                "The stamped images of all the frames are written uncompressed in a single memory-mapped file\n"
+                "instead of one file per frame, and read without decoding by the compositor. As big as TGA files,\n"
+                "best with the Border Strips layout. Only with the Pillow compositing and the FFmpeg movie encoder,\n"
+                "PNG - Fast is used when the stamped images are composited with the VSE",
+            ),
+        ),
+        default="PNG",
+        options=set(),
+    )
+
+    compositing_mode: EnumProperty(
+        name="Compositing",
+        description="How the stamped images are composited over the rendered images",
+        items=(
+            (
+                "VSE",
+                "VSE",
+                "The stamped images are written in a temporary directory and composited with the Video Sequence Editor",
+            ),
+            (
+                "IN_MEMORY",
+                "In Memory",
+                "The stamped images are composited in memory over the rendered images, without temporary files.\n"
+                "Only for image outputs, movies are still composited with the VSE",
+            ),
+            (
+                "PILLOW",
+                "Pillow",
+                "The stamped images are written in a temporary directory and composited over the rendered images\n"
+                "with Pillow, in parallel and without the VSE. Also works in background mode.\n"
+                "Only for image outputs, movies are still composited with the VSE",
+            ),
+        ),
+        default="VSE",
+        options=set(),
+    )
+
+    movie_encoder: EnumProperty(
+        name="Movie Encoder",
+        description="How the stamped movies are encoded",
+        items=(
+            ("VSE", "VSE", "The movies are composited and encoded by the Video Sequence Editor"),
+            (
+                "FFMPEG",
+                "FFmpeg",
+                "The movies are composited with Pillow and the frames are streamed to an FFmpeg process, without\n"
+                "the VSE and without writing the composited images. The 3D frames are rendered as PNG images.\n"
+                "Only for .mp4, .mov and .mkv outputs. FFmpeg must be installed",
+            ),
+        ),
+        default="VSE",
+        options=set(),
+    )
+
+    ffmpeg_filepath: StringProperty(
+        name="FFmpeg Executable",
+        description="FFmpeg executable used by the FFmpeg movie encoder.\n"
+        "If not set, FFmpeg is searched in the PATH of the system",
+        subtype="FILE_PATH",
+        default="",
+        options=set(),
+    )
+
     ##################################################################################
     # Draw
     ##################################################################################
@@ -49,6 +49,15 @@ def draw_addon_prefs(self, context):
     subCol = row.column()
     subCol.prop(self, "delete_temp_scene")
     subCol.prop(self, "delete_temp_images")
+    subCol.prop(self, "stamped_images_processes")
+    subCol.prop(self, "stamp_during_render")
+    subCol.prop(self, "render_chunks_processes")
+    subCol.prop(self, "stamped_images_layout")
+    subCol.prop(self, "stamped_images_format")
+    subCol.prop(self, "compositing_mode")
+    subCol.prop(self, "movie_encoder")
+    if "FFMPEG" == self.movie_encoder:
+        subCol.prop(self, "ffmpeg_filepath")
 
     # Dependencies
     ###############
@@ -0,0 +1,165 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Command line stamping of image sequences that have already been rendered, without Blender.
+
+The settings are read from a JSON file exported from Blender with the Export Stamp Info Settings operator
+(see operators/render_operators.py), or written by hand: missing values take their default values.
+
+Usage, from the directory containing the stampinfo package:
+    python -m stampinfo.cli --input "/renders/sh0010_####.png" --settings sh0010.json
+        --output "/dailies/sh0010_stamped_####.png"
+
+Requires Python 3.7+ and Pillow.
+"""
+
+import argparse
+import json
+import sys
+
+from stampinfo.config import config, sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+def loadStampInfoJob(settingsFilepath):
+    """Return the StampInfoSnapshot and the dictionary {frame: StampFrameContext} read from the specified
+    JSON file. The dictionary is empty if the file has no frame contexts
+    """
+    from stampinfo.properties.stampInfoSnapshot import StampInfoSnapshot, StampFrameContext
+
+    with open(settingsFilepath, "r", encoding="utf-8") as f:
+        values = json.load(f)
+
+    snapshot = StampInfoSnapshot.fromDict(values)
+    frameContexts = dict()
+    for frameValues in values.get("frameContexts", []):
+        frameContext = StampFrameContext.fromDict(frameValues)
+        frameContexts[frameContext.frame] = frameContext
+
+    return (snapshot, frameContexts)
+
+
+def stampSequence(
+    inputSequence,
+    settingsFilepath,
+    outputSequence,
+    frameStart=None,
+    frameEnd=None,
+    numProcesses=0,
+    layout="FULL",
+    cameraName=None,
+    lens=None,
+):
+    """Stamp the images of the input sequence that exist on disk and write them to the output sequence,
+    with the same frame indices.
+
+    Args:
+        inputSequence: path of the input sequence, with a # or printf frame pattern (eg: "/renders/sh_####.png")
+        settingsFilepath: JSON file with the settings, see loadStampInfoJob()
+        outputSequence: path of the output sequence, with a # frame pattern
+        frameStart, frameEnd: range of the frames to stamp, all the frames found if None
+        cameraName, lens: values stamped for the frames that have no frame context in the JSON file
+
+    Returns the number of stamped images
+    """
+    from datetime import datetime
+
+    from stampinfo.properties import infoImage
+    from stampinfo.properties.stampInfoSnapshot import StampFrameContext
+    from stampinfo.utils.utils_compositing import getSequenceFrameFilepath, isSupportedImageFile
+    from stampinfo.utils.utils_filenames import getSequenceFrames
+
+    snapshot, savedFrameContexts = loadStampInfoJob(settingsFilepath)
+
+    inputFrames = getSequenceFrames(inputSequence)
+    frames = [f for f in inputFrames if (frameStart is None or frameStart <= f) and (frameEnd is None or f <= frameEnd)]
+    if not len(frames):
+        _logger.error_ext(f"No image found for the sequence {inputSequence}")
+        return 0
+
+    unsupportedFiles = [inputFrames[f] for f in frames if not isSupportedImageFile(inputFrames[f])]
+    if len(unsupportedFiles):
+        _logger.error_ext(f"Unsupported image format: {unsupportedFiles[0]}")
+        return 0
+
+    if "#" not in outputSequence and 1 < len(frames):
+        _logger.error_ext(f"The output path must contain a # frame pattern: {outputSequence}")
+        return 0
+
+    timestamp = datetime.now()
+    frameContexts = []
+    for frame in frames:
+        frameContext = savedFrameContexts.get(frame)
+        if frameContext is None:
+            frameContext = StampFrameContext(frame, "", 0.0, "", timestamp)
+        if cameraName is not None:
+            frameContext.cameraName = cameraName
+        if lens is not None:
+            frameContext.lens = lens
+        frameContexts.append(frameContext)
+
+    inputFilepaths = [inputFrames[f] for f in frames]
+    outputFilepaths = [getSequenceFrameFilepath(outputSequence, f) for f in frames]
+
+    _logger.info(f"Stamping {len(frames)} images, from frame {frames[0]} to {frames[-1]}: {outputSequence}")
+    resolution = infoImage.stampImageFiles(
+        snapshot, inputFilepaths, outputFilepaths, frameContexts, numProcesses=numProcesses, layout=layout
+    )
+    _logger.info(f"Stamped images written, resolution: {resolution[0]} x {resolution[1]} px")
+
+    return len(frames)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m stampinfo.cli",
+        description="Stamp Info: stamp the images of a rendered sequence without Blender",
+    )
+    parser.add_argument("--input", required=True, help='input sequence, eg: "/renders/sh0010_####.png"')
+    parser.add_argument(
+        "--settings", required=True, help="JSON file exported from Blender with the Stamp Info settings"
+    )
+    parser.add_argument("--output", required=True, help='output sequence, eg: "/dailies/sh0010_stamped_####.png"')
+    parser.add_argument("--frame-start", type=int, default=None, help="first frame to stamp")
+    parser.add_argument("--frame-end", type=int, default=None, help="last frame to stamp (included)")
+    parser.add_argument("--processes", type=int, default=0, help="number of processes, 0 for one per CPU core")
+    parser.add_argument("--layout", choices=("FULL", "BORDER_STRIPS"), default="FULL")
+    parser.add_argument("--camera", default=None, help="camera name stamped on all the frames")
+    parser.add_argument("--lens", type=float, default=None, help="camera focal length stamped on all the frames")
+    args = parser.parse_args(argv)
+
+    config.initGlobalVariables()
+    sm_logging.initialize(addonName="Stamp Info", prefix="SI")
+
+    numImages = stampSequence(
+        args.input,
+        args.settings,
+        args.output,
+        frameStart=args.frame_start,
+        frameEnd=args.frame_end,
+        numProcesses=args.processes,
+        layout=args.layout,
+        cameraName=args.camera,
+        lens=args.lens,
+    )
+    return 0 if numImages else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
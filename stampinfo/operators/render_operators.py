@@ -21,17 +21,31 @@ To do: module description here.
 
 import bpy
 from bpy.types import Operator
-from bpy.props import EnumProperty
+from bpy.props import BoolProperty, EnumProperty, IntProperty, StringProperty
 
 # from ..utils.utils_render import getRenderOutputFilename
 from ..utils import utils
-from ..utils.utils_filenames import SequencePath
+from ..utils.utils_filenames import SequencePath, getSequenceFrames
 from ..utils.utils_os import delete_folder
 from ..utils.utils_ui import show_message_box
+from ..utils.utils_vse_render import purgeCompositingScenes
+from ..utils.utils_compositing import isSupportedImageFile
+from ..utils.utils_ffmpeg import getFFmpegFilepath, isSupportedMovieFile
+from ..utils.utils_strip_cache import StripCacheSlot, getStripCacheFilepath
+from ..utils.utils_render_chunks import (
+    ChunkWorkers,
+    getChunkWorkerCommand,
+    getFrameChunks,
+    getProcessesPerWorker,
+    getThreadsPerWorker,
+    runChunkWorkers,
+)
 
 from pathlib import Path
 
 from stampinfo.properties import stamper
+from stampinfo.properties import infoImage
+from stampinfo.properties.stampInfoManifest import getManifestFilepath
 from ..config import config
 
 from stampinfo.config import sm_logging
@@ -39,6 +53,26 @@ from stampinfo.config import sm_logging
 _logger = sm_logging.getLogger(__name__)
 
 
+def getDirectoryPath(path):
+    """Return the absolute path of the directory, ending with a path separator"""
+    dirPath = bpy.path.abspath(path)
+    if not dirPath.endswith(("\\", "/")):
+        dirPath += "\\"
+    return dirPath
+
+
+def getAnimationRenderFilepath(filepath):
+    """Return the absolute path of the rendered animation, with a # frame pattern at the end of the file name"""
+    render_filepath = bpy.path.abspath(filepath)
+
+    # test if we have some # in the file name
+    outputName = Path(render_filepath).stem
+    if "#" != outputName[-1]:
+        render_filepath = f"{Path(render_filepath).parent}\\{outputName}_#####{Path(render_filepath).suffix}"
+
+    return render_filepath
+
+
 class UAS_PT_StampInfo_Render(Operator):
     bl_idname = "uas_stampinfo.render"
     bl_label = "Render"
@@ -52,6 +86,20 @@ class UAS_PT_StampInfo_Render(Operator):
         default="STILL",
     )
 
+    # chunk of an animation rendered by a background process, see UAS_PT_StampInfo_RenderChunks
+    isChunk: BoolProperty(default=False, options={"HIDDEN", "SKIP_SAVE"})
+    chunkFrameStart: IntProperty(options={"HIDDEN", "SKIP_SAVE"})
+    chunkFrameEnd: IntProperty(options={"HIDDEN", "SKIP_SAVE"})
+    # image sequence written instead of the render output of the scene
+    chunkOutputFilepath: StringProperty(default="", options={"HIDDEN", "SKIP_SAVE"})
+    # processes stamping and compositing the images of the chunk, 0 to use the preferences
+    chunkNumProcesses: IntProperty(default=0, options={"HIDDEN", "SKIP_SAVE"})
+
+    # the animation is not rendered, the images already rendered are stamped again, see UAS_PT_StampInfo_Restamp
+    restampOnly: BoolProperty(default=False, options={"HIDDEN", "SKIP_SAVE"})
+    # directory of the rendered images used instead of the temporary render directory
+    renderedImagesPath: StringProperty(default="", options={"HIDDEN", "SKIP_SAVE"})
+
     @classmethod
     def description(self, context, properties):
         descr = "_"
@@ -120,6 +168,15 @@ class UAS_PT_StampInfo_Render(Operator):
         previousRenderPath = scene.render.filepath
         renderFrame = scene.frame_current
 
+        # range of the rendered frames, the stamped animation range remains the one of the scene
+        animFrameStart, animFrameEnd = scene.frame_start, scene.frame_end
+        # the chunks rendered at the same time share the CPU cores, see getProcessesPerWorker()
+        numProcesses = prefs.stamped_images_processes
+        if self.isChunk:
+            animFrameStart, animFrameEnd = self.chunkFrameStart, self.chunkFrameEnd
+            if 0 < self.chunkNumProcesses:
+                numProcesses = self.chunkNumProcesses
+
         # note: if scene.render.filepath is empty the Blender temp folder and a temp filename are used
         render_filepath = None
         seqPath = None
@@ -135,13 +192,10 @@ class UAS_PT_StampInfo_Render(Operator):
                     show_message_box("Please set a valid output file name", "Rendering aborted", icon="ERROR")
                     return {"FINISHED"}
         elif "ANIMATION" == self.renderMode:
-            render_filepath = stamper.getStampInfoRenderFilepath(scene)
-
-            # test if we have some # in the file name
-            render_filepath = bpy.path.abspath(render_filepath)
-            outputName = Path(render_filepath).stem
-            if "#" != outputName[-1]:
-                render_filepath = f"{Path(render_filepath).parent}\{outputName}_#####{Path(render_filepath).suffix}"
+            if self.isChunk and "" != self.chunkOutputFilepath:
+                render_filepath = getAnimationRenderFilepath(self.chunkOutputFilepath)
+            else:
+                render_filepath = getAnimationRenderFilepath(stamper.getStampInfoRenderFilepath(scene))
 
             seqPath = SequencePath(bpy.path.abspath(render_filepath))
             if "" == seqPath.sequence_name():
@@ -159,12 +213,51 @@ class UAS_PT_StampInfo_Render(Operator):
             Path(tempFramedRenderPath).mkdir(parents=True, exist_ok=True)
 
         tempImgRenderPath = seqPath.parent() + "_tmp_StampInfo_render" + "\\"
+        if self.restampOnly and "" != self.renderedImagesPath:
+            tempImgRenderPath = getDirectoryPath(self.renderedImagesPath)
         # print(f"tempImgRenderPath: {tempImgRenderPath}")
         if not Path(tempImgRenderPath).exists():
             Path(tempImgRenderPath).mkdir(parents=True, exist_ok=True)
 
+        # with the FFmpeg encoder the frames of a movie are rendered as images, then composited and streamed to FFmpeg
+        renderMovieAsImages = (
+            "ANIMATION" == self.renderMode
+            and not self.isChunk
+            and scene.render.is_movie_format
+            and "FFMPEG" == prefs.movie_encoder
+            and isSupportedMovieFile(seqPath.fullpath())
+        )
+        renderedImagesName = seqPath.sequence_name()
+        if renderMovieAsImages:
+            renderedImagesName = f"{seqPath.sequence_basename()}{seqPath.sequence_indices()}.png"
+
         tmpFileBasenamePattern = "tmp_StampInfo_"
         outputStillFile = ""
+        # rows of the top and bottom strips when the stamped images are written as border strips
+        stripsRows = None
+
+        # with in-memory compositing the stamped images are not written but directly composited over the
+        # rendered images by the worker processes. Movies still have to be composited in the VSE
+        compositeInMemory = "IN_MEMORY" == prefs.compositing_mode and isSupportedImageFile(seqPath.fullpath())
+
+        # the VSE requires a window
+        compositingEngine = "PILLOW" if "PILLOW" == prefs.compositing_mode or bpy.app.background else "VSE"
+
+        # the raw strip cache is read only by the compositors that don't use the VSE
+        stampedImagesFormat = prefs.stamped_images_format
+        if "RAW_CACHE" == stampedImagesFormat:
+            compositedWithoutVSE = ("PILLOW" == compositingEngine and isSupportedImageFile(seqPath.fullpath())) or (
+                renderMovieAsImages and getFFmpegFilepath(prefs.ffmpeg_filepath) is not None
+            )
+            if compositeInMemory or not compositedWithoutVSE:
+                stampedImagesFormat = "PNG_FAST"
+                if not compositeInMemory:
+                    _logger.info("The raw strip cache cannot be composited in the VSE, PNG - Fast is used")
+        stampedImagesExt = infoImage.getStampedImagesExtension(stampedImagesFormat)
+        # single file holding the stamped images of all the frames of the job, see utils_strip_cache.py
+        stripCacheFilepath = getStripCacheFilepath(
+            tempFramedRenderPath, (animFrameStart, animFrameEnd) if self.isChunk else None
+        )
 
         if "STILL" == self.renderMode:
             print("Render a still image at current frame")
@@ -177,32 +270,12 @@ class UAS_PT_StampInfo_Render(Operator):
 
             print(f" scene.render.filepath: {scene.render.filepath}")
 
-            displayRenderWindow = False
-            #     bpy.ops.render.view_show()
-            # bpy.ops.render.render(use_viewport=True)
-            if displayRenderWindow:
-                bpy.ops.render.render("INVOKE_DEFAULT", animation=False, write_still=True, use_viewport=False)
-            else:
-                bpy.ops.render.render(animation=False, write_still=True, use_viewport=False)
-
-            tempFramedRenderFilenameStill = (
-                outputStillFile
-                + seqPath.sequence_basename()
-                + tmpFileBasenamePattern
-                + seqPath.sequence_indices(at_frame=renderFrame)
-                + ".png"
-            )
-            siSettings.renderTmpImageWithStampedInfo(
-                scene,
-                renderFrame,
-                renderPath=tempFramedRenderPath,
-                renderFilename=tempFramedRenderFilenameStill,
-            )
+            frameContexts = infoImage.getFrameContexts(scene, renderFrame, renderFrame)
 
         elif "ANIMATION" == self.renderMode:
             print("Render animation")
 
-            scene.render.filepath = f"{tempImgRenderPath}{seqPath.sequence_name()}"
+            scene.render.filepath = f"{tempImgRenderPath}{renderedImagesName}"
             print(f" scene.render.filepath: {scene.render.filepath}")
 
             validRes = utils.convertToSupportedRenderResolution([scene.render.resolution_x, scene.render.resolution_y])
@@ -210,70 +283,221 @@ class UAS_PT_StampInfo_Render(Operator):
             scene.render.resolution_x = validRes[0]
             scene.render.resolution_y = validRes[1]
 
-            displayRenderWindow = False
-            #     bpy.ops.render.view_show()
-            # bpy.ops.render.render(use_viewport=True)
-            if displayRenderWindow:
-                bpy.ops.render.render("INVOKE_DEFAULT", animation=True, use_viewport=False)
-            else:
-                bpy.ops.render.render(animation=True, use_viewport=False)
-
-            #    outputFiles = getRenderOutputFilename(scene)
-
-            for currentFrame in range(scene.frame_start, scene.frame_end + 1):
-                scene.frame_set(currentFrame)
+            # the chunks of a movie are written as image sequences that are encoded once they are all rendered.
+            # The background process doesn't save the file so the scene is not modified
+            if self.isChunk and scene.render.is_movie_format:
+                scene.render.image_settings.file_format = "PNG"
+
+            # the values that change from one frame to another are gathered from the scene first, without
+            # evaluating it at each frame, then the stamped images are drawn by worker processes
+            frameContexts = infoImage.getFrameContexts(scene, animFrameStart, animFrameEnd)
+
+        # in proxy mode the render percentage is reduced until the images are stamped and composited: all the
+        # resolutions below are derived from it
+        previousResolutionPercentage = scene.render.resolution_percentage
+        try:
+            scene.render.resolution_percentage = stamper.getProxyResolutionPercentage(scene)
+            if previousResolutionPercentage != scene.render.resolution_percentage:
+                _logger.info(f"Proxy resolution: rendering at {scene.render.resolution_percentage}% of the resolution")
+
+            #        res = [scene.render.resolution_x, scene.render.resolution_y]
+            res = stamper.getRenderResolutionForStampInfo(scene, forceMultiplesOf2=True)  # wkip float!!
+            videoFirstFrameIndex = siSettings.videoFirstFrameIndex if siSettings.videoFirstFrameIndexUsed else 0
+
+            framedRenderFilepaths = []
+            renderedFilepaths = [] if compositeInMemory else None
+            for frameContext in frameContexts:
                 # scene.UAS_StampInfo_Settings.renderRootPathUsed = True
                 # scene.UAS_StampInfo_Settings.renderRootPath = tempRenderPath
+                frame = frameContext.frame
+
+                if compositeInMemory:
+                    outputFrame = frame
+                    if "ANIMATION" == self.renderMode and "3D_FRAME" != siSettings.outputImgIndicesMode:
+                        outputFrame = frame - scene.frame_start + videoFirstFrameIndex
+                    framedRenderFilepaths.append(
+                        f"{seqPath.parent()}{outputStillFile}{seqPath.sequence_name(at_frame=outputFrame)}"
+                    )
+                    renderedFilepaths.append(
+                        f"{tempImgRenderPath}{outputStillFile}{seqPath.sequence_name(at_frame=frame)}"
+                    )
+                elif "RAW_CACHE" == stampedImagesFormat:
+                    framedRenderFilepaths.append(stripCacheFilepath)
+                else:
+                    tempFramedRenderFilename = (
+                        outputStillFile
+                        + seqPath.sequence_basename()
+                        + tmpFileBasenamePattern
+                        + seqPath.sequence_indices(at_frame=frame)
+                        + stampedImagesExt
+                    )
+                    framedRenderFilepaths.append(tempFramedRenderPath + tempFramedRenderFilename)
+
+            # only the stamped images whose content changed since the previous render are drawn. The chunks rendered
+            # at the same time by other processes have their own manifest
+            manifestFilepath = getManifestFilepath(
+                tempFramedRenderPath, (animFrameStart, animFrameEnd) if self.isChunk else None
+            )
 
-                tempFramedRenderFilename = (
-                    seqPath.sequence_basename()
-                    + tmpFileBasenamePattern
-                    + seqPath.sequence_indices(at_frame=currentFrame)
-                    + ".png"
+            # the strip cache is created again for each job, the stamped images of the previous render are not kept
+            if "RAW_CACHE" == stampedImagesFormat:
+                manifestFilepath = None
+                siSettings.createTmpImagesCache(
+                    scene,
+                    stripCacheFilepath,
+                    frameContexts[0].frame,
+                    frameContexts[-1].frame,
+                    layout=prefs.stamped_images_layout,
                 )
 
-                siSettings.renderTmpImageWithStampedInfo(
-                    scene, currentFrame, renderPath=tempFramedRenderPath, renderFilename=tempFramedRenderFilename
+            # in streaming mode each frame is stamped in the background as soon as its rendered image is written,
+            # while the next frames are rendered
+            stampedImagesStream = None
+            if "ANIMATION" == self.renderMode and prefs.stamp_during_render and not self.restampOnly:
+                stampedImagesStream = siSettings.getTmpImagesWithStampedInfoStream(
+                    scene,
+                    numProcesses=numProcesses,
+                    layout=prefs.stamped_images_layout,
+                    fileFormat=stampedImagesFormat,
+                    outputRes=res,
+                    manifestFilepath=manifestFilepath,
                 )
+                frameIndices = {frameContext.frame: i for i, frameContext in enumerate(frameContexts)}
 
-            # lister images temps stamp info
-            # lister images temp image
+                def _stampRenderedFrame(renderedScene, *args):
+                    i = frameIndices.get(renderedScene.frame_current)
+                    if i is not None:
+                        stampedImagesStream.submit(
+                            frameContexts[i],
+                            framedRenderFilepaths[i],
+                            None if renderedFilepaths is None else renderedFilepaths[i],
+                        )
 
-        # for some reason this cannot be set right after the call to the render otherwise it is considered as the effective render path
-        scene.render.filepath = previousRenderPath
-        scene.frame_current = renderFrame
+                bpy.app.handlers.render_write.append(_stampRenderedFrame)
 
-        # compositer
-        # use vse_render to store all the elements to composite
-        atSpecificFrame = None
-        if "STILL" == self.renderMode:
-            atSpecificFrame = renderFrame
-
-        # vse_render.clearMedia()
-        # vse_render.inputBGMediaPath = (
-        #     tempImgRenderPath + outputStillFile + seqPath.sequence_name(at_frame=atSpecificFrame)
-        # )
-        # print(f" vse BG: vse_render.inputBGMediaPath: {vse_render.inputBGMediaPath}")
-        # vse_render.inputBGResolution = res
-
-        tempFramedRenderFilenameGeneric = (
-            outputStillFile
-            + seqPath.sequence_basename()
-            + tmpFileBasenamePattern
-            + seqPath.sequence_indices(at_frame=atSpecificFrame)
-            + seqPath.extension()
-        )
-        infoImgSeq = tempFramedRenderPath + tempFramedRenderFilenameGeneric
+            displayRenderWindow = False
+            previousFrameStart, previousFrameEnd = scene.frame_start, scene.frame_end
+            previousFileFormat = scene.render.image_settings.file_format
+            try:
+                if self.restampOnly:
+                    print("Rendered images used: the animation is not rendered")
+
+                elif "STILL" == self.renderMode:
+                    #     bpy.ops.render.view_show()
+                    # bpy.ops.render.render(use_viewport=True)
+                    if displayRenderWindow:
+                        bpy.ops.render.render("INVOKE_DEFAULT", animation=False, write_still=True, use_viewport=False)
+                    else:
+                        bpy.ops.render.render(animation=False, write_still=True, use_viewport=False)
+
+                elif "ANIMATION" == self.renderMode:
+                    #     bpy.ops.render.view_show()
+                    # bpy.ops.render.render(use_viewport=True)
+                    # only the frames of the chunk are rendered
+                    scene.frame_start, scene.frame_end = animFrameStart, animFrameEnd
+                    if renderMovieAsImages:
+                        scene.render.image_settings.file_format = "PNG"
+                    try:
+                        if displayRenderWindow:
+                            bpy.ops.render.render("INVOKE_DEFAULT", animation=True, use_viewport=False)
+                        else:
+                            bpy.ops.render.render(animation=True, use_viewport=False)
+                    finally:
+                        scene.frame_start, scene.frame_end = previousFrameStart, previousFrameEnd
+                        scene.render.image_settings.file_format = previousFileFormat
+
+                    #    outputFiles = getRenderOutputFilename(scene)
+
+                    # lister images temps stamp info
+                    # lister images temp image
+            finally:
+                if stampedImagesStream is not None:
+                    bpy.app.handlers.render_write.remove(_stampRenderedFrame)
+
+            if stampedImagesStream is not None:
+                # the frames that Blender did not write, because their image already existed or because the render
+                # was cancelled, have not been submitted
+                renderedFramesFilepaths = []
+                for frameContext in frameContexts:
+                    if renderMovieAsImages:
+                        renderedFrameName = (
+                            f"{seqPath.sequence_basename()}{seqPath.sequence_indices(at_frame=frameContext.frame)}.png"
+                        )
+                    else:
+                        renderedFrameName = seqPath.sequence_name(at_frame=frameContext.frame)
+                    renderedFramesFilepaths.append(f"{tempImgRenderPath}{renderedFrameName}")
+
+                stripsRows = stampedImagesStream.finish(
+                    frameContexts, framedRenderFilepaths, renderedFramesFilepaths, bgFilepaths=renderedFilepaths
+                )
+                missingFrames = stampedImagesStream.missingFrames
+                if len(missingFrames):
+                    self.report(
+                        {"WARNING"},
+                        f"Stamp Info: {len(missingFrames)} frames have not been rendered and are not stamped, "
+                        f"from frame {missingFrames[0]} to frame {missingFrames[-1]}",
+                    )
+            else:
+                stripsRows = siSettings.renderTmpImagesWithStampedInfo(
+                    scene,
+                    frameContexts,
+                    framedRenderFilepaths,
+                    numProcesses=numProcesses,
+                    layout=prefs.stamped_images_layout,
+                    fileFormat=stampedImagesFormat,
+                    bgFilepaths=renderedFilepaths,
+                    outputRes=res,
+                    manifestFilepath=manifestFilepath,
+                )
 
-        print(f" vse over: infoImgSeq: {infoImgSeq}")
+            # for some reason this cannot be set right after the call to the render otherwise it is considered as the effective render path
+            scene.render.filepath = previousRenderPath
+            scene.frame_current = renderFrame
 
-        #        res = [scene.render.resolution_x, scene.render.resolution_y]
-        res = stamper.getRenderResolutionForStampInfo(scene, forceMultiplesOf2=True)  # wkip float!!
+            # compositer
+            # use vse_render to store all the elements to composite
+            atSpecificFrame = None
+            if "STILL" == self.renderMode:
+                atSpecificFrame = renderFrame
 
-        bgMedia = tempImgRenderPath + outputStillFile + seqPath.sequence_name(at_frame=atSpecificFrame)
-        bgRes = stamper.getRenderResolution(scene)
-        fgMedia = infoImgSeq
-        fgRes = stamper.getRenderResolutionForStampInfo(scene, forceMultiplesOf2=True)  # wkip int !!!
+            # vse_render.clearMedia()
+            # vse_render.inputBGMediaPath = (
+            #     tempImgRenderPath + outputStillFile + seqPath.sequence_name(at_frame=atSpecificFrame)
+            # )
+            # print(f" vse BG: vse_render.inputBGMediaPath: {vse_render.inputBGMediaPath}")
+            # vse_render.inputBGResolution = res
+
+            tempFramedRenderFilenameGeneric = (
+                outputStillFile
+                + seqPath.sequence_basename()
+                + tmpFileBasenamePattern
+                + seqPath.sequence_indices(at_frame=atSpecificFrame)
+                + stampedImagesExt
+            )
+            infoImgSeq = tempFramedRenderPath + tempFramedRenderFilenameGeneric
+
+            print(f" vse over: infoImgSeq: {infoImgSeq}")
+
+            bgMedia = tempImgRenderPath + outputStillFile + seqPath.sequence_name(at_frame=atSpecificFrame)
+            if renderMovieAsImages:
+                bgMedia = tempImgRenderPath + renderedImagesName
+            bgRes = stamper.getRenderResolution(scene)
+            fgMedia = infoImgSeq
+            fgRes = stamper.getRenderResolutionForStampInfo(scene, forceMultiplesOf2=True)  # wkip int !!!
+        finally:
+            scene.render.resolution_percentage = previousResolutionPercentage
+
+        # the border strips are placed by the compositor at their position in the stamped image
+        fgStrips = None
+        if "RAW_CACHE" == stampedImagesFormat:
+            fgMedia = None
+            if stripsRows is None:
+                fgStrips = [(StripCacheSlot(stripCacheFilepath, 0), (0, fgRes[1]))]
+            else:
+                fgStrips = [(StripCacheSlot(stripCacheFilepath, i), rows) for i, rows in enumerate(stripsRows)]
+        elif stripsRows is not None:
+            fgMedia = None
+            fgStrips = list(zip(infoImage.getBorderStripsFilepaths(infoImgSeq), stripsRows))
 
         # vse_render.inputOverMediaPath = infoImgSeq
         # vse_render.inputOverResolution = res
@@ -287,13 +511,17 @@ class UAS_PT_StampInfo_Render(Operator):
         if "STILL" == self.renderMode:
             video_frame_start = renderFrame
             video_frame_end = renderFrame
+            importAtFrame = videoFirstFrameIndex
         else:
-            video_frame_start = scene.frame_start
-            video_frame_end = scene.frame_end
-
-        videoFirstFrameIndex = siSettings.videoFirstFrameIndex if siSettings.videoFirstFrameIndexUsed else 0
+            video_frame_start = animFrameStart
+            video_frame_end = animFrameEnd
+            # output index of the first rendered frame when the video indices are used
+            importAtFrame = videoFirstFrameIndex + animFrameStart - scene.frame_start
 
-        if True:
+        if compositeInMemory:
+            if "STILL" == self.renderMode:
+                utils.openMedia(compositedMediaFile, inExternalPlayer=False)
+        else:
             #            vse_render.compositeVideoInVSE(
             vse_render.compositeMedia(
                 scene,
@@ -301,25 +529,333 @@ class UAS_PT_StampInfo_Render(Operator):
                 bg_res=bgRes,
                 fg_file=fgMedia,
                 fg_res=fgRes,
+                fg_strips=fgStrips,
                 frame_start=video_frame_start,
                 frame_end=video_frame_end,
                 output_file=compositedMediaFile,
                 postfix_scene_name="_StampInfoRender",
                 output_resolution=res,
-                import_at_frame=videoFirstFrameIndex,
+                import_at_frame=importAtFrame,
                 outputImgIndicesMode=siSettings.outputImgIndicesMode,
                 clean_temp_scene=False,  # prefs.delete_temp_scene,
+                engine=compositingEngine,
+                num_processes=numProcesses,
+                movie_encoder=prefs.movie_encoder,
+                ffmpeg_filepath=prefs.ffmpeg_filepath,
+                encoding_preset=siSettings.movieEncodingPreset,
             )
 
-        if prefs.delete_temp_images:
+        # the compositing scene is kept between still renders so that its strips are reused
+        if prefs.delete_temp_scene and "ANIMATION" == self.renderMode:
+            purgeCompositingScenes()
+
+        # the temporary directories are shared by all the chunks, they are deleted once all are rendered
+        if prefs.delete_temp_images and not self.isChunk:
             print("Cleaning temp dirs")
             delete_folder(tempFramedRenderPath)
-            delete_folder(tempImgRenderPath)
+            # the rendered images of a directory chosen by the user are not temporary files
+            if not (self.restampOnly and "" != self.renderedImagesPath):
+                delete_folder(tempImgRenderPath)
+
+        return {"FINISHED"}
+
+
+class UAS_PT_StampInfo_RenderChunks(Operator):
+    bl_idname = "uas_stampinfo.render_chunks"
+    bl_label = "Render Animation in Background"
+    bl_description = (
+        "Render the animation with Stamp Info in several background Blender processes, each one rendering\n"
+        "a chunk of the frames. The number of processes is set in the add-on preferences.\n"
+        "The file has to be saved since the processes render the saved file. Press Esc to cancel the render"
+    )
+    bl_options = {"INTERNAL"}
+
+    def execute(self, context):
+        scene = context.scene
+        siSettings = scene.UAS_StampInfo_Settings
+        prefs = context.preferences.addons["stampinfo"].preferences
+
+        if not siSettings.stampInfoUsed:
+            show_message_box("Stamp Info is not used in this scene", "Rendering aborted", icon="ERROR")
+            return {"FINISHED"}
+
+        if not bpy.data.is_saved or bpy.data.is_dirty:
+            show_message_box(
+                "The file has to be saved in order to be rendered by background processes",
+                "Rendering aborted",
+                icon="ERROR",
+            )
+            return {"FINISHED"}
+
+        seqPath = SequencePath(getAnimationRenderFilepath(stamper.getStampInfoRenderFilepath(scene)))
+        if "" == seqPath.sequence_name():
+            show_message_box("Please set a valid sequence output file name", "Rendering aborted", icon="ERROR")
+            return {"FINISHED"}
+
+        tempChunksPath = seqPath.parent() + "_tmp_StampInfo_chunks" + "\\"
+        Path(tempChunksPath).mkdir(parents=True, exist_ok=True)
+
+        # the chunks write the final image sequence directly. Movies are encoded from the image sequences
+        # of all the chunks
+        outputIsImage = isSupportedImageFile(seqPath.fullpath())
+        if outputIsImage:
+            chunkOutputFilepath = seqPath.parent() + seqPath.sequence_name()
+        else:
+            chunkOutputFilepath = f"{tempChunksPath}{seqPath.sequence_basename()}{seqPath.sequence_indices()}.png"
+
+        chunks = getFrameChunks(scene.frame_start, scene.frame_end, prefs.render_chunks_processes)
+        numThreads = getThreadsPerWorker(len(chunks))
+        numStampingProcesses = getProcessesPerWorker(len(chunks), prefs.stamped_images_processes)
+        commands = [
+            getChunkWorkerCommand(
+                bpy.app.binary_path,
+                bpy.data.filepath,
+                scene.name,
+                chunk,
+                chunkOutputFilepath,
+                numThreads=numThreads,
+                numStampingProcesses=numStampingProcesses,
+            )
+            for chunk in chunks
+        ]
+        logFilepaths = [f"{tempChunksPath}chunk_{chunk[0]}-{chunk[1]}.log" for chunk in chunks]
+
+        # values used once the processes have ended, the scene may be modified in the meantime
+        self._seqPath = seqPath
+        self._tempChunksPath = tempChunksPath
+        self._chunkOutputFilepath = chunkOutputFilepath
+        self._outputIsImage = outputIsImage
+        self._chunks = chunks
+        self._frameRange = (scene.frame_start, scene.frame_end)
+
+        _logger.info(f"Rendering frames {scene.frame_start} to {scene.frame_end} in {len(chunks)} background processes")
+
+        # without a window the operator cannot be modal, there are no events to poll the processes
+        if bpy.app.background:
+            returnCodes = runChunkWorkers(commands, logFilepaths)
+            return self._finishRender(context, returnCodes)
+
+        self._workers = ChunkWorkers(commands, logFilepaths)
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.5, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, len(chunks))
+        context.workspace.status_text_set(f"Stamp Info: rendering in {len(chunks)} background processes - Esc: Cancel")
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        if "ESC" == event.type:
+            self._workers.kill()
+            self._endModal(context)
+            _logger.warning_ext("Background render cancelled, the processes have been stopped")
+            self.report({"WARNING"}, "Stamp Info: background render cancelled")
+            return {"CANCELLED"}
+
+        if "TIMER" == event.type:
+            if not self._workers.poll():
+                self._endModal(context)
+                return self._finishRender(context, self._workers.getReturnCodes())
+            context.window_manager.progress_update(self._workers.numEnded)
+
+        return {"PASS_THROUGH"}
+
+    def _endModal(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def _finishRender(self, context, returnCodes):
+        """Check the images written by the processes and encode the movie from them"""
+        scene = context.scene
+        siSettings = scene.UAS_StampInfo_Settings
+        prefs = context.preferences.addons["stampinfo"].preferences
+        vse_render = context.window_manager.stampinfo_vse_render
+        seqPath = self._seqPath
+        tempChunksPath = self._tempChunksPath
+        chunkOutputFilepath = self._chunkOutputFilepath
+        chunks = self._chunks
+        frameStart, frameEnd = self._frameRange
+
+        # the output indices of the frames, as written by the chunks
+        videoFirstFrameIndex = siSettings.videoFirstFrameIndex if siSettings.videoFirstFrameIndexUsed else 0
+        outputFrames = range(frameStart, frameEnd + 1)
+        if "3D_FRAME" != siSettings.outputImgIndicesMode:
+            outputFrames = range(videoFirstFrameIndex, videoFirstFrameIndex + len(outputFrames))
+
+        writtenFrames = getSequenceFrames(chunkOutputFilepath)
+        missingFrames = [f for f in outputFrames if f not in writtenFrames]
+        failedChunks = [chunk for chunk, returnCode in zip(chunks, returnCodes) if 0 != returnCode]
+        if len(failedChunks) or len(missingFrames):
+            for chunk in failedChunks:
+                _logger.error_ext(f"*** Rendering of the frames {chunk[0]} to {chunk[1]} failed")
+            show_message_box(
+                f"{len(missingFrames)} stamped images have not been rendered\nSee the log files in {tempChunksPath}",
+                "Rendering failed",
+                icon="ERROR",
+            )
+            return {"FINISHED"}
+
+        if not self._outputIsImage:
+            from PIL import Image
+
+            with Image.open(writtenFrames[outputFrames[0]]) as img:
+                res = list(img.size)
+
+            vse_render.compositeMedia(
+                scene,
+                bg_file=chunkOutputFilepath,
+                bg_res=res,
+                frame_start=frameStart,
+                frame_end=frameEnd,
+                output_file=f"{seqPath.parent()}{seqPath.sequence_name()}",
+                postfix_scene_name="_StampInfoRender",
+                output_resolution=res,
+                import_at_frame=videoFirstFrameIndex,
+                outputImgIndicesMode=siSettings.outputImgIndicesMode,
+                clean_temp_scene=False,
+                num_processes=prefs.stamped_images_processes,
+                movie_encoder=prefs.movie_encoder,
+                ffmpeg_filepath=prefs.ffmpeg_filepath,
+                encoding_preset=siSettings.movieEncodingPreset,
+            )
+
+        if prefs.delete_temp_scene:
+            purgeCompositingScenes()
+
+        if prefs.delete_temp_images:
+            print("Cleaning temp dirs")
+            # temporary directories of the chunks, placed next to the images they write
+            chunksParentPath = SequencePath(chunkOutputFilepath).parent()
+            delete_folder(chunksParentPath + "_tmp_StampInfo_framing" + "\\")
+            delete_folder(chunksParentPath + "_tmp_StampInfo_render" + "\\")
+            delete_folder(tempChunksPath)
+
+        self.report({"INFO"}, f"Stamp Info: {len(outputFrames)} frames rendered in {len(chunks)} processes")
+        return {"FINISHED"}
+
+
+class UAS_PT_StampInfo_Restamp(Operator):
+    bl_idname = "uas_stampinfo.restamp"
+    bl_label = "Re-Stamp Animation"
+    bl_description = (
+        "Stamp again the images of the animation already rendered, without rendering them again.\n"
+        "The images of the last render with Stamp Info are used, which requires the temporary images\n"
+        "to be kept (see the add-on preferences), or the images of a specified directory"
+    )
+    bl_options = {"INTERNAL"}
+
+    renderedImagesPath: StringProperty(
+        name="Rendered Images",
+        description="Directory of the rendered images, named as the render output of the scene.\n"
+        "If empty, the images of the last render with Stamp Info are used",
+        subtype="DIR_PATH",
+        default="",
+        options={"SKIP_SAVE"},
+    )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self, width=500)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "renderedImagesPath")
+
+    def execute(self, context):
+        scene = context.scene
+
+        if scene.render.is_movie_format:
+            show_message_box("Only rendered image sequences can be stamped again", "Re-stamp aborted", icon="ERROR")
+            return {"FINISHED"}
+
+        seqPath = SequencePath(getAnimationRenderFilepath(stamper.getStampInfoRenderFilepath(scene)))
+        if "" == seqPath.sequence_name():
+            show_message_box("Please set a valid sequence output file name", "Re-stamp aborted", icon="ERROR")
+            return {"FINISHED"}
+
+        if "" == self.renderedImagesPath:
+            renderedImagesPath = seqPath.parent() + "_tmp_StampInfo_render" + "\\"
+        else:
+            renderedImagesPath = getDirectoryPath(self.renderedImagesPath)
+
+        # the rendered images are named with the 3D frames
+        renderedFrames = getSequenceFrames(renderedImagesPath + seqPath.sequence_name())
+        missingFrames = [f for f in range(scene.frame_start, scene.frame_end + 1) if f not in renderedFrames]
+        if len(missingFrames):
+            show_message_box(
+                f"{len(missingFrames)} rendered images are missing, starting at frame {missingFrames[0]}:\n"
+                f"{renderedImagesPath}{seqPath.sequence_name()}",
+                "Re-stamp aborted",
+                icon="ERROR",
+            )
+            return {"FINISHED"}
+
+        # the rendered images are not scaled, they must have been rendered with the current proxy resolution
+        from PIL import Image
+
+        resPercentage = stamper.getProxyResolutionPercentage(scene) * 0.01
+        expectedRes = (int(scene.render.resolution_x * resPercentage), int(scene.render.resolution_y * resPercentage))
+        with Image.open(renderedFrames[scene.frame_start]) as img:
+            renderedRes = img.size
+        if renderedRes != expectedRes:
+            show_message_box(
+                f"The rendered images are {renderedRes[0]} x {renderedRes[1]} px instead of "
+                f"{expectedRes[0]} x {expectedRes[1]} px.\nCheck the resolution and the proxy resolution of the scene",
+                "Re-stamp aborted",
+                icon="ERROR",
+            )
+            return {"FINISHED"}
+
+        return bpy.ops.uas_stampinfo.render(
+            renderMode="ANIMATION", restampOnly=True, renderedImagesPath=self.renderedImagesPath
+        )
+
+
+class UAS_PT_StampInfo_ExportSettings(Operator):
+    bl_idname = "uas_stampinfo.export_settings"
+    bl_label = "Export Settings..."
+    bl_description = (
+        "Export the Stamp Info settings and the camera values of the frames of the scene to a JSON file.\n"
+        "This file is used to stamp rendered images without Blender with the command line tool stampinfo.cli"
+    )
+    bl_options = {"INTERNAL"}
+
+    filepath: StringProperty(subtype="FILE_PATH")
+
+    filter_glob: StringProperty(default="*.json", options={"HIDDEN"})
+
+    def invoke(self, context, event):
+        if "" == self.filepath:
+            blendName = Path(bpy.data.filepath).stem if bpy.data.is_saved else "untitled"
+            self.filepath = f"{blendName}_{context.scene.name}_StampInfo.json"
+        context.window_manager.fileselect_add(self)
+
+        return {"RUNNING_MODAL"}
+
+    def execute(self, context):
+        import json
+
+        scene = context.scene
+        filepath = bpy.path.ensure_ext(self.filepath, ".json")
+
+        values = infoImage.getStampInfoSnapshot(scene).toDict()
+        values["frameContexts"] = [
+            c.toDict() for c in infoImage.getFrameContexts(scene, scene.frame_start, scene.frame_end)
+        ]
+
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(values, f, indent=4)
 
+        self.report({"INFO"}, f"Stamp Info settings exported to {filepath}")
         return {"FINISHED"}
 
 
-_classes = (UAS_PT_StampInfo_Render,)
+_classes = (
+    UAS_PT_StampInfo_Render,
+    UAS_PT_StampInfo_RenderChunks,
+    UAS_PT_StampInfo_Restamp,
+    UAS_PT_StampInfo_ExportSettings,
+)
 
 
 def register():
@@ -0,0 +1,264 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Manifest of the stamped images written in a directory, so that only the images whose content changes are drawn
+again at the next render.
+The content of each image is identified by a hash of the values drawn on it.
+"""
+
+import getpass
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+from stampinfo.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# name of the manifest file, written in the directory of the stamped images
+MANIFEST_FILENAME = "_StampInfo_Manifest"
+
+# to increase when the drawing of the stamped images changes so that the images of the previous versions are not used
+_MANIFEST_VERSION = 2
+
+# settings drawn only when another setting is True, in the form {setting: toggle setting}
+_SETTINGS_TOGGLES = {
+    "projectName": "projectUsed",
+    "cornerNote": "cornerNoteUsed",
+    "bottomNote": "bottomNoteUsed",
+    "notesLine01": "notesUsed",
+    "notesLine02": "notesUsed",
+    "notesLine03": "notesUsed",
+    "sequenceName": "sequenceUsed",
+    "shotName": "shotUsed",
+    "takeName": "takeUsed",
+    "edit3DFrame": "edit3DFrameUsed",
+    "edit3DTotalNumber": "edit3DFrameUsed",
+    "videoFirstFrameIndex": "videoFirstFrameIndexUsed",
+}
+
+# settings that don't change the stamped images. The logo file is identified by the hash of its content
+_SETTINGS_NOT_DRAWN = (
+    "renderRootPathUsed",
+    "renderRootPath",
+    "logoMode",
+    "logoBuiltinName",
+    "logoFilepath",
+    "debugMode",
+    "debug_DontDeleteCompoNodes",
+    "movieEncodingPreset",
+    # the proxy ratio changes the resolution of the stamped images, which is part of the hash of the static layer
+    "proxyResolution",
+)
+
+
+def getManifestFilepath(dirPath, chunk=None):
+    """Return the path of the manifest of the stamped images of the specified directory.
+    The chunks of frames rendered at the same time by several processes have their own manifest, see
+    utils_render_chunks.py
+
+    Args:
+        dirPath: directory of the stamped images, ending with a path separator
+        chunk: range of frames rendered by the process, in the form (chunk start, chunk end), or None
+    """
+    if chunk is None:
+        return f"{dirPath}{MANIFEST_FILENAME}.json"
+    return f"{dirPath}{MANIFEST_FILENAME}_{chunk[0]}-{chunk[1]}.json"
+
+
+_CHUNK_MANIFEST_PATTERN = re.compile(rf"^{MANIFEST_FILENAME}_(-?\d+)-(-?\d+)\.json$")
+
+
+def _getManifestChunk(filename):
+    """Return the range of frames of the chunk of a manifest file name, in the form (chunk start, chunk end),
+    or None for the manifest of a whole render, see getManifestFilepath()"""
+    match = _CHUNK_MANIFEST_PATTERN.match(filename)
+    if match is None:
+        return None
+    return (int(match.group(1)), int(match.group(2)))
+
+
+def _getHash(values):
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=list).encode("utf-8")).hexdigest()
+
+
+def getFileHash(filepath):
+    """Return the hash of the content of the file, "" if the file doesn't exist"""
+    if "" == filepath or not os.path.isfile(filepath):
+        return ""
+    fileHash = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            fileHash.update(block)
+    return fileHash.hexdigest()
+
+
+def getResolvedSettings(settings):
+    """Return the dictionary of the settings that are drawn on the stamped images, the settings
+    disabled by their toggle being removed"""
+    resolved = dict()
+    for name, value in vars(settings).items():
+        if name in _SETTINGS_NOT_DRAWN:
+            continue
+        toggle = _SETTINGS_TOGGLES.get(name)
+        if toggle is not None and not getattr(settings, toggle):
+            continue
+        resolved[name] = value
+    return resolved
+
+
+def getStaticLayerHash(snapshot, renderW, renderH, innerH, layout="FULL", fileFormat="PNG"):
+    """Return the hash of the values drawn on the stamped images of all the frames of the snapshot"""
+    settings = snapshot.settings
+    return _getHash(
+        {
+            "version": _MANIFEST_VERSION,
+            "settings": getResolvedSettings(settings),
+            "sceneName": snapshot.sceneName,
+            "fps": snapshot.fps,
+            "frameStart": snapshot.frameStart,
+            "frameEnd": snapshot.frameEnd,
+            "filepath": snapshot.filepath,
+            "userName": getpass.getuser() if settings.userNameUsed else "",
+            "logo": getFileHash(snapshot.logoFilepath) if settings.logoUsed else "",
+            "resolution": (renderW, renderH, innerH),
+            "layout": layout,
+            "fileFormat": fileFormat,
+        }
+    )
+
+
+def getFrameHash(staticLayerHash, settings, frameContext):
+    """Return the hash of the values drawn on the stamped image of the frame. Only the values that are
+    actually drawn are used.
+    The date and time of the render are not part of the hash, otherwise no image could ever be reused: the images
+    drawn again at a render get the date and time of the images that are kept, see
+    StampedImagesManifest.getJobTimestamp()
+
+    Args:
+        staticLayerHash: the value returned by getStaticLayerHash()
+        frameContext: a StampFrameContext instance
+    """
+    return _getHash(
+        (
+            staticLayerHash,
+            frameContext.frame,
+            frameContext.cameraName if settings.cameraUsed else "",
+            int(frameContext.lens) if settings.cameraLensUsed else 0,
+        )
+    )
+
+
+class StampedImagesManifest:
+    """Hashes of the stamped images written in a directory, read from and written to the manifest file.
+    Each image is identified by its file name.
+
+    The manifest file is deleted with discard() before images are written so that, if the render is interrupted,
+    the images written so far are not considered as up to date at the next render. The manifests of the frame ranges
+    overlapping this one are deleted too so that they don't refer to the previous content of the images, the ones
+    of the other chunks rendered at the same time are kept. The manifest is written again by save()
+
+    The manifest also keeps the hash of the static layer and the date and time stamped on its images, so that all
+    the images of a sequence show the same time even when only some of them are drawn again
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._hashes = dict()
+        self._staticLayerHash = None
+        self._timestamp = None
+
+        if os.path.isfile(filepath):
+            try:
+                with open(filepath, "r", encoding="utf-8") as f:
+                    values = json.load(f)
+                if _MANIFEST_VERSION == values.get("version"):
+                    self._hashes = values.get("images", dict())
+                    self._staticLayerHash = values.get("staticLayer")
+                    timestamp = values.get("timestamp")
+                    self._timestamp = None if timestamp is None else datetime.fromisoformat(timestamp)
+            except (OSError, ValueError) as e:
+                _logger.warning_ext(f"Stamped images manifest cannot be read, all the images are drawn: {e}")
+
+    def isUpToDate(self, imageFilepaths, frameHash):
+        """Return True if the images written for a frame have the specified hash and still exist.
+        imageFilepaths: list of the images of the frame, the first one identifies the frame
+        """
+        if frameHash != self._hashes.get(os.path.basename(imageFilepaths[0])):
+            return False
+        return all(os.path.isfile(f) for f in imageFilepaths)
+
+    def getJobTimestamp(self, staticLayerHash):
+        """Return the date and time stamped on the images of the manifest, or None if they have been drawn with
+        another static layer. In this case none of them is up to date and the time of the new render is used
+        """
+        if staticLayerHash != self._staticLayerHash:
+            return None
+        return self._timestamp
+
+    def update(self, imageFilepaths, frameHash):
+        self._hashes[os.path.basename(imageFilepaths[0])] = frameHash
+
+    def discard(self):
+        """Delete the manifest file and the ones of the frame ranges overlapping it, the hashes are kept in memory
+        until save() is called. The manifest of a whole render overlaps all the chunks
+        """
+        dirPath, filename = os.path.split(self.filepath)
+        chunk = _getManifestChunk(filename)
+
+        def _overlaps(manifestFilename):
+            if manifestFilename == filename:
+                return True
+            if not manifestFilename.startswith(MANIFEST_FILENAME) or not manifestFilename.endswith(".json"):
+                return False
+            otherChunk = _getManifestChunk(manifestFilename)
+            if chunk is None or otherChunk is None:
+                return True
+            return otherChunk[0] <= chunk[1] and chunk[0] <= otherChunk[1]
+
+        try:
+            with os.scandir(dirPath or ".") as entries:
+                manifestFilepaths = [e.path for e in entries if _overlaps(e.name)]
+        except FileNotFoundError:
+            return
+
+        for manifestFilepath in manifestFilepaths:
+            try:
+                os.remove(manifestFilepath)
+            except FileNotFoundError:
+                pass
+
+    def save(self, staticLayerHash, timestamp):
+        """Write the manifest.
+        Args:
+            staticLayerHash: the value returned by getStaticLayerHash() for the images
+            timestamp: date and time stamped on the images, as a datetime
+        """
+        self._staticLayerHash = staticLayerHash
+        self._timestamp = timestamp
+        values = {
+            "version": _MANIFEST_VERSION,
+            "staticLayer": staticLayerHash,
+            "timestamp": timestamp.isoformat(),
+            "images": self._hashes,
+        }
+        with open(self.filepath, "w", encoding="utf-8") as f:
+            json.dump(values, f, indent=1)
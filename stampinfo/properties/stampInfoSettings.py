@@ -32,6 +32,7 @@ from stampinfo.properties.stamper import (
     getInnerHeight,
 )
 from stampinfo.utils import utils
+from stampinfo.utils.utils_ffmpeg import DEFAULT_ENCODING_PRESET, ENCODING_PRESETS
 
 from stampinfo.config import sm_logging
 
@@ -300,6 +301,29 @@ class UAS_StampInfoSettings(bpy.types.PropertyGroup):
         options=set(),
     )
 
+    movieEncodingPreset: EnumProperty(
+        name="Movie Encoding",
+        description="Encoding settings of the stamped movies",
+        items=[(name, preset["name"], preset["description"]) for name, preset in ENCODING_PRESETS.items()],
+        default=DEFAULT_ENCODING_PRESET,
+        options=set(),
+    )
+
+    proxyResolution: EnumProperty(
+        name="Proxy Resolution",
+        description="Render, stamp and composite the images at a fraction of the output resolution, for quick reviews."
+        "\nThe render percentage of the scene is multiplied by the proxy ratio during the render with Stamp Info."
+        "\nThe rendered files replace the ones at full resolution",
+        items=[
+            ("FULL", "Full Resolution", "Render at the resolution of the scene"),
+            ("PROXY_75", "Proxy 75%", "Render at 75% of the resolution of the scene"),
+            ("PROXY_50", "Proxy 50%", "Render at 50% of the resolution of the scene"),
+            ("PROXY_25", "Proxy 25%", "Render at 25% of the resolution of the scene"),
+        ],
+        default="FULL",
+        options=set(),
+    )
+
     frameDigitsPadding: IntProperty(
         name="Digits Padding",
         description="Number of digits to use for the index of the frames and" "\nin the output image names",
@@ -598,9 +622,17 @@ class UAS_StampInfoSettings(bpy.types.PropertyGroup):
         renderPath=None,
         renderFilename=None,
         verbose=False,
+        staticLayer=None,
+        writer=None,
     ):
         """Args:
-        resolution: the resolution frame"""
+        resolution: the resolution frame
+        staticLayer: the static part of the stamped image returned by a previous call for the same render job.
+            It is reused to avoid redrawing the content that doesn't change from one frame to another
+        writer: a utils_writer.ImageWriter to write the image in the background, see infoImage.renderStampedImage()
+
+        Returns the static layer used to render the image
+        """
 
         if resolution is None or innerHeight is None:
             renderW = getRenderResolutionForStampInfo(scene, forceMultiplesOf2=True)[0]
@@ -611,7 +643,7 @@ class UAS_StampInfoSettings(bpy.types.PropertyGroup):
             renderH = resolution[1]
             innerH = innerHeight
 
-        infoImage.renderStampedImage(
+        return infoImage.renderStampedImage(
             scene,
             currentFrame,
             renderW,
@@ -620,6 +652,99 @@ class UAS_StampInfoSettings(bpy.types.PropertyGroup):
             renderPath=renderPath,
             renderFilename=renderFilename,
             verbose=verbose,
+            staticLayer=staticLayer,
+            writer=writer,
+        )
+
+    def renderTmpImagesWithStampedInfo(
+        self,
+        scene,
+        frameContexts,
+        filepaths,
+        numProcesses=0,
+        layout="FULL",
+        fileFormat="PNG",
+        bgFilepaths=None,
+        outputRes=None,
+        manifestFilepath=None,
+    ):
+        """Render the stamped images of several frames of the scene, in parallel when possible
+        Args:
+            frameContexts: list of the StampFrameContext instances returned by infoImage.getFrameContexts()
+            filepaths: list of the full paths of the images to write, one per frame
+            numProcesses: number of worker processes, 0 to use one per CPU core
+            layout: "FULL" or "BORDER_STRIPS"
+            fileFormat: "PNG", "PNG_FAST", "TGA" or "RAW_CACHE", see createTmpImagesCache()
+            bgFilepaths: rendered images over which the stamped images are composited in memory, one per frame.
+                In this case filepaths are the paths of the composited images
+            outputRes: resolution of the composited images
+            manifestFilepath: manifest used to render only the stamped images whose content changed
+
+        Returns the rows of the border strips, or None if full images were written
+        """
+        renderW, renderH = getRenderResolutionForStampInfo(scene, forceMultiplesOf2=True)
+        innerH = getInnerHeight(scene)
+
+        return infoImage.renderStampedImages(
+            infoImage.getStampInfoSnapshot(scene),
+            renderW,
+            renderH,
+            innerH,
+            frameContexts,
+            filepaths,
+            numProcesses=numProcesses,
+            layout=layout,
+            fileFormat=fileFormat,
+            bgFilepaths=bgFilepaths,
+            outputRes=outputRes,
+            manifestFilepath=manifestFilepath,
+        )
+
+    def createTmpImagesCache(self, scene, cacheFilepath, frameStart, frameEnd, layout="FULL"):
+        """Create the strip cache of the stamped images of the frames of the scene, to render them with the
+        "RAW_CACHE" format. See infoImage.createStampedImagesCache()
+
+        Returns the rows of the border strips, or None if the cache holds full images
+        """
+        renderW, renderH = getRenderResolutionForStampInfo(scene, forceMultiplesOf2=True)
+        innerH = getInnerHeight(scene)
+
+        return infoImage.createStampedImagesCache(
+            cacheFilepath,
+            infoImage.getStampInfoSnapshot(scene),
+            renderW,
+            renderH,
+            innerH,
+            frameStart,
+            frameEnd,
+            layout=layout,
+        )
+
+    def getTmpImagesWithStampedInfoStream(
+        self,
+        scene,
+        numProcesses=0,
+        layout="FULL",
+        fileFormat="PNG",
+        outputRes=None,
+        manifestFilepath=None,
+    ):
+        """Return an infoImage.StampedImagesStream to render the stamped images of the frames of the scene while
+        the animation is being rendered. See renderTmpImagesWithStampedInfo() for the arguments
+        """
+        renderW, renderH = getRenderResolutionForStampInfo(scene, forceMultiplesOf2=True)
+        innerH = getInnerHeight(scene)
+
+        return infoImage.StampedImagesStream(
+            infoImage.getStampInfoSnapshot(scene),
+            renderW,
+            renderH,
+            innerH,
+            numProcesses=numProcesses,
+            layout=layout,
+            fileFormat=fileFormat,
+            outputRes=outputRes,
+            manifestFilepath=manifestFilepath,
         )
 
     def getRenderResolutionForStampInfo(self, scene, usePercentage=True, forceMultiplesOf2=True):
@@ -0,0 +1,286 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Plain data description of a stamping job: the Stamp Info settings and the scene values used to draw the stamped
+images, and the values that change from one frame to another.
+
+A snapshot is created from a scene with infoImage.getStampInfoSnapshot(), or from a dictionary, for example loaded
+from a JSON file, so that the stamped images can be drawn in any Python process.
+"""
+
+import os
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+# Default values of the properties of UAS_StampInfoSettings, used when the settings don't come from a scene.
+# Enum values are given by their identifier.
+# Keep them in sync with the property definitions in stampInfoSettings.py
+STAMP_INFO_DEFAULT_SETTINGS = {
+    "renderRootPathUsed": False,
+    "renderRootPath": "",
+    "stampRenderResOver_percentage": 86.0,
+    "stampRenderResYOutside_percentage": 33.34,
+    "stampInfoUsed": True,
+    "stampInfoRenderMode": "OUTSIDE",
+    "projectUsed": False,
+    "projectName": "My Project",
+    "logoUsed": True,
+    "logoMode": "BUILTIN",
+    # first item of the list of the logos installed with the add-on
+    "logoBuiltinName": "Blender_Logo.png",
+    "logoFilepath": "",
+    "logoScaleH": 0.065,
+    "logoPosNormX": 0.012,
+    "logoPosNormY": 0.01,
+    "animRangeUsed": True,
+    "handlesUsed": False,
+    "animDurationUsed": False,
+    "outputImgIndicesMode": "3D_FRAME",
+    "movieEncodingPreset": "HIGH_QUALITY",
+    "proxyResolution": "FULL",
+    "frameDigitsPadding": 3,
+    "videoFrameUsed": False,
+    "videoFirstFrameIndexUsed": False,
+    "videoFirstFrameIndex": 1,
+    "edit3DFrameUsed": False,
+    "edit3DFrame": -1,
+    "edit3DTotalNumberUsed": False,
+    "edit3DTotalNumber": -1,
+    "framerateUsed": True,
+    "currentFrameUsed": True,
+    "filenameUsed": True,
+    "filepathUsed": True,
+    "customFileFullPath": "",
+    "sceneUsed": True,
+    "sequenceUsed": False,
+    "shotUsed": False,
+    "takeUsed": False,
+    "sequenceName": "Sequence Name",
+    "shotName": "Shot Name",
+    "takeName": "Take Name",
+    "shotHandles": 10,
+    "cameraUsed": True,
+    "cameraLensUsed": True,
+    "shotDurationUsed": False,
+    "cornerNoteUsed": False,
+    "cornerNote": "Note...",
+    "bottomNoteUsed": False,
+    "bottomNote": "Note...",
+    "notesUsed": False,
+    "notesLine01": "Notes...",
+    "notesLine02": "",
+    "notesLine03": "",
+    "borderUsed": True,
+    "borderColor": (0.0, 0.0, 0.0, 1.0),
+    "dateUsed": True,
+    "timeUsed": True,
+    "userNameUsed": False,
+    "textColor": (0.55, 0.55, 0.55, 1.0),
+    "fontScaleHNorm": 0.02,
+    "interlineHNorm": 0.015,
+    "extPaddingNorm": 0.015,
+    "extPaddingHorizNorm": 0.02,
+    "automaticTextSize": True,
+    "offsetToCenterHNorm": 0.0,
+    "stampPropertyLabel": True,
+    "stampPropertyValue": True,
+    "debugMode": False,
+    "debug_DrawTextLines": False,
+    "debug_DontDeleteCompoNodes": False,
+}
+
+
+def getDefaultStampInfoSettings(**overrides):
+    """Return an object with the same attributes as UAS_StampInfoSettings, set to their default values
+    or to the specified values. Eg: getDefaultStampInfoSettings(notesUsed=True, notesLine01="My note")
+    """
+    values = dict(STAMP_INFO_DEFAULT_SETTINGS)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def getLogoFilepath(settings, blendFilepath=""):
+    """Return the path of the logo to draw, "" if the logo is not used.
+    Paths relative to the blend file (starting with //) are made absolute when blendFilepath is specified
+    """
+    if not settings.logoUsed:
+        return ""
+
+    if "BUILTIN" == settings.logoMode:
+        dir = Path(os.path.dirname(os.path.abspath(__file__))).parent / "Logos"
+        return str(dir / settings.logoBuiltinName)
+
+    logoFile = settings.logoFilepath
+    if "//" == logoFile[0:2] and "" != blendFilepath:
+        logoFile = os.path.join(os.path.dirname(blendFilepath), logoFile[2:])
+    return logoFile
+
+
+def _toEven(value):
+    value = int(value)
+    return value + 1 if value % 2 else value
+
+
+class StampInfoSnapshot:
+    """Plain data copy of the Stamp Info settings and of the scene values used to draw the stamped images.
+    Contrary to the scene and to its property groups it can be pickled and sent to other processes.
+    Use infoImage.getStampInfoSnapshot() to create it from a scene, or fromDict()
+    """
+
+    def __init__(
+        self,
+        settings,
+        sceneName,
+        fps,
+        frameStart,
+        frameEnd,
+        filepath,
+        logoFilepath,
+        renderResolution=(1920, 1080),
+        resolutionPercentage=100,
+    ):
+        # object with the same attributes as UAS_StampInfoSettings, see getDefaultStampInfoSettings()
+        self.settings = settings
+        self.sceneName = sceneName
+        self.fps = fps
+        self.frameStart = frameStart
+        self.frameEnd = frameEnd
+        # path of the current blend file, "" if not saved
+        self.filepath = filepath
+        # absolute path of the logo file, "" if not used
+        self.logoFilepath = logoFilepath
+        # render resolution of the scene, without the percentage applied
+        self.renderResolution = tuple(renderResolution)
+        self.resolutionPercentage = resolutionPercentage
+
+    def getStampedImageResolution(self):
+        """Return the resolution of the stamped images and the height of the image between the borders,
+        in the form (width, height, inner height), as stamper.getRenderResolutionForStampInfo() with
+        forceMultiplesOf2 and stamper.getInnerHeight() do for a scene
+        """
+        settings = self.settings
+        resPercentage = self.resolutionPercentage * 0.01
+        sceneW, sceneH = self.renderResolution
+
+        stampW, stampH = sceneW, sceneH
+        innerH = int(sceneH * resPercentage)
+        if "OVER" == settings.stampInfoRenderMode:
+            innerH = min(innerH, int(int(sceneH * resPercentage) * settings.stampRenderResOver_percentage * 0.01))
+        elif "OUTSIDE" == settings.stampInfoRenderMode:
+            stampH = max(sceneH, sceneH * (settings.stampRenderResYOutside_percentage + 100.0) * 0.01)
+
+        return (_toEven(stampW * resPercentage), _toEven(stampH * resPercentage), innerH)
+
+    def toDict(self):
+        """Return the snapshot as a dictionary of basic types that can be written as JSON"""
+        settings = {}
+        for name, value in vars(self.settings).items():
+            settings[name] = list(value) if isinstance(value, tuple) else value
+
+        return {
+            "settings": settings,
+            "sceneName": self.sceneName,
+            "fps": self.fps,
+            "frameStart": self.frameStart,
+            "frameEnd": self.frameEnd,
+            "filepath": self.filepath,
+            "logoFilepath": self.logoFilepath,
+            "renderResolution": list(self.renderResolution),
+            "resolutionPercentage": self.resolutionPercentage,
+        }
+
+    @classmethod
+    def fromDict(cls, values):
+        """Return a snapshot made from a dictionary such as the ones returned by toDict().
+        Missing settings take their default values, see getDefaultStampInfoSettings(). If the logo file
+        is not specified it is deduced from the settings
+        """
+        settingsValues = {}
+        for name, value in values.get("settings", {}).items():
+            settingsValues[name] = tuple(value) if isinstance(value, list) else value
+        settings = getDefaultStampInfoSettings(**settingsValues)
+
+        filepath = values.get("filepath", "")
+        logoFilepath = values.get("logoFilepath")
+        if logoFilepath is None:
+            logoFilepath = getLogoFilepath(settings, filepath)
+
+        return cls(
+            settings,
+            values.get("sceneName", "Scene"),
+            values.get("fps", 25),
+            values.get("frameStart", 1),
+            values.get("frameEnd", 250),
+            filepath,
+            logoFilepath,
+            renderResolution=values.get("renderResolution", (1920, 1080)),
+            resolutionPercentage=values.get("resolutionPercentage", 100),
+        )
+
+
+class StampFrameContext:
+    """Values that change from one frame to another on the stamped images.
+    Use infoImage.getFrameContexts() to create them for a range of frames of a scene, or getStaticFrameContexts()
+    """
+
+    __slots__ = ("frame", "cameraName", "lens", "marker", "timestamp")
+
+    def __init__(self, frame, cameraName, lens, marker, timestamp):
+        self.frame = frame
+        self.cameraName = cameraName
+        self.lens = lens
+        # name of the last timeline marker at or before the frame, "" if none
+        self.marker = marker
+        # datetime used for the date and time fields
+        self.timestamp = timestamp
+
+    def withTimestamp(self, timestamp):
+        """Return a copy of the frame context with another date and time"""
+        return StampFrameContext(self.frame, self.cameraName, self.lens, self.marker, timestamp)
+
+    def toDict(self):
+        """Return the frame context as a dictionary of basic types that can be written as JSON"""
+        return {
+            "frame": self.frame,
+            "cameraName": self.cameraName,
+            "lens": self.lens,
+            "marker": self.marker,
+            "timestamp": self.timestamp.isoformat(),
+        }
+
+    @classmethod
+    def fromDict(cls, values):
+        """Return a frame context made from a dictionary such as the ones returned by toDict()"""
+        timestamp = values.get("timestamp")
+        return cls(
+            values["frame"],
+            values.get("cameraName", ""),
+            values.get("lens", 0.0),
+            values.get("marker", ""),
+            datetime.now() if timestamp is None else datetime.fromisoformat(timestamp),
+        )
+
+
+def getStaticFrameContexts(frameStart, frameEnd, cameraName="", lens=0.0, marker="", timestamp=None):
+    """Return the list of the StampFrameContext instances of the frames from frameStart to frameEnd (included)
+    when the camera, the lens and the marker don't change during the range
+    """
+    if timestamp is None:
+        timestamp = datetime.now()
+    return [StampFrameContext(frame, cameraName, lens, marker, timestamp) for frame in range(frameStart, frameEnd + 1)]
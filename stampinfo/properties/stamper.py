@@ -86,6 +86,20 @@ def getRenderResolutionForStampInfo(scene, usePercentage=True, forceMultiplesOf2
     return stampRenderRes
 
 
+# ratio of the output resolution used by each proxy mode, see UAS_StampInfoSettings.proxyResolution
+_PROXY_RESOLUTION_RATIOS = {"FULL": 1.0, "PROXY_75": 0.75, "PROXY_50": 0.5, "PROXY_25": 0.25}
+
+
+def getProxyResolutionPercentage(scene):
+    """Return the render percentage to use to render the images at the proxy resolution set in the Stamp Info
+    settings of the scene. It is the render percentage of the scene when the full resolution is used.
+    All the resolutions of the stamped images are derived from the render percentage and the layout of the
+    stamped images is normalized, so setting it on the scene is enough to render everything at the proxy resolution
+    """
+    proxyRatio = _PROXY_RESOLUTION_RATIOS.get(scene.UAS_StampInfo_Settings.proxyResolution, 1.0)
+    return max(1, round(scene.render.resolution_percentage * proxyRatio))
+
+
 def getInnerHeight(scene):
     """Get the height (integer) in pixels of the image between the 2 borders according to the current mode"""
     siSettings = scene.UAS_StampInfo_Settings
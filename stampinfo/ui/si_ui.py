@@ -231,6 +231,13 @@ class UAS_PT_StampInfoAddon(Panel):
             "uas_stampinfo.render", text=" Render Animation", icon="RENDER_ANIMATION"
         ).renderMode = "ANIMATION"
 
+        renderChunksRow = layout.split(factor=0.45, align=False)
+        renderChunksRow.enabled = okForRenderAnim
+        renderChunksRow.operator("uas_stampinfo.restamp", text=" Re-Stamp Animation", icon="FILE_REFRESH")
+        renderChunksRow.operator(
+            "uas_stampinfo.render_chunks", text=" Render Animation in Background", icon="RENDER_ANIMATION"
+        )
+
         col = layout.column(align=False)
         col.scale_y = 0.9
 
@@ -254,6 +261,18 @@ class UAS_PT_StampInfoAddon(Panel):
             renderPath
         )
 
+        row = col.row()
+        row.enabled = siSettings.stampInfoUsed and scene.render.is_movie_format
+        split = row.split(factor=0.5)
+        split.label(text="Movie Encoding:")
+        split.prop(siSettings, "movieEncodingPreset", text="")
+
+        row = col.row()
+        row.enabled = siSettings.stampInfoUsed
+        split = row.split(factor=0.5)
+        split.label(text="Proxy Resolution:")
+        split.prop(siSettings, "proxyResolution", text="")
+
         sepRow = col.row()
         sepRow.separator(factor=0.2)
 
@@ -267,6 +286,9 @@ class UAS_PT_StampInfoAddon(Panel):
             outputResRender = stamper.getRenderResolution(scene)
             resStr = "Final Res: " + str(outputResRender[0]) + " x " + str(outputResRender[1]) + " px"
 
+        if siSettings.stampInfoUsed and "FULL" != siSettings.proxyResolution:
+            resStr += f"  -  Proxy: {stamper.getProxyResolutionPercentage(scene)}%"
+
         resStr02 = "-  Inner Height: " + str(stamper.getInnerHeight(scene)) + " px"
 
         panelTitleRow = layout.row(align=True)
@@ -781,6 +803,10 @@ class UAS_PT_StampInfoSettings(Panel):
         row = layout.row()
         row.prop(siSettings, "stampPropertyValue")
 
+        layout.separator(factor=0.5)
+        row = layout.row()
+        row.operator("uas_stampinfo.export_settings", icon="EXPORT")
+
 
 #########
 # MISC
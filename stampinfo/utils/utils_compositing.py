@@ -0,0 +1,212 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Compositing of the stamped images over the rendered images with Pillow instead of the VSE, so that it can also run
+in the worker processes and in background mode.
+"""
+
+import os
+import re
+from pathlib import Path
+
+from stampinfo.config import sm_logging
+from stampinfo.utils.utils_processes import getNumProcesses, imapInProcesses
+from stampinfo.utils.utils_strip_cache import StripCacheSlot, readStripCacheImage
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# last group of # of a sequence file name
+_SEQUENCE_INDICES_RE = re.compile(r"^(.*?)(#+)([^#\\/]*)$")
+
+# image files that can be read and written with Pillow
+SUPPORTED_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tga", ".tif", ".tiff", ".bmp")
+
+
+def isSupportedImageFile(filepath):
+    """Return True if the specified image file can be composited without the VSE"""
+    return Path(filepath).suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS
+
+
+def getCenteredPosition(size, outputRes):
+    """Return the position (left, top) of an image of the specified size centered in an image of resolution outputRes.
+    When the image is bigger it is cropped by the same amounts as the VSE does with the strip crop values
+    """
+
+    def _centered(length, outputLength):
+        if outputLength < length:
+            return -int((length - outputLength) / 2)
+        return int((outputLength - length) / 2)
+
+    return (_centered(size[0], outputRes[0]), _centered(size[1], outputRes[1]))
+
+
+def getSequenceFrameFilepath(filepath, frame):
+    """Return the path of the image at the specified frame of a sequence, the last group of # characters of the
+    file name being replaced by the frame index, as Blender does. Paths without # are returned unchanged
+    """
+    match = _SEQUENCE_INDICES_RE.match(filepath)
+    if match is None:
+        return filepath
+    return f"{match.group(1)}{frame:0{len(match.group(2))}d}{match.group(3)}"
+
+
+def compositeOverImage(bgFilepath, outputRes, overImages):
+    """Return the RGBA image of resolution outputRes made of the background image and of the over images.
+    As in the VSE, the background image is centered in the output image, and cropped if it is bigger.
+
+    Args:
+        bgFilepath: path of the background image. If it doesn't exist the output image has an empty background
+        outputRes: (width, height) of the output image
+        overImages: list of the RGBA images to composite over the background, in the form (image, (left, top)),
+            the position being relative to the top left corner of the output image
+    """
+    from PIL import Image
+
+    outputW, outputH = outputRes
+    imgOutput = Image.new("RGBA", (outputW, outputH), (0, 0, 0, 0))
+
+    if os.path.exists(bgFilepath):
+        with Image.open(bgFilepath) as img:
+            imgBG = img.convert("RGBA")
+        imgOutput.paste(imgBG, getCenteredPosition((imgBG.width, imgBG.height), outputRes))
+    else:
+        _logger.warning_ext(f"Rendered image not found: {bgFilepath}")
+
+    for imgOver, position in overImages:
+        imgOutput.alpha_composite(imgOver, dest=(int(position[0]), int(position[1])))
+
+    return imgOutput
+
+
+def saveCompositedImage(img, filepath):
+    """Write the RGBA image to the specified file. The alpha channel is removed for the formats not supporting it"""
+    if Path(filepath).suffix.lower() in (".jpg", ".jpeg"):
+        img = img.convert("RGB")
+
+    try:
+        img.save(filepath)
+    except BaseException:
+        _logger.error_ext(f"Stamp Info: saveCompositedImage Error: Cannot save file: {filepath}")
+        raise
+
+
+def loadOverImages(overFilepaths):
+    """Return the list of the RGBA images to composite, in the form expected by compositeOverImage()
+
+    Args:
+        overFilepaths: list of the images to load, in the form (image path, (left, top)). The image path can also
+            be a utils_strip_cache.StripCacheSlot, the image is then read from the mapped cache without copy.
+            Missing files are skipped
+    """
+    from PIL import Image
+
+    overImages = []
+    for filepath, position in overFilepaths:
+        if isinstance(filepath, StripCacheSlot):
+            img = readStripCacheImage(filepath)
+            if img is None:
+                _logger.warning_ext(f"Stamped image of frame {filepath.frame} not found: {filepath.cacheFilepath}")
+            else:
+                overImages.append((img, position))
+            continue
+        if not os.path.exists(filepath):
+            _logger.warning_ext(f"Stamped image not found: {filepath}")
+            continue
+        with Image.open(filepath) as img:
+            overImages.append((img.convert("RGBA"), position))
+    return overImages
+
+
+def compositeImageFiles(bgFilepath, overFilepaths, outputRes, outputFilepath):
+    """Composite the over images on the background image and write the result, see compositeOverImage()"""
+    img = compositeOverImage(bgFilepath, outputRes, loadOverImages(overFilepaths))
+    saveCompositedImage(img, outputFilepath)
+    return outputFilepath
+
+
+def compositeImageSequences(bgFilepaths, overFilepathsPerFrame, outputRes, outputFilepaths, numProcesses=0):
+    """Composite the images of several frames without the VSE, in parallel in worker processes when there are
+    enough frames. Can be used in background mode
+
+    Args:
+        bgFilepaths: list of the background images, one per frame
+        overFilepathsPerFrame: list of the images to composite over the background, one list per frame,
+            see loadOverImages()
+        outputRes: (width, height) of the composited images
+        outputFilepaths: list of the images to write, one per frame. Their format is given by their extension,
+            see isSupportedImageFile()
+        numProcesses: number of worker processes, 0 to use one per CPU core
+    """
+    numFrames = len(bgFilepaths)
+    outputRes = tuple(outputRes)
+
+    for outputDir in {str(Path(f).parent) for f in outputFilepaths}:
+        Path(outputDir).mkdir(parents=True, exist_ok=True)
+
+    numProcesses = getNumProcesses(numProcesses, numFrames)
+    if 1 < numProcesses:
+        _logger.debug_ext(f"Compositing {numFrames} images in {numProcesses} processes", form="REG")
+
+    framesArgs = [
+        (bgFilepath, overFilepaths, outputRes, outputFilepath)
+        for bgFilepath, overFilepaths, outputFilepath in zip(bgFilepaths, overFilepathsPerFrame, outputFilepaths)
+    ]
+    for _ in imapInProcesses(compositeImageFiles, framesArgs, numProcesses):
+        pass
+
+
+def getOpaqueRGBBytes(img):
+    """Return the raw RGB data of the RGBA image composited over black, as the VSE does for the movies"""
+    from PIL import Image
+
+    imgRGB = Image.new("RGB", img.size, (0, 0, 0))
+    imgRGB.paste(img, mask=img.getchannel("A"))
+    return imgRGB.tobytes()
+
+
+def compositeImageFilesToRGB(bgFilepath, overFilepaths, outputRes):
+    """Composite the over images on the background image and return the raw RGB data of the result,
+    see compositeOverImage()"""
+    img = compositeOverImage(bgFilepath, outputRes, loadOverImages(overFilepaths))
+    return getOpaqueRGBBytes(img)
+
+
+def compositeImageSequencesToStream(bgFilepaths, overFilepathsPerFrame, outputRes, writeFrame, numProcesses=0):
+    """Composite the images of several frames without the VSE and pass the raw RGB data of each composited image
+    to writeFrame(), in the order of the frames. Nothing is written on disk.
+    The images are composited in parallel in worker processes when there are enough frames, see
+    compositeImageSequences() for the arguments
+
+    Args:
+        writeFrame: function called as writeFrame(rgbBytes) for each frame, typically FFmpegPipeEncoder.write()
+    """
+    numFrames = len(bgFilepaths)
+    outputRes = tuple(outputRes)
+
+    numProcesses = getNumProcesses(numProcesses, numFrames)
+    if 1 < numProcesses:
+        _logger.debug_ext(f"Compositing {numFrames} images in {numProcesses} processes", form="REG")
+
+    # the composited images wait in memory until the previous frames are written, the number of frames composited
+    # in advance is bounded by imapInProcesses()
+    framesArgs = [
+        (bgFilepath, overFilepaths, outputRes) for bgFilepath, overFilepaths in zip(bgFilepaths, overFilepathsPerFrame)
+    ]
+    for rgbBytes in imapInProcesses(compositeImageFilesToRGB, framesArgs, numProcesses):
+        writeFrame(rgbBytes)
@@ -0,0 +1,242 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Encoding of the composited frames into a movie by an FFmpeg process, the frames being streamed to its standard
+input as raw RGB video so that no intermediate image is written.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from stampinfo.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# movie files that can be encoded by the FFmpeg pipe, the container is given by the extension
+SUPPORTED_MOVIE_EXTENSIONS = (".mp4", ".mov", ".mkv")
+
+
+# encoding presets of the stamped movies:
+#   - codec, crf, speed, gopSize, pixelFormat, audioBitrate (kb/s) and threads (0 for all the CPU cores) are the
+#     settings of the FFmpeg pipe encoder
+#   - vse gives the closest settings of the Blender FFmpeg output, used when the movies are encoded by the VSE.
+#     Blender maps its constant rate factors to the CRF values 0 (LOSSLESS), 17 (PERC_LOSSLESS), 20 (HIGH),
+#     23 (MEDIUM), 26 (LOW) and 29 (VERYLOW)
+ENCODING_PRESETS = {
+    "FAST_PREVIEW": {
+        "name": "Fast Preview",
+        "description": "Fast encoding and small files, for quick checks. Visible compression artifacts",
+        "codec": "libx264",
+        "crf": 28,
+        "speed": "veryfast",
+        "gopSize": 25,
+        "pixelFormat": "yuv420p",
+        "audioBitrate": 128,
+        "threads": 0,
+        "vse": {"constant_rate_factor": "VERYLOW", "ffmpeg_preset": "REALTIME", "gopsize": 25, "audio_bitrate": 128},
+    },
+    "REVIEW": {
+        "name": "Review",
+        "description": "Good quality at a reasonable size, for dailies and reviews",
+        "codec": "libx264",
+        "crf": 23,
+        "speed": "medium",
+        "gopSize": 12,
+        "pixelFormat": "yuv420p",
+        "audioBitrate": 192,
+        "threads": 0,
+        "vse": {"constant_rate_factor": "MEDIUM", "ffmpeg_preset": "GOOD", "gopsize": 12, "audio_bitrate": 192},
+    },
+    "HIGH_QUALITY": {
+        "name": "High Quality",
+        "description": "Perceptually lossless, with a keyframe every 5 frames. Big files, slow to encode",
+        "codec": "libx264",
+        "crf": 17,
+        "speed": "medium",
+        "gopSize": 5,
+        "pixelFormat": "yuv420p",
+        "audioBitrate": 192,
+        "threads": 0,
+        "vse": {"constant_rate_factor": "PERC_LOSSLESS", "ffmpeg_preset": "GOOD", "gopsize": 5, "audio_bitrate": 192},
+    },
+    "ARCHIVAL_LOSSLESS": {
+        "name": "Archival Lossless",
+        "description": "Lossless encoding of the RGB images, for archiving. Very big files, not supported by all "
+        "the players.\nWith the VSE encoder the colors are still converted to YUV",
+        "codec": "libx264rgb",
+        "crf": 0,
+        "speed": "slow",
+        "gopSize": 25,
+        "pixelFormat": "rgb24",
+        "audioBitrate": 320,
+        "threads": 0,
+        "vse": {"constant_rate_factor": "LOSSLESS", "ffmpeg_preset": "BEST", "gopsize": 25, "audio_bitrate": 320},
+    },
+}
+
+# settings used before the encoding presets were introduced
+DEFAULT_ENCODING_PRESET = "HIGH_QUALITY"
+
+
+def getEncodingPreset(presetName):
+    """Return the settings of the specified encoding preset, see ENCODING_PRESETS"""
+    preset = ENCODING_PRESETS.get(presetName)
+    if preset is None:
+        _logger.warning_ext(f"Unknown encoding preset: {presetName}, {DEFAULT_ENCODING_PRESET} is used")
+        preset = ENCODING_PRESETS[DEFAULT_ENCODING_PRESET]
+    return preset
+
+
+def isSupportedMovieFile(filepath):
+    """Return True if the specified movie file can be encoded by the FFmpeg pipe"""
+    return Path(filepath).suffix.lower() in SUPPORTED_MOVIE_EXTENSIONS
+
+
+def getMovieFilepath(filepath, frameStart, frameEnd):
+    """Return the path of the movie file written for the specified output path, named as Blender does: the last
+    group of # characters of the file name is replaced by the frame range, eg: "shot_####.mp4" gives
+    "shot_0001-0250.mp4". Paths without # are returned unchanged
+    """
+    match = re.match(r"^(.*?)(#+)([^#\\/]*)$", filepath)
+    if match is None:
+        return filepath
+    numDigits = len(match.group(2))
+    return f"{match.group(1)}{frameStart:0{numDigits}d}-{frameEnd:0{numDigits}d}{match.group(3)}"
+
+
+def getFFmpegFilepath(ffmpegFilepath=""):
+    """Return the path of the FFmpeg executable to use, or None if it cannot be found.
+    ffmpegFilepath: executable set by the user, if empty FFmpeg is searched in the PATH of the system
+    """
+    if "" != ffmpegFilepath:
+        if os.path.isfile(ffmpegFilepath):
+            return ffmpegFilepath
+        _logger.warning_ext(f"FFmpeg executable not found: {ffmpegFilepath}")
+        return None
+    return shutil.which("ffmpeg")
+
+
+def getFFmpegEncodeCommand(
+    ffmpegFilepath, outputFilepath, resolution, fps, audioFilepath=None, encodingPreset=DEFAULT_ENCODING_PRESET
+):
+    """Return the command line of the FFmpeg process encoding the RGB frames read on its standard input.
+
+    Args:
+        resolution: (width, height) of the frames. The movie is padded to even dimensions, as required by the
+            yuv420p pixel format
+        audioFilepath: sound file muxed with the video, None for no sound
+        encodingPreset: name of the encoding settings, see ENCODING_PRESETS
+    """
+    preset = getEncodingPreset(encodingPreset)
+
+    command = [ffmpegFilepath, "-y", "-hide_banner", "-loglevel", "error"]
+    command += ["-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{resolution[0]}x{resolution[1]}", "-r", str(fps)]
+    command += ["-i", "-"]
+
+    if audioFilepath is not None:
+        command += ["-i", audioFilepath, "-map", "0:v:0", "-map", "1:a:0", "-shortest"]
+        command += ["-c:a", "aac", "-b:a", f"{preset['audioBitrate']}k"]
+
+    if resolution[0] % 2 or resolution[1] % 2:
+        command += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+
+    command += ["-c:v", preset["codec"], "-preset", preset["speed"], "-crf", str(preset["crf"])]
+    command += ["-g", str(preset["gopSize"]), "-pix_fmt", preset["pixelFormat"]]
+    command += ["-threads", str(preset["threads"]), outputFilepath]
+
+    return command
+
+
+class FFmpegPipeEncoder:
+    """Encode frames into a movie with an FFmpeg process, see getFFmpegEncodeCommand().
+    The frames are written to the standard input of the process as raw RGB data, in the order of the movie.
+
+    Can be used as a context manager, the movie being finalized at the end of the block:
+        with FFmpegPipeEncoder(command) as encoder:
+            encoder.write(frameBytes)
+
+    If the block raises an error the FFmpeg process is killed and the movie is incomplete
+    """
+
+    def __init__(self, command):
+        # the errors of FFmpeg are read once it has ended, a file doesn't block the process when it is full
+        self._errorFile = tempfile.TemporaryFile()
+        try:
+            self._process = subprocess.Popen(
+                command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._errorFile
+            )
+        except BaseException:
+            self._errorFile.close()
+            raise
+        self.numFrames = 0
+
+    def _getErrors(self):
+        self._errorFile.seek(0)
+        return self._errorFile.read().decode("utf-8", errors="replace").strip()
+
+    def write(self, frameBytes):
+        """Send the RGB data of the next frame to FFmpeg"""
+        try:
+            self._process.stdin.write(frameBytes)
+        except BrokenPipeError:
+            self._process.wait()
+            raise RuntimeError(f"FFmpeg stopped encoding at frame {self.numFrames}: {self._getErrors()}")
+        self.numFrames += 1
+
+    def close(self):
+        """Wait until FFmpeg has encoded all the frames and written the movie.
+        Raises RuntimeError if the encoding failed
+        """
+        try:
+            try:
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+            returnCode = self._process.wait()
+            if 0 != returnCode:
+                raise RuntimeError(f"FFmpeg encoding failed with the code {returnCode}: {self._getErrors()}")
+            _logger.debug_ext(f"{self.numFrames} frames encoded by FFmpeg", col="BLUE")
+        finally:
+            self._errorFile.close()
+
+    def abort(self):
+        """Stop FFmpeg without finalizing the movie"""
+        try:
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.wait()
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        finally:
+            self._errorFile.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.abort()
+        return False
@@ -20,8 +20,10 @@ Classes and functions dedicated to filenames management such as sequence names.
 """
 
 
+import os
+import re
+import time
 from pathlib import Path
-import bpy
 
 from stampinfo.config import sm_logging
 
@@ -262,6 +264,157 @@ def run_sequence_path_tests(at_frame=None):
 # run_sequence_path_tests(at_frame=25)
 
 
+def getSequencePattern(sequenceFilename):
+    """Return the frame pattern of the specified sequence file name in the form (prefix, padding length, suffix),
+    or None if the name has no frame pattern.
+    The frame pattern is either made of # characters (eg: "mySequence_####.png") or in the printf form
+    (eg: "mySequence_%04d.png")
+    """
+    paddingMatch = re.match(r".*?(#+).*", sequenceFilename)
+    if paddingMatch:
+        paddingLength = len(paddingMatch[1])
+        return (sequenceFilename[: paddingMatch.start(1)], paddingLength, sequenceFilename[paddingMatch.end(1) :])
+
+    paddingMatch = re.match(r".*?%(\d\d)d.*", sequenceFilename)
+    if not paddingMatch:
+        return None
+    paddingLength = int(paddingMatch[1])
+    # the % and the d are not in the group
+    return (
+        sequenceFilename[: paddingMatch.start(1) - 1],
+        paddingLength,
+        sequenceFilename[paddingMatch.end(1) + 1 :],
+    )
+
+
+def getSequenceFileRegex(sequenceFilename):
+    """Return the compiled regular expression matching the names of the files of the specified sequence, the
+    first group being the frame index, or None if the name has no frame pattern.
+    See getSequencePattern() for the supported frame patterns
+    """
+    pattern = getSequencePattern(sequenceFilename)
+    if pattern is None:
+        return None
+    prefix, paddingLength, suffix = pattern
+    return re.compile(r"^{0}(\d{{{1}}}){2}$".format(re.escape(prefix), paddingLength, re.escape(suffix)))
+
+
+# number of directories kept in the cache of getSequenceDirectoryIndex()
+_MAX_INDEXED_DIRECTORIES = 32
+
+# cache of getSequenceDirectoryIndex(), in the form {directory: (modification time, index)}
+_sequenceDirectoryIndices = dict()
+
+# coarsest resolution of the modification times of the file systems, FAT and exFAT have a resolution of 2 seconds
+_MODIFICATION_TIME_RESOLUTION_NS = 2_000_000_000
+
+_digitsRegex = re.compile(r"\d+")
+
+
+def _buildSequenceDirectoryIndex(folder):
+    index = dict()
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            name = entry.name
+            # each run of digits of the name may be the frame index of a sequence, eg: "shot010_v02_0025.png"
+            for digitsMatch in _digitsRegex.finditer(name):
+                digitsStart, digitsEnd = digitsMatch.span()
+                pattern = (name[:digitsStart], digitsEnd - digitsStart, name[digitsEnd:])
+                index.setdefault(pattern, dict())[int(digitsMatch[0])] = name
+    return index
+
+
+def getSequenceDirectoryIndex(folder):
+    """Return the index of the image sequences of the specified directory, in the form
+    {(prefix, padding length, suffix): {frame: file name}}. The frames are not sorted.
+    The directory is read in a single pass and the index is cached until the modification time of the directory
+    changes, which happens when files are added, removed or renamed.
+
+    Files added in the same tick of the modification time as the reading of the directory don't change it, for
+    example the images written by a render while it is being read. The index of a directory modified less than
+    the resolution of the modification times before it is read is then not cached, the directory is read again
+    at the next call.
+    Raises FileNotFoundError if the directory doesn't exist
+    """
+    folder = os.path.abspath(folder or ".")
+    modificationTime = os.stat(folder).st_mtime_ns
+
+    cached = _sequenceDirectoryIndices.get(folder)
+    if cached is not None and cached[0] == modificationTime:
+        return cached[1]
+
+    indexTime = time.time_ns()
+    index = _buildSequenceDirectoryIndex(folder)
+    if indexTime - _MODIFICATION_TIME_RESOLUTION_NS <= modificationTime:
+        _sequenceDirectoryIndices.pop(folder, None)
+        return index
+
+    if folder not in _sequenceDirectoryIndices and _MAX_INDEXED_DIRECTORIES <= len(_sequenceDirectoryIndices):
+        # the cache is in insertion order, the oldest directory is removed
+        del _sequenceDirectoryIndices[next(iter(_sequenceDirectoryIndices))]
+    _sequenceDirectoryIndices[folder] = (modificationTime, index)
+
+    return index
+
+
+def getSequenceFrames(sequenceFilepath):
+    """Return the files of the specified image sequence that exist on disk, as a dictionary {frame: file path}
+    sorted by frame. See getSequencePattern() for the supported frame patterns.
+    If the path has no frame pattern, the file is returned at frame 0 when it exists
+    """
+    folder, name = os.path.split(sequenceFilepath)
+    pattern = getSequencePattern(name)
+    if pattern is None:
+        return {0: sequenceFilepath} if os.path.isfile(sequenceFilepath) else dict()
+
+    prefix, _paddingLength, suffix = pattern
+    try:
+        if prefix[-1:].isdigit() or suffix[:1].isdigit():
+            # the frame digits are not a whole run of digits of the file names, they cannot be found in the index
+            fileRegex = getSequenceFileRegex(name)
+            sequenceFiles = dict()
+            with os.scandir(folder or ".") as entries:
+                for entry in entries:
+                    match = fileRegex.match(entry.name)
+                    if match and entry.is_file():
+                        sequenceFiles[int(match[1])] = entry.name
+        else:
+            sequenceFiles = getSequenceDirectoryIndex(folder).get(pattern, dict())
+    except FileNotFoundError:
+        return dict()
+
+    return {frame: os.path.join(folder, sequenceFiles[frame]) for frame in sorted(sequenceFiles)}
+
+
+def getSequenceElementNames(frames):
+    """Return the names of the files of each frame of an image sequence from its first to its last frame, as
+    used by the elements of an image strip, and the ranges of frames missing in the sequence.
+    The name of a missing frame is an empty string.
+
+    Args:
+        frames: dictionary {frame: file path} sorted by frame, as returned by getSequenceFrames()
+
+    Returns: (list of the file names, list of the missing frame ranges in the form (range start, range end))
+    """
+    names = []
+    gaps = []
+    previousFrame = None
+    for frame, filepath in frames.items():
+        if previousFrame is not None and previousFrame + 1 < frame:
+            gaps.append((previousFrame + 1, frame - 1))
+            names.extend([""] * (frame - previousFrame - 1))
+        names.append(os.path.basename(filepath))
+        previousFrame = frame
+    return names, gaps
+
+
+def formatFrameRanges(frameRanges):
+    """Return the specified list of frame ranges (range start, range end) as a string such as "12-15, 20" """
+    return ", ".join(f"{r[0]}" if r[0] == r[1] else f"{r[0]}-{r[1]}" for r in frameRanges)
+
+
 # """ Find the name template for the specified images sequence in order to create it
 #    """
 #    import re
@@ -330,6 +483,8 @@ _classes = (SequencePath,)
 
 
 def register():
+    import bpy
+
     _logger.debug_ext("       - Registering Filenames Package", form="REG")
 
     for cls in _classes:
@@ -337,6 +492,8 @@ def register():
 
 
 def unregister():
+    import bpy
+
     _logger.debug_ext("       - Unregistering Filenames Package", form="UNREG")
 
     for cls in reversed(_classes):
@@ -0,0 +1,80 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Process-wide cache of the fonts and of the text metrics used to draw the stamped images.
+Loading a FreeType face and measuring a string are expensive compared to the rest of the drawing, and the
+same fonts and the same strings (labels, separators...) are used again and again on every frame.
+"""
+
+from functools import lru_cache
+
+from stampinfo.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# fonts that could not be found, they are reported only once
+_missingFonts = set()
+
+
+@lru_cache(maxsize=32)
+def getFont(fontPath, fontSize):
+    """Return the FreeType font for the specified font path (or font name, eg: "arial") and size in pixels.
+    Fonts are loaded only once per process.
+    If the font cannot be found, which is the case of arial on most Linux systems, the default FreeType font
+    of Pillow is used instead when available (Pillow 10.1 and above)
+    """
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype(fontPath, fontSize)
+    except OSError as e:
+        try:
+            font = ImageFont.load_default(fontSize)
+        except TypeError:
+            # older versions of Pillow only have a bitmap default font that cannot be scaled
+            raise e
+        if fontPath not in _missingFonts:
+            _missingFonts.add(fontPath)
+            _logger.warning_ext(f"Font {fontPath} not found, using the default font of Pillow")
+        return font
+
+
+@lru_cache(maxsize=4096)
+def _getTextSize(font, text):
+    # getsize() has been removed from Pillow 10
+    if hasattr(font, "getsize"):
+        return font.getsize(text)
+    bbox = font.getbbox(text)
+    return (bbox[2], bbox[3])
+
+
+def getTextSize(font, text):
+    """Return the size (width, height) in pixels of the specified text drawn with the specified font.
+    Values are memoized per font and text
+    Args:
+        font: a font returned by getFont(). Since getFont() returns the same instance for the same path and size,
+            the instance can be used as the key of the memoized values
+    """
+    return _getTextSize(font, text)
+
+
+def clearFontsCache():
+    """Release the fonts and the text metrics kept in memory"""
+    _getTextSize.cache_clear()
+    getFont.cache_clear()
@@ -0,0 +1,103 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Cache of the images that are pasted on the stamped images, such as the logos
+"""
+
+import os
+from collections import OrderedDict
+
+from stampinfo.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# decoded source images, keyed by (resolved path, mtime)
+_sourceImagesCache = OrderedDict()
+_SOURCE_IMAGES_CACHE_SIZE = 4
+
+# resized images ready to paste, keyed by (resolved path, mtime, (width, height))
+_resizedImagesCache = OrderedDict()
+_RESIZED_IMAGES_CACHE_SIZE = 16
+
+
+def _getFromCache(cache, key):
+    img = cache.get(key)
+    if img is not None:
+        cache.move_to_end(key)
+    return img
+
+
+def _addToCache(cache, key, img, maxSize):
+    # entries made for a previous version of the same file are obsolete
+    obsoleteKeys = [k for k in cache if k[0] == key[0] and k[1] != key[1]]
+    for k in obsoleteKeys:
+        del cache[k]
+
+    cache[key] = img
+    while len(cache) > maxSize:
+        cache.popitem(last=False)
+
+
+def getLogoImage(logoFile, logoScaleH, renderH):
+    """Return the RGBA logo image resized to be pasted on a stamped image of height renderH.
+    The logo keeps its aspect ratio and its height is logoScaleH * renderH.
+
+    The decoded file and the resized image are cached and reused as long as the modification time
+    of the file doesn't change, so the file is read only once per render job, even when it is on a
+    network share.
+    Returns None if the file cannot be read
+    """
+    from PIL import Image
+
+    try:
+        resolvedPath = os.path.realpath(logoFile)
+        mtime = os.stat(resolvedPath).st_mtime_ns
+    except OSError:
+        _logger.warning_ext(f"Cannot access logo file: {logoFile}")
+        return None
+
+    sourceKey = (resolvedPath, mtime)
+    imgLogoSource = _getFromCache(_sourceImagesCache, sourceKey)
+    if imgLogoSource is None:
+        try:
+            with Image.open(resolvedPath) as img:
+                imgLogoSource = img.convert("RGBA")
+        except OSError:
+            _logger.warning_ext(f"******* Cannot open specified logo !!! *** File: {logoFile} *********")
+            return None
+        _addToCache(_sourceImagesCache, sourceKey, imgLogoSource, _SOURCE_IMAGES_CACHE_SIZE)
+
+    #   logoScaleH = logoScaleW * imgLogoSource.size[1] * 1.0 / imgLogoSource.size[0]
+    #   newLogoSize = (int(logoScaleW * renderW), int(logoScaleH * renderW)     # preserve logo size on widht
+    logoScaleW = logoScaleH * imgLogoSource.size[0] * 1.0 / imgLogoSource.size[1]
+    newLogoSize = (int(logoScaleW * renderH), int(logoScaleH * renderH))  # preserve logo size on height
+
+    resizedKey = (resolvedPath, mtime, newLogoSize)
+    imgLogo = _getFromCache(_resizedImagesCache, resizedKey)
+    if imgLogo is None:
+        imgLogo = imgLogoSource.resize(newLogoSize, Image.LANCZOS)
+        _addToCache(_resizedImagesCache, resizedKey, imgLogo, _RESIZED_IMAGES_CACHE_SIZE)
+
+    return imgLogo
+
+
+def clearImagesCache():
+    """Release the images kept in memory"""
+    _sourceImagesCache.clear()
+    _resizedImagesCache.clear()
@@ -0,0 +1,134 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Worker processes stamping and compositing the images of several frames in parallel.
+"""
+
+import os
+
+from stampinfo.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# under this number of frames per process, starting the worker processes costs more than it saves
+MIN_FRAMES_PER_PROCESS = 4
+
+
+def getNumProcesses(numProcesses, numFrames=None):
+    """Return the number of worker processes to use for numFrames frames, 1 meaning that the frames are processed
+    in the current process
+
+    Args:
+        numProcesses: number of processes requested, 0 for one per CPU core
+        numFrames: number of frames to process, None if it is not known in advance
+    """
+    if 0 == numProcesses:
+        numProcesses = os.cpu_count() or 1
+    if numFrames is not None:
+        numProcesses = min(numProcesses, numFrames // MIN_FRAMES_PER_PROCESS)
+    return max(1, numProcesses)
+
+
+def initWorkerProcess():
+    """Initializer of the worker processes, to call first in the initializers of the pools that have their own"""
+    from stampinfo.config import config
+
+    # the worker process is a new interpreter, the logging of the add-on is not set yet
+    config.initGlobalVariables()
+    sm_logging.initialize(addonName="Stamp Info", prefix="SI")
+
+
+def createProcessPool(numProcesses, initializer=initWorkerProcess, initargs=()):
+    """Return a concurrent.futures.ProcessPoolExecutor of numProcesses processes, or None if it cannot be created.
+    The processes are spawned so that they don't inherit the state of Blender, they are started at the first
+    submitted calls. The initializer must call initWorkerProcess()
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    try:
+        return ProcessPoolExecutor(
+            max_workers=numProcesses,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initializer,
+            initargs=initargs,
+        )
+    except (OSError, ValueError) as e:
+        _logger.warning_ext(f"Worker processes cannot be created: {e}")
+        return None
+
+
+def imapInProcesses(function, argsList, numProcesses, initializer=initWorkerProcess, initargs=(), fallback=None):
+    """Call function(*args) for each item of argsList in worker processes and yield the results in the order of
+    argsList. At most 2 calls per process are submitted in advance, their results wait in memory until they are
+    yielded.
+
+    The exceptions raised by the function are raised again by the generator. If the processes cannot be started,
+    or if one of them dies, the remaining calls are made in the current process with fallback(*args).
+
+    Args:
+        function: function run in the worker processes, it must be defined at the top level of a module
+        numProcesses: number of worker processes, see getNumProcesses(). With 1 the calls are all made in the
+            current process
+        fallback: function called in the current process, function by default
+    """
+    from collections import deque
+    from concurrent.futures.process import BrokenProcessPool
+
+    if fallback is None:
+        fallback = function
+    numCalls = len(argsList)
+    numDone = 0
+
+    executor = createProcessPool(numProcesses, initializer, initargs) if 1 < numProcesses else None
+    if executor is not None:
+        maxPendingCalls = numProcesses * 2
+        pendingCalls = deque()
+        numSubmitted = 0
+        poolError = None
+        try:
+            while numDone < numCalls:
+                try:
+                    while len(pendingCalls) < maxPendingCalls and numSubmitted < numCalls:
+                        # the processes are started by the first calls
+                        pendingCalls.append(executor.submit(function, *argsList[numSubmitted]))
+                        numSubmitted += 1
+                except (BrokenProcessPool, OSError, RuntimeError) as e:
+                    poolError = e
+                    break
+
+                # the errors raised by the function are raised as they are, the frames would fail again
+                try:
+                    result = pendingCalls.popleft().result()
+                except BrokenProcessPool as e:
+                    poolError = e
+                    break
+                numDone += 1
+                yield result
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        if poolError is not None:
+            _logger.warning_ext(
+                f"Worker processes cannot be used, the {numCalls - numDone} remaining frames are processed "
+                f"sequentially: {poolError}"
+            )
+
+    for args in argsList[numDone:]:
+        yield fallback(*args)
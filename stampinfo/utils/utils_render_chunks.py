@@ -0,0 +1,175 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Split the stamped render of an animation into chunks of frames rendered by background Blender processes.
+The chunks are launched by the operator uas_stampinfo.render_chunks.
+"""
+
+import os
+import subprocess
+import time
+
+from stampinfo.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# a background Blender process loads the whole blend file, smaller chunks are not worth it
+_MIN_FRAMES_PER_CHUNK = 4
+
+
+def getFrameChunks(frameStart, frameEnd, numChunks):
+    """Split the range of frames from frameStart to frameEnd (included) into at most numChunks contiguous
+    chunks of balanced lengths. Returns the list of the chunks in the form (chunk start, chunk end)
+    """
+    numFrames = frameEnd - frameStart + 1
+    if numFrames <= 0:
+        return []
+
+    numChunks = max(1, min(numChunks, numFrames // _MIN_FRAMES_PER_CHUNK))
+    chunkLength, remainder = divmod(numFrames, numChunks)
+
+    chunks = []
+    chunkStart = frameStart
+    for i in range(numChunks):
+        # the first chunks take one more frame each when the frames cannot be evenly split
+        chunkEnd = chunkStart + chunkLength - 1 + (1 if i < remainder else 0)
+        chunks.append((chunkStart, chunkEnd))
+        chunkStart = chunkEnd + 1
+
+    return chunks
+
+
+def getChunkWorkerCommand(
+    blenderFilepath, blendFilepath, sceneName, chunk, outputFilepath, numThreads=0, numStampingProcesses=0
+):
+    """Return the command line of the background Blender process that renders the specified chunk of frames
+    of the scene with Stamp Info.
+
+    Args:
+        chunk: range of frames to render, in the form (chunk start, chunk end)
+        outputFilepath: image sequence to write, with a # frame pattern. The stamped images of the chunk are
+            written there with the output image indices of the whole animation
+        numThreads: number of render threads of the process, 0 to let Blender use all the CPU cores
+        numStampingProcesses: number of processes stamping and compositing the images of the chunk, 0 to use the
+            number set in the add-on preferences
+    """
+    pythonExpr = (
+        "import bpy; bpy.ops.uas_stampinfo.render("
+        f"renderMode='ANIMATION', isChunk=True, chunkFrameStart={chunk[0]}, chunkFrameEnd={chunk[1]}, "
+        f"chunkOutputFilepath={outputFilepath!r}, chunkNumProcesses={numStampingProcesses})"
+    )
+
+    command = [blenderFilepath, "--background", blendFilepath, "--scene", sceneName, "-noaudio"]
+    if 0 < numThreads:
+        command += ["--threads", str(numThreads)]
+    # without --python-exit-code Blender returns 0 even when the render fails
+    command += ["--python-exit-code", "1", "--python-expr", pythonExpr]
+
+    return command
+
+
+def getThreadsPerWorker(numWorkers):
+    """Return the number of render threads of each of the numWorkers processes running at the same time so that
+    they share the CPU cores instead of competing for all of them"""
+    return max(1, (os.cpu_count() or 1) // max(1, numWorkers))
+
+
+def getProcessesPerWorker(numWorkers, numProcesses=0):
+    """Return the number of processes stamping and compositing the images in each of the numWorkers processes
+    running at the same time, so that all the chunks together don't start more processes than a single render.
+
+    Args:
+        numProcesses: number of processes of a single render, 0 for one per CPU core
+    """
+    if 0 == numProcesses:
+        numProcesses = os.cpu_count() or 1
+    return max(1, numProcesses // max(1, numWorkers))
+
+
+class ChunkWorkers:
+    """Processes of the specified command lines, launched at the same time. They are polled without blocking so
+    that the operator launching them can keep Blender responsive, see runChunkWorkers() for a blocking use.
+    The output of each process is written to its log file
+    """
+
+    def __init__(self, commands, logFilepaths):
+        self._processes = []
+        self._logFiles = []
+        try:
+            for command, logFilepath in zip(commands, logFilepaths):
+                logFile = open(logFilepath, "w")
+                self._logFiles.append(logFile)
+                try:
+                    process = subprocess.Popen(command, stdout=logFile, stderr=subprocess.STDOUT)
+                except OSError as e:
+                    _logger.error_ext(f"*** Background render process cannot be launched: {e}")
+                    process = None
+                self._processes.append(process)
+        except BaseException:
+            self.kill()
+            raise
+
+        self.numProcesses = len([p for p in self._processes if p is not None])
+        self.numEnded = 0
+
+    def poll(self):
+        """Return True while some processes are running"""
+        numRunning = len([p for p in self._processes if p is not None and p.poll() is None])
+        if self.numProcesses - numRunning != self.numEnded:
+            self.numEnded = self.numProcesses - numRunning
+            _logger.info(f"Background render processes: {self.numEnded} / {self.numProcesses} done")
+        if 0 == numRunning:
+            self._closeLogFiles()
+        return 0 < numRunning
+
+    def kill(self):
+        """Stop the processes still running, when the render is aborted"""
+        for process in self._processes:
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+        self._closeLogFiles()
+
+    def getReturnCodes(self):
+        """Return the list of the return codes of the processes, None for a process that could not be launched
+        or that is still running"""
+        return [None if p is None else p.returncode for p in self._processes]
+
+    def _closeLogFiles(self):
+        for logFile in self._logFiles:
+            logFile.close()
+        self._logFiles = []
+
+
+def runChunkWorkers(commands, logFilepaths, pollInterval=1.0):
+    """Launch the processes of the specified command lines at the same time and wait until they all end.
+    Only for Blender in background mode, where the operators cannot wait for them without blocking anything.
+
+    Returns the list of the return codes of the processes, None for a process that could not be launched
+    """
+    workers = ChunkWorkers(commands, logFilepaths)
+    try:
+        while workers.poll():
+            time.sleep(pollInterval)
+    except BaseException:
+        # the render is aborted, the processes must not keep on rendering in the background
+        workers.kill()
+        raise
+
+    return workers.getReturnCodes()
@@ -0,0 +1,243 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Cache of the stamped images of a render job in a single memory-mapped file, instead of one image file per frame.
+Each frame has a slot of fixed size holding its stamped images, usually the top and bottom border strips, as raw
+RGBA data. The images are written by the stamping processes and read by the compositor as numpy views of the
+mapped file, without decoding nor copying them.
+
+File layout, little endian:
+    - header: magic, version, first frame, number of frames, number of images per frame
+    - for each image of a frame: width, height, left, top
+    - one byte per frame, set to 1 once the slot of the frame is written
+    - the slots of the frames, starting on a page boundary
+"""
+
+import os
+import struct
+import threading
+from typing import NamedTuple
+
+from stampinfo.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# extension of the cache files, see getStripCacheFilepath()
+STRIP_CACHE_EXTENSION = ".sistrips"
+STRIP_CACHE_FILENAME = "_StampInfo_StripCache"
+
+_MAGIC = b"SISTRIPS"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIiII")
+_IMAGE_HEADER = struct.Struct("<IIii")
+_SLOTS_ALIGNMENT = 4096
+
+
+def getStripCacheFilepath(dirPath, chunk=None):
+    """Return the path of the strip cache of the stamped images of the specified directory.
+    As for the manifests, the chunks of frames rendered at the same time by several processes have their own cache
+
+    Args:
+        dirPath: directory of the stamped images, ending with a path separator
+        chunk: range of frames rendered by the process, in the form (chunk start, chunk end), or None
+    """
+    if chunk is None:
+        return f"{dirPath}{STRIP_CACHE_FILENAME}{STRIP_CACHE_EXTENSION}"
+    return f"{dirPath}{STRIP_CACHE_FILENAME}_{chunk[0]}-{chunk[1]}{STRIP_CACHE_EXTENSION}"
+
+
+class StripCacheSlot(NamedTuple):
+    """Reference to a stamped image of the strip cache, used by the compositor in place of an image file path.
+    frame is None for a reference to the image in all the frames, see atFrame()"""
+
+    cacheFilepath: str
+    imageIndex: int
+    frame: int = None
+
+    def atFrame(self, frame):
+        return self._replace(frame=frame)
+
+
+class StripCache:
+    """Stamped images of the frames of a render job, stored in a memory-mapped file, see the module documentation.
+    Use StripCache.create() to create the file, and getStripCache() to share the opened caches in a process.
+
+    Args:
+        writable: if False the file is mapped read-only
+    """
+
+    def __init__(self, filepath, writable=False):
+        import numpy as np
+
+        self.filepath = filepath
+        self.writable = writable
+
+        with open(filepath, "rb") as f:
+            magic, version, self.frameStart, self.numFrames, numImages = _HEADER.unpack(f.read(_HEADER.size))
+            if _MAGIC != magic or _VERSION != version:
+                raise ValueError(f"Not a strip cache file of this version: {filepath}")
+            imageHeaders = f.read(_IMAGE_HEADER.size * numImages)
+
+        # (width, height) and (left, top) of each image of a frame, and its offset in the slot of the frame
+        self.imageSizes = []
+        self.imagePositions = []
+        self._imageOffsets = []
+        self.slotSize = 0
+        for i in range(numImages):
+            width, height, left, top = _IMAGE_HEADER.unpack_from(imageHeaders, i * _IMAGE_HEADER.size)
+            self.imageSizes.append((width, height))
+            self.imagePositions.append((left, top))
+            self._imageOffsets.append(self.slotSize)
+            self.slotSize += width * height * 4
+
+        flagsOffset = _HEADER.size + _IMAGE_HEADER.size * numImages
+        self._slotsOffset = _getSlotsOffset(flagsOffset, self.numFrames)
+
+        self._data = np.memmap(filepath, dtype=np.uint8, mode="r+" if writable else "r")
+        self._writtenFlags = self._data[flagsOffset : flagsOffset + self.numFrames]
+
+    @classmethod
+    def create(cls, filepath, frameStart, frameEnd, images):
+        """Create the cache file for the frames from frameStart to frameEnd (included), replacing the existing one,
+        and return it opened for writing. The slots are not allocated on the file systems supporting sparse files.
+
+        Args:
+            images: the images of a frame, in the form ((width, height), (left, top)), the position being the one
+                of the image in the full stamped image
+        """
+        numFrames = frameEnd - frameStart + 1
+        header = _HEADER.pack(_MAGIC, _VERSION, frameStart, numFrames, len(images))
+        for (width, height), (left, top) in images:
+            header += _IMAGE_HEADER.pack(width, height, left, top)
+        slotSize = sum(width * height * 4 for (width, height), _pos in images)
+
+        # the cache of a previous job with the same path must not be used anymore
+        _closeStripCache(filepath)
+        with open(filepath, "wb") as f:
+            f.write(header)
+            f.truncate(_getSlotsOffset(len(header), numFrames) + slotSize * numFrames)
+
+        return cls(filepath, writable=True)
+
+    def _getSlot(self, frame):
+        if not (self.frameStart <= frame < self.frameStart + self.numFrames):
+            raise IndexError(f"Frame {frame} out of the strip cache: {self.filepath}")
+        slotStart = self._slotsOffset + (frame - self.frameStart) * self.slotSize
+        return self._data[slotStart : slotStart + self.slotSize]
+
+    def hasFrame(self, frame):
+        """Return True if the stamped images of the frame have been written"""
+        return self.frameStart <= frame < self.frameStart + self.numFrames and bool(
+            self._writtenFlags[frame - self.frameStart]
+        )
+
+    def writeFrame(self, frame, images):
+        """Write the stamped images of the frame, as RGBA Pillow images with the sizes of the cache"""
+        import numpy as np
+
+        slot = self._getSlot(frame)
+        for img, size, offset in zip(images, self.imageSizes, self._imageOffsets):
+            if img.size != size or "RGBA" != img.mode:
+                raise ValueError(f"Image {img.mode} {img.size} doesn't match the strip cache, RGBA {size} expected")
+            slot[offset : offset + size[0] * size[1] * 4] = np.asarray(img).reshape(-1)
+        self._writtenFlags[frame - self.frameStart] = 1
+
+    def getFrameImages(self, frame):
+        """Return the stamped images of the frame as numpy arrays of shape (height, width, 4), or None if the frame
+        has not been written. The arrays are views of the mapped file, nothing is copied
+        """
+        if not self.hasFrame(frame):
+            return None
+        slot = self._getSlot(frame)
+        return [
+            slot[offset : offset + width * height * 4].reshape(height, width, 4)
+            for (width, height), offset in zip(self.imageSizes, self._imageOffsets)
+        ]
+
+    def close(self):
+        """Write the modified slots to the file and unmap it"""
+        if self._data is None:
+            return
+        if self.writable:
+            self._data.flush()
+        # the file is unmapped once the views given by getFrameImages() are released too
+        self._data = None
+        self._writtenFlags = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+        return False
+
+
+def _getSlotsOffset(flagsOffset, numFrames):
+    return (flagsOffset + numFrames + _SLOTS_ALIGNMENT - 1) // _SLOTS_ALIGNMENT * _SLOTS_ALIGNMENT
+
+
+# caches opened in the current process, in the form {file path: StripCache}
+_openedStripCaches = dict()
+_openedStripCachesLock = threading.Lock()
+
+
+def getStripCache(filepath, writable=False):
+    """Return the cache of the specified file, opened once per process, see closeStripCaches()"""
+    filepath = os.path.abspath(filepath)
+    with _openedStripCachesLock:
+        cache = _openedStripCaches.get(filepath)
+        if cache is None or (writable and not cache.writable):
+            if cache is not None:
+                cache.close()
+            cache = StripCache(filepath, writable=writable)
+            _openedStripCaches[filepath] = cache
+        return cache
+
+
+def _closeStripCache(filepath):
+    with _openedStripCachesLock:
+        cache = _openedStripCaches.pop(os.path.abspath(filepath), None)
+    if cache is not None:
+        cache.close()
+
+
+def closeStripCaches():
+    """Close the caches opened in the current process, so that their files can be deleted"""
+    with _openedStripCachesLock:
+        for cache in _openedStripCaches.values():
+            cache.close()
+        _openedStripCaches.clear()
+
+
+def writeStripCacheFrame(images, cacheFilepath, frame):
+    """Write the stamped images of the frame to the cache file. Its signature matches the save functions of
+    utils_writer.ImageWriter"""
+    getStripCache(cacheFilepath, writable=True).writeFrame(frame, images)
+
+
+def readStripCacheImage(slot):
+    """Return the stamped image referenced by the StripCacheSlot as an RGBA Pillow image sharing the memory of
+    the mapped file, or None if its frame has not been written"""
+    from PIL import Image
+
+    images = getStripCache(slot.cacheFilepath).getFrameImages(slot.frame)
+    if images is None:
+        return None
+    array = images[slot.imageIndex]
+    return Image.frombuffer("RGBA", (array.shape[1], array.shape[0]), array, "raw", "RGBA", 0, 1)
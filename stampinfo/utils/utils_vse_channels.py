@@ -0,0 +1,133 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Index of the strips of the VSE scenes by channel, so that the channel operations of utils_vse_render go through
+the strips of their channels only instead of the whole edit.
+The strips are given as the RNA collection scene.sequence_editor.sequences.
+"""
+
+from stampinfo.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+class ChannelIndex:
+    """Names of the strips of a scene per channel. The index is built at the first lookup and is kept up to date by
+    added(), remove() and moved(), called by the functions that change the strips.
+
+    The strips can still be changed by something else, the user or Blender itself when it moves a strip overlapping
+    another one to a free channel. The index is then rebuilt when the number of strips of the scene is not the indexed
+    one, or when a strip of the channel looked up does not exist anymore or is not on this channel anymore
+    """
+
+    def __init__(self):
+        # names of the strips in the form {channel: [strip names]}, None until the index is built
+        self._stripNames = None
+        self._numStrips = 0
+
+    def _build(self, sequences):
+        self._stripNames = dict()
+        self._numStrips = 0
+        for seq in sequences:
+            self._stripNames.setdefault(seq.channel, []).append(seq.name)
+            self._numStrips += 1
+
+    def _getIndexedStrips(self, sequences, channel):
+        """Return the strips of the channel, or None if the index doesn't match them anymore"""
+        strips = []
+        for name in self._stripNames.get(channel, ()):
+            seq = sequences.get(name)
+            if seq is None or channel != seq.channel:
+                return None
+            strips.append(seq)
+        return strips
+
+    def getStrips(self, sequences, channel):
+        """Return the list of the strips of the channel"""
+        if self._stripNames is None or len(sequences) != self._numStrips:
+            self._build(sequences)
+            return self._getIndexedStrips(sequences, channel)
+
+        strips = self._getIndexedStrips(sequences, channel)
+        if strips is None:
+            _logger.debug_ext(f"Strips of channel {channel} changed out of the channel index, it is rebuilt")
+            self._build(sequences)
+            strips = self._getIndexedStrips(sequences, channel)
+        return strips
+
+    def getChannels(self, sequences):
+        """Return the sorted list of the channels having strips"""
+        if self._stripNames is None or len(sequences) != self._numStrips:
+            self._build(sequences)
+        return sorted(channel for channel, names in self._stripNames.items() if len(names))
+
+    def added(self, strip):
+        """Add a strip that has just been created to the index"""
+        if self._stripNames is None or strip is None:
+            return
+        self._stripNames.setdefault(strip.channel, []).append(strip.name)
+        self._numStrips += 1
+
+    def moved(self, strip, previousChannel):
+        """Update the index after the channel of the strip has been changed. The strip is indexed on the channel
+        it has actually been moved to, which is not the requested one if it overlapped another strip"""
+        if self._stripNames is None:
+            return
+        names = self._stripNames.get(previousChannel, [])
+        if strip.name in names:
+            names.remove(strip.name)
+            self._stripNames.setdefault(strip.channel, []).append(strip.name)
+        else:
+            # the index was outdated
+            self._stripNames = None
+
+    def remove(self, sequences, strip):
+        """Remove the strip from the scene and from the index"""
+        name, channel = strip.name, strip.channel
+        sequences.remove(strip)
+        if self._stripNames is None:
+            return
+        names = self._stripNames.get(channel, [])
+        if name in names:
+            names.remove(name)
+            self._numStrips -= 1
+        else:
+            self._stripNames = None
+
+    def clear(self):
+        """Empty the index once all the strips of the scene have been removed"""
+        self._stripNames = dict()
+        self._numStrips = 0
+
+
+# channel indices of the scenes, in the form {scene pointer: ChannelIndex}
+_channelIndices = dict()
+
+
+def getChannelIndex(sceneKey):
+    """Return the channel index of the scene identified by sceneKey, usually scene.as_pointer()"""
+    channelIndex = _channelIndices.get(sceneKey)
+    if channelIndex is None:
+        channelIndex = ChannelIndex()
+        _channelIndices[sceneKey] = channelIndex
+    return channelIndex
+
+
+def discardChannelIndex(sceneKey):
+    """Forget the channel index of a scene that is deleted, another scene may get the same pointer"""
+    _channelIndices.pop(sceneKey, None)
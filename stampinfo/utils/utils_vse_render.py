@@ -26,6 +26,7 @@ from pathlib import Path
 
 import bpy
 
+from bpy.app.handlers import persistent
 from bpy.types import Operator, PropertyGroup
 from bpy.props import (
     IntVectorProperty,
@@ -34,6 +35,25 @@ from bpy.props import (
 )
 
 from ..utils import utils
+from ..utils.utils_filenames import formatFrameRanges, getSequenceElementNames, getSequenceFrames
+from ..utils.utils_compositing import (
+    compositeImageSequences,
+    compositeImageSequencesToStream,
+    getCenteredPosition,
+    getSequenceFrameFilepath,
+    isSupportedImageFile,
+)
+from ..utils.utils_ffmpeg import (
+    DEFAULT_ENCODING_PRESET,
+    FFmpegPipeEncoder,
+    getEncodingPreset,
+    getFFmpegEncodeCommand,
+    getFFmpegFilepath,
+    getMovieFilepath,
+    isSupportedMovieFile,
+)
+from ..utils.utils_strip_cache import StripCacheSlot, closeStripCaches
+from ..utils.utils_vse_channels import discardChannelIndex, getChannelIndex
 
 from stampinfo.config import sm_logging
 
@@ -338,6 +358,7 @@ class StampInfo_Vse_Render(PropertyGroup):
             print(f"*** newClip video .frame_start: {newClip.frame_start}")
 
             newClip.channel = channelInd
+            self._getChannelIndex(scene).moved(newClip, 200)
 
         if importAudio:
             newClip = self.createNewClip(
@@ -361,6 +382,7 @@ class StampInfo_Vse_Render(PropertyGroup):
             newClip.frame_final_end = frame_final_end
             newClip.frame_final_start = frame_final_start
             newClip.channel = channelInd + 1
+            self._getChannelIndex(scene).moved(newClip, 201)
 
         return newClip
 
@@ -414,66 +436,27 @@ class StampInfo_Vse_Render(PropertyGroup):
 
         def _new_images_sequence(scene, clipName, images_path, channelInd, atFrame):
             """Find the name template for the specified images sequence in order to create it"""
-            import re
-            from pathlib import Path
-
             seq = None
-            p = Path(images_path)
-            folder, name = p.parent, str(p.name)
-
-            # mov_name = ""
-            # Find frame padding. Either using # formating or printf formating
-            file_re = ""
-            padding_match = re.match(".*?(#+).*", name)
-            if not padding_match:
-                padding_match = re.match(".*?%(\d\d)d.*", name)
-                if padding_match:
-                    padding_length = int(padding_match[1])
-                    file_re = re.compile(
-                        r"^{1}({0}){2}$".format(
-                            "\d" * padding_length, name[: padding_match.start(1) - 1], name[padding_match.end(1) + 1 :]
-                        )
-                    )
-                    # mov_name = (
-                    #     str(p.stem)[: padding_match.start(1) - 1] + str(p.stem)[padding_match.end(1) + 1 :]
-                    # )  # Removes the % and d which are not captured in the re.
-            else:
-                padding_length = len(padding_match[1])
-                file_re = re.compile(
-                    r"^{1}({0}){2}$".format(
-                        "\d" * padding_length, name[: padding_match.start(1)], name[padding_match.end(1) :]
-                    )
-                )
-                # mov_name = str(p.stem)[: padding_match.start(1)] + str(p.stem)[padding_match.end(1) :]
-
-            if padding_match:
-                # scene.render.filepath = str(folder.joinpath(mov_name))
-
-                frames = dict()
-                max_frame = 0
-                min_frame = 999999999
-                for f in sorted(list(folder.glob("*"))):
-                    # _folder = f.parent
-                    _name = f.name
-                    re_match = file_re.match(_name)
-                    if re_match:
-                        frame_nb = int(re_match[1])
-                        max_frame = max(max_frame, frame_nb)
-                        min_frame = min(min_frame, frame_nb)
-
-                        frames[frame_nb] = f
-
-                frame_keys = list(frames.keys())  # As of python 3.7 should be in the insertion order.
-                if frames:
-                    seq = scene.sequence_editor.sequences.new_image(
-                        clipName, str(frames[frame_keys[0]]), channelInd, atFrame
+
+            # the files of the sequence are found in the cached index of the directory, see getSequenceFrames()
+            frames = getSequenceFrames(images_path)
+            if frames:
+                elementNames, gaps = getSequenceElementNames(frames)
+                if len(gaps):
+                    _logger.warning_ext(
+                        f"Images sequence {images_path}: {sum(g[1] - g[0] + 1 for g in gaps)} missing frames "
+                        f"({formatFrameRanges(gaps)}), they will be empty in the strip"
                     )
 
-                    for i in range(min_frame + 1, max_frame + 1):
-                        pp = frames.get(i, Path(""))
-                        seq.elements.append(pp.name)
+                seq = scene.sequence_editor.sequences.new_image(
+                    clipName, next(iter(frames.values())), channelInd, atFrame
+                )
 
-                #   scene.frame_end = max_frame - min_frame + 1
+                # the RNA collection of the elements is fetched once for all the frames, elements cannot be added
+                # in a single call
+                appendElement = seq.elements.append
+                for elementName in elementNames[1:]:
+                    appendElement(elementName)
 
             return seq
 
@@ -487,6 +470,8 @@ class StampInfo_Vse_Render(PropertyGroup):
         # Clip creation
         ##########
 
+        # the created strips are added to the channel index of the scene so that it doesn't have to be rebuilt
+        channelIndex = self._getChannelIndex(scene)
         newClip = None
         mediaType = self.getMediaType(mediaPath)
         # print(f"Media type:{mediaType}, media:{mediaPath}")
@@ -502,6 +487,7 @@ class StampInfo_Vse_Render(PropertyGroup):
                 newClip = scene.sequence_editor.sequences.new_movie(
                     newClipName + " (video)", mediaPath, channelInd, atFrame
                 )
+                channelIndex.added(newClip)
                 newClip.blend_type = "ALPHA_OVER"
                 newClip.frame_offset_start = offsetStart
                 newClip.frame_offset_end = offsetEnd
@@ -512,6 +498,7 @@ class StampInfo_Vse_Render(PropertyGroup):
                 newClip = scene.sequence_editor.sequences.new_sound(
                     newClipName + " (sound)", mediaPath, audioChannel, atFrame
                 )
+                channelIndex.added(newClip)
                 newClip.frame_offset_start = offsetStart
                 newClip.frame_offset_end = offsetEnd
                 if -1 != final_duration:
@@ -520,6 +507,7 @@ class StampInfo_Vse_Render(PropertyGroup):
         elif "IMAGE" == mediaType:
             newClipName = clipName if "" != clipName else "myImage"
             newClip = scene.sequence_editor.sequences.new_image(newClipName, mediaPath, channelInd, atFrame)
+            channelIndex.added(newClip)
             newClip.blend_type = "ALPHA_OVER"
             newClip.frame_offset_start = offsetStart
             newClip.frame_offset_end = offsetEnd
@@ -529,6 +517,7 @@ class StampInfo_Vse_Render(PropertyGroup):
         elif "IMAGES_SEQUENCE" == mediaType:
             newClipName = clipName if "" != clipName else "myImagesSequence"
             newClip = _new_images_sequence(scene, newClipName, mediaPath, channelInd, atFrame)
+            channelIndex.added(newClip)
             # newClip = scene.sequence_editor.sequences.new_image("myVideo", mediaPath, channelInd, atFrame)
             newClip.blend_type = "ALPHA_OVER"
             newClip.frame_offset_start = offsetStart
@@ -539,6 +528,7 @@ class StampInfo_Vse_Render(PropertyGroup):
         elif "SOUND" == mediaType:
             newClipName = clipName if "" != clipName else "mySound"
             newClip = scene.sequence_editor.sequences.new_sound(newClipName, mediaPath, channelInd, atFrame)
+            channelIndex.added(newClip)
             newClip.frame_offset_start = offsetStart
             newClip.frame_offset_end = offsetEnd
             if -1 != final_duration:
@@ -556,6 +546,7 @@ class StampInfo_Vse_Render(PropertyGroup):
                 cameraScene,
                 cameraObject,
             )
+            channelIndex.added(newClip)
             newClip.blend_type = "ALPHA_OVER"
 
         elif "UNKNOWN" == mediaType:
@@ -575,38 +566,33 @@ class StampInfo_Vse_Render(PropertyGroup):
 
         return newClip
 
+    def _getChannelIndex(self, scene):
+        """Return the index of the strips of the scene by channel, see utils_vse_channels.ChannelIndex"""
+        return getChannelIndex(scene.as_pointer())
+
     # wkip added to utils_vse
     def clearAllChannels(self, scene):
-        for seq in scene.sequence_editor.sequences:
+        for seq in list(scene.sequence_editor.sequences):
             scene.sequence_editor.sequences.remove(seq)
+        self._getChannelIndex(scene).clear()
 
         bpy.ops.sequencer.refresh_all()
 
     # wkip added to utils_vse
     def clearChannel(self, scene, channelIndex):
-        sequencesList = list()
-        for seq in scene.sequence_editor.sequences:
-            if channelIndex == seq.channel:
-                sequencesList.append(seq)
-
-        for seq in sequencesList:
-            scene.sequence_editor.sequences.remove(seq)
+        stripsByChannel = self._getChannelIndex(scene)
+        for seq in stripsByChannel.getStrips(scene.sequence_editor.sequences, channelIndex):
+            stripsByChannel.remove(scene.sequence_editor.sequences, seq)
 
         bpy.ops.sequencer.refresh_all()
 
     # wkip added to utils_vse
     def getChannelClips(self, scene, channelIndex):
-        sequencesList = list()
-        for seq in scene.sequence_editor.sequences:
-            if channelIndex == seq.channel:
-                sequencesList.append(seq)
-
-        return sequencesList
+        return self._getChannelIndex(scene).getStrips(scene.sequence_editor.sequences, channelIndex)
 
     def deselectChannel(self, scene, channelIndex):
-        for seq in scene.sequence_editor.sequences:
-            if channelIndex == seq.channel:
-                seq.select = False
+        for seq in self.getChannelClips(scene, channelIndex):
+            seq.select = False
 
     def deselectAllChannel(self, scene):
         for seq in scene.sequence_editor.sequences:
@@ -617,16 +603,17 @@ class StampInfo_Vse_Render(PropertyGroup):
         """Modes: "CLEARANDSELECT", "ADD", "REMOVE"
         Returns the resulting selected clips belonging to the track
         """
+        if "CLEARANDSELECT" == mode:
+            # the clips of all the channels have to be deselected
+            self.deselectAllChannel(scene)
+
         sequencesList = list()
-        for seq in scene.sequence_editor.sequences:
-            if channelIndex == seq.channel:
-                if "REMOVE" == mode:
-                    seq.select = False
-                else:
-                    seq.select = True
-                    sequencesList.append(seq)
-            elif "CLEARANDSELECT" == mode:
+        for seq in self.getChannelClips(scene, channelIndex):
+            if "REMOVE" == mode:
                 seq.select = False
+            else:
+                seq.select = True
+                sequencesList.append(seq)
 
         return sequencesList
 
@@ -645,10 +632,12 @@ class StampInfo_Vse_Render(PropertyGroup):
 
             # we need to clear the target channel before doing the switch otherwise some clips may get moved to another channel
             if len(targetSequencesList):
-                self.clearChannel(self.parentScene, targetChannelIndex)
+                self.clearChannel(scene, targetChannelIndex)
 
+            stripsByChannel = self._getChannelIndex(scene)
             for clip in sourceSequencesList:
                 clip.channel = targetChannelIndex
+                stripsByChannel.moved(clip, sourceChannelIndex)
 
         return targetSequencesList
 
@@ -751,6 +740,7 @@ class StampInfo_Vse_Render(PropertyGroup):
         bg_res=None,
         fg_file=None,
         fg_res=None,
+        fg_strips=None,
         audio_file=None,
         output_file=None,
         frame_start=None,
@@ -760,14 +750,31 @@ class StampInfo_Vse_Render(PropertyGroup):
         import_at_frame=0,
         outputImgIndicesMode="3D_FRAME",
         clean_temp_scene=True,
+        engine="VSE",
+        num_processes=0,
+        movie_encoder="VSE",
+        ffmpeg_filepath="",
+        encoding_preset=DEFAULT_ENCODING_PRESET,
     ):
         """High level function used to create a media from a backgroupd and foreground media and a sound
 
         This function will set the internal bg and fg media of the vse_render class and will call compositeVideoInVSE()
+        or compositeImagesWithPillow()
         Not set values are taken from scene
 
         Args:
             output_resolution: array [width, height]
+            fg_strips: list of the foreground media made of horizontal strips of an image of resolution fg_res,
+                in the form (media path, (first row, end row)), rows being counted from the top of the image.
+                They are used instead of fg_file. The media can also be utils_strip_cache.StripCacheSlot instances,
+                which are only supported by the Pillow engine and by the FFmpeg encoder
+            engine: "VSE" or "PILLOW". The Pillow engine doesn't need a window and can be used in background mode,
+                it is used only when the output is an image or an image sequence, see compositeImagesWithPillow()
+            num_processes: number of processes used by the Pillow engine, 0 to use one per CPU core
+            movie_encoder: "VSE" or "FFMPEG". With FFMPEG the movies are composited with Pillow and encoded by
+                FFmpeg, without the VSE, see compositeMovieWithFFmpeg(). The VSE is used if FFmpeg cannot be found
+            ffmpeg_filepath: FFmpeg executable, if empty it is searched in the PATH of the system
+            encoding_preset: encoding settings of the movies, see utils_ffmpeg.ENCODING_PRESETS
         """
         self.clearMedia()
 
@@ -784,6 +791,39 @@ class StampInfo_Vse_Render(PropertyGroup):
         if audio_file is not None:
             self.inputAudioMediaPath = audio_file
 
+        if "PILLOW" == engine and output_file is not None and isSupportedImageFile(output_file):
+            self.compositeImagesWithPillow(
+                scene.frame_start if frame_start is None else frame_start,
+                scene.frame_end if frame_end is None else frame_end,
+                output_file,
+                output_resolution=output_resolution,
+                importAtFrame=import_at_frame,
+                outputImgIndicesMode=outputImgIndicesMode,
+                overStrips=fg_strips,
+                numProcesses=num_processes,
+            )
+            return
+
+        if "FFMPEG" == movie_encoder and output_file is not None and isSupportedMovieFile(output_file):
+            ffmpegFilepath = getFFmpegFilepath(ffmpeg_filepath)
+            if ffmpegFilepath is None:
+                _logger.warning_ext("FFmpeg not found, the movie is encoded with the VSE")
+            else:
+                self.compositeMovieWithFFmpeg(
+                    scene.render.fps if fps is None else fps,
+                    scene.frame_start if frame_start is None else frame_start,
+                    scene.frame_end if frame_end is None else frame_end,
+                    output_file,
+                    ffmpegFilepath,
+                    output_resolution=output_resolution,
+                    importAtFrame=import_at_frame,
+                    outputImgIndicesMode=outputImgIndicesMode,
+                    overStrips=fg_strips,
+                    numProcesses=num_processes,
+                    encodingPreset=encoding_preset,
+                )
+                return
+
         self.compositeVideoInVSE(
             scene.render.fps if fps is None else fps,
             scene.frame_start if frame_start is None else frame_start,
@@ -793,16 +833,187 @@ class StampInfo_Vse_Render(PropertyGroup):
             output_resolution=output_resolution,
             importAtFrame=import_at_frame,
             outputImgIndicesMode=outputImgIndicesMode,
+            overStrips=fg_strips,
+            encodingPreset=encoding_preset,
         )
 
         if clean_temp_scene:
-            scenesToDelete = [
-                s
-                for s in bpy.data.scenes
-                if (s.name.startswith("Tmp_VSE_RenderScene") or s.name.startswith("VSE_SequenceRenderScene"))
-            ]
-            for s in scenesToDelete:
-                bpy.data.scenes.remove(s, do_unlink=True)
+            purgeCompositingScenes()
+
+    def _getPillowCompositingInputs(self, frame_start, frame_end, output_resolution=None, overStrips=None):
+        """Return the resolution of the composited images and the images to composite at each frame, in the form
+        (output resolution, list of the bg images, list of the fg images of each frame) as expected by
+        compositeImageSequences()"""
+        output_res = None
+        if output_resolution is not None:
+            output_res = output_resolution
+        elif "" != self.inputBGMediaPath:
+            output_res = self.inputBGResolution
+        elif "" != self.inputOverMediaPath:
+            output_res = self.inputOverResolution
+        output_res = (output_res[0], output_res[1])
+
+        # the positions of the fg images don't depend on the frame
+        overMedia = []
+        if overStrips is not None:
+            fgLeft, fgTop = getCenteredPosition(self.inputOverResolution, output_res)
+            for stripMediaPath, stripRows in overStrips:
+                overMedia.append((stripMediaPath, (fgLeft, fgTop + stripRows[0])))
+        elif "" != self.inputOverMediaPath:
+            overMedia.append((self.inputOverMediaPath, getCenteredPosition(self.inputOverResolution, output_res)))
+
+        bgFilepaths = []
+        overFilepathsPerFrame = []
+        for frame in range(frame_start, frame_end + 1):
+            bgFilepaths.append(getSequenceFrameFilepath(self.inputBGMediaPath, frame))
+            overFilepathsPerFrame.append(
+                [
+                    (m.atFrame(frame) if isinstance(m, StripCacheSlot) else getSequenceFrameFilepath(m, frame), pos)
+                    for m, pos in overMedia
+                ]
+            )
+
+        return output_res, bgFilepaths, overFilepathsPerFrame
+
+    def compositeImagesWithPillow(
+        self,
+        frame_start,
+        frame_end,
+        output_filepath,
+        output_resolution=None,
+        importAtFrame=0,
+        outputImgIndicesMode="3D_FRAME",
+        overStrips=None,
+        numProcesses=0,
+    ):
+        """Low level function that composites the bg and fg image sequences already held by this vse_render class
+        with Pillow, without the VSE. The images are placed as in compositeVideoInVSE(): the bg and fg images are
+        centered in the output image and cropped if they are bigger.
+        This doesn't use any window, workspace or temporary scene, so it can be called in background mode.
+
+        Args:
+            output_filepath: image or image sequence to write, # characters being replaced by the output frame index
+            output_resolution: array [width, height]
+            overStrips: foreground media made of horizontal strips of an image of resolution inputOverResolution,
+                see compositeMedia()
+        """
+        renderAtFrame = frame_start if "3D_FRAME" == outputImgIndicesMode else importAtFrame
+
+        output_res, bgFilepaths, overFilepathsPerFrame = self._getPillowCompositingInputs(
+            frame_start, frame_end, output_resolution, overStrips
+        )
+        outputFilepaths = [
+            getSequenceFrameFilepath(output_filepath, renderAtFrame + i) for i in range(frame_end - frame_start + 1)
+        ]
+
+        _logger.debug_ext(f"Compositing {len(outputFilepaths)} images with Pillow: {output_filepath}", col="BLUE")
+        try:
+            compositeImageSequences(bgFilepaths, overFilepathsPerFrame, output_res, outputFilepaths, numProcesses)
+        finally:
+            # the strip caches read by the compositor are unmapped so that the temporary files can be deleted
+            closeStripCaches()
+
+        # open rendered media in a player
+        if frame_start == frame_end and not bpy.app.background:
+            utils.openMedia(outputFilepaths[0], inExternalPlayer=False)
+
+    def compositeMovieWithFFmpeg(
+        self,
+        fps,
+        frame_start,
+        frame_end,
+        output_filepath,
+        ffmpegFilepath,
+        output_resolution=None,
+        importAtFrame=0,
+        outputImgIndicesMode="3D_FRAME",
+        overStrips=None,
+        numProcesses=0,
+        encodingPreset=DEFAULT_ENCODING_PRESET,
+    ):
+        """Low level function that composites the bg and fg image sequences already held by this vse_render class
+        with Pillow, as compositeImagesWithPillow() does, and encodes the composited frames into a movie with FFmpeg.
+        The frames are streamed to FFmpeg as raw video so the composited images are never written on disk.
+        This doesn't use any window, workspace or temporary scene, so it can be called in background mode.
+
+        Args:
+            output_filepath: movie to write, see utils_ffmpeg.isSupportedMovieFile(). As with the VSE, the # characters
+                of the file name are replaced by the range of the output frame indices
+            ffmpegFilepath: FFmpeg executable, see utils_ffmpeg.getFFmpegFilepath()
+            output_resolution: array [width, height]
+            overStrips: foreground media made of horizontal strips of an image of resolution inputOverResolution,
+                see compositeMedia()
+            encodingPreset: encoding settings of the movie, see utils_ffmpeg.ENCODING_PRESETS
+        """
+        output_res, bgFilepaths, overFilepathsPerFrame = self._getPillowCompositingInputs(
+            frame_start, frame_end, output_resolution, overStrips
+        )
+
+        audioFilepath = None
+        if self.inputAudioMediaPath is not None and "" != self.inputAudioMediaPath:
+            if os.path.exists(self.inputAudioMediaPath):
+                audioFilepath = self.inputAudioMediaPath
+            else:
+                print(f" *** Rendered shot not found: {self.inputAudioMediaPath}")
+
+        renderAtFrame = frame_start if "3D_FRAME" == outputImgIndicesMode else importAtFrame
+        movieFilepath = getMovieFilepath(output_filepath, renderAtFrame, renderAtFrame + frame_end - frame_start)
+
+        Path(movieFilepath).parent.mkdir(parents=True, exist_ok=True)
+        command = getFFmpegEncodeCommand(
+            ffmpegFilepath, movieFilepath, output_res, fps, audioFilepath=audioFilepath, encodingPreset=encodingPreset
+        )
+
+        _logger.debug_ext(f"Encoding {len(bgFilepaths)} images with FFmpeg: {movieFilepath}", col="BLUE")
+        try:
+            with FFmpegPipeEncoder(command) as encoder:
+                compositeImageSequencesToStream(
+                    bgFilepaths, overFilepathsPerFrame, output_res, encoder.write, numProcesses
+                )
+        finally:
+            closeStripCaches()
+
+    def _takePooledStrips(self, scene):
+        """Return the image strips of the scene that can be retargeted to new media, in the form {channel: strip}.
+        The other strips are removed"""
+        sequences = scene.sequence_editor.sequences
+        stripsByChannel = self._getChannelIndex(scene)
+        pooledStrips = dict()
+        for channel in stripsByChannel.getChannels(sequences):
+            for seq in stripsByChannel.getStrips(sequences, channel):
+                if "IMAGE" == seq.type and channel not in pooledStrips:
+                    pooledStrips[channel] = seq
+                else:
+                    stripsByChannel.remove(sequences, seq)
+        return pooledStrips
+
+    def _getPooledClip(self, scene, pooledStrips, mediaPath, channelInd, atFrame, clipName):
+        """Return an image strip of the specified media placed at atFrame on the specified channel.
+        The pooled strip of the channel, see _takePooledStrips(), is retargeted to the media if it has the same
+        name and the same number of frames, otherwise a new strip is created with createNewClip()
+        """
+        strip = pooledStrips.pop(channelInd, None)
+        if strip is not None:
+            frames = getSequenceFrames(mediaPath)
+            elementNames, _gaps = getSequenceElementNames(frames) if frames else ([], [])
+            if strip.name == clipName and len(elementNames) and len(strip.elements) == len(elementNames):
+                strip.directory = os.path.join(os.path.dirname(next(iter(frames.values()))), "")
+                # the file names usually don't change from one render to the next one
+                for element, elementName in zip(strip.elements, elementNames):
+                    if element.filename != elementName:
+                        element.filename = elementName
+
+                strip.frame_start = atFrame
+                strip.blend_type = "ALPHA_OVER"
+                strip.crop.min_x = strip.crop.max_x = strip.crop.min_y = strip.crop.max_y = 0
+                strip.transform.offset_x = strip.transform.offset_y = 0
+                # the images may have been written again with the same names
+                strip.invalidate_cache("RAW")
+                return strip
+
+            self._getChannelIndex(scene).remove(scene.sequence_editor.sequences, strip)
+
+        return self.createNewClip(scene, mediaPath, channelInd, atFrame=atFrame, clipName=clipName)
 
     def compositeVideoInVSE(
         self,
@@ -814,12 +1025,17 @@ class StampInfo_Vse_Render(PropertyGroup):
         output_resolution=None,
         importAtFrame=0,
         outputImgIndicesMode="3D_FRAME",
+        overStrips=None,
+        encodingPreset=DEFAULT_ENCODING_PRESET,
     ):
         """Low level function that will use the bg and fg media already held by this vse_render class to generate
         a media
 
         Args:
             output_resolution: array [width, height]
+            overStrips: foreground media made of horizontal strips of an image of resolution inputOverResolution,
+                see compositeMedia()
+            encodingPreset: encoding settings of the movies, see utils_ffmpeg.ENCODING_PRESETS
         """
 
         renderAtFrame = frame_start if "3D_FRAME" == outputImgIndicesMode else importAtFrame
@@ -852,7 +1068,10 @@ class StampInfo_Vse_Render(PropertyGroup):
         # Add new scene
         # vse_scene = bpy.data.scenes.new(name="Tmp_VSE_RenderScene" + postfixSceneName)
         vse_scene = utils.getSceneVSE("Tmp_VSE_RenderScene" + postfixSceneName, createVseTab=True)
-        self.clearAllChannels(vse_scene)
+
+        # the scene is kept between the renders, its image strips are retargeted to the new media instead of being
+        # created again. It is deleted by purgeCompositingScenes()
+        pooledStrips = self._takePooledStrips(vse_scene)
 
         vse_scene.render.fps = fps
         # Make "My New Scene" the active one
@@ -897,11 +1116,15 @@ class StampInfo_Vse_Render(PropertyGroup):
             elif "JPG" == fileExt:
                 vse_scene.render.image_settings.file_format = "JPEG"
             elif "MP4" == fileExt:
+                vseEncoding = getEncodingPreset(encodingPreset)["vse"]
                 vse_scene.render.image_settings.file_format = "FFMPEG"
                 vse_scene.render.ffmpeg.format = "MPEG4"
-                vse_scene.render.ffmpeg.constant_rate_factor = "PERC_LOSSLESS"  # "PERC_LOSSLESS"
-                vse_scene.render.ffmpeg.gopsize = 5  # keyframe interval
+                vse_scene.render.ffmpeg.codec = "H264"
+                vse_scene.render.ffmpeg.constant_rate_factor = vseEncoding["constant_rate_factor"]
+                vse_scene.render.ffmpeg.ffmpeg_preset = vseEncoding["ffmpeg_preset"]
+                vse_scene.render.ffmpeg.gopsize = vseEncoding["gopsize"]  # keyframe interval
                 vse_scene.render.ffmpeg.audio_codec = "AAC"
+                vse_scene.render.ffmpeg.audio_bitrate = vseEncoding["audio_bitrate"]
 
         # if specificFrame is None:
         #     vse_scene.render.image_settings.file_format = "FFMPEG"
@@ -922,7 +1145,9 @@ class StampInfo_Vse_Render(PropertyGroup):
         if "" != self.inputBGMediaPath:
             try:
                 #    print(f"self.inputBGMediaPath: {self.inputBGMediaPath}")
-                bgClip = self.createNewClip(vse_scene, self.inputBGMediaPath, 1, atFrame=renderAtFrame)
+                bgClip = self._getPooledClip(
+                    vse_scene, pooledStrips, self.inputBGMediaPath, 1, renderAtFrame, "StampInfo_BG"
+                )
             #    print("BG Media OK")
             except Exception:
                 print(f" *** Rendered shot not found: {self.inputBGMediaPath}")
@@ -947,7 +1172,9 @@ class StampInfo_Vse_Render(PropertyGroup):
         if "" != self.inputOverMediaPath:
             overClip = None
             try:
-                overClip = self.createNewClip(vse_scene, self.inputOverMediaPath, 2, atFrame=renderAtFrame)
+                overClip = self._getPooledClip(
+                    vse_scene, pooledStrips, self.inputOverMediaPath, 2, renderAtFrame, "StampInfo_Over"
+                )
             #    print("Over Media OK")
             except Exception:
                 print(f" *** Rendered shot not found: {self.inputOverMediaPath}")
@@ -966,6 +1193,33 @@ class StampInfo_Vse_Render(PropertyGroup):
                     overClip.crop.max_y = overClip.crop.min_y
                     overClip.blend_type = "OVER_DROP"
 
+        if overStrips is not None:
+            # channel 3 is used by the audio
+            stripsChannels = [2, 4]
+            # the names identify the pooled strips and must be distinct, Blender would rename the second one
+            stripsNames = ["StampInfo_Strip_Top", "StampInfo_Strip_Bottom"]
+            for (stripMediaPath, stripRows), channel, stripName in zip(overStrips, stripsChannels, stripsNames):
+                stripClip = None
+                try:
+                    stripClip = self._getPooledClip(
+                        vse_scene, pooledStrips, stripMediaPath, channel, renderAtFrame, stripName
+                    )
+                except Exception:
+                    print(f" *** Rendered shot not found: {stripMediaPath}")
+
+                if stripClip is not None:
+                    # strips are kept at their original size and moved from the center of the output image
+                    # to their place in the foreground image, which is centered too. Offset Y is upward
+                    stripClip.fit_method = "ORIGINAL"
+                    stripClip.transform.offset_x = 0
+                    stripClip.transform.offset_y = int(
+                        self.inputOverResolution[1] / 2 - (stripRows[0] + stripRows[1]) / 2
+                    )
+
+        # strips of the previous render that are not used anymore
+        for strip in pooledStrips.values():
+            self._getChannelIndex(vse_scene).remove(vse_scene.sequence_editor.sequences, strip)
+
         if self.inputAudioMediaPath is not None:
             if specificFrame is None:
                 if os.path.exists(self.inputAudioMediaPath):
@@ -1020,6 +1274,32 @@ class StampInfo_Vse_Render(PropertyGroup):
             utils.openMedia(output_filepath, inExternalPlayer=False)
 
 
+def purgeCompositingScenes():
+    """Delete the temporary scenes used to composite the media in the VSE, see
+    StampInfo_Vse_Render.compositeVideoInVSE(), and the sounds used only by them"""
+    scenesToDelete = [
+        s
+        for s in bpy.data.scenes
+        if (s.name.startswith("Tmp_VSE_RenderScene") or s.name.startswith("VSE_SequenceRenderScene"))
+    ]
+    for s in scenesToDelete:
+        sounds = set()
+        if s.sequence_editor is not None:
+            sounds = {seq.sound for seq in s.sequence_editor.sequences_all if "SOUND" == seq.type}
+        discardChannelIndex(s.as_pointer())
+        bpy.data.scenes.remove(s, do_unlink=True)
+
+        for sound in sounds:
+            if sound is not None and 0 == sound.users:
+                bpy.data.sounds.remove(sound)
+
+
+@persistent
+def _purgeCompositingScenesBeforeSave(*args):
+    # the temporary scenes must not be saved in the file of the user
+    purgeCompositingScenes()
+
+
 _classes = (
     StampInfo_Vse_Render,
     StampInfo_compositeVideoInVSE,
@@ -1034,11 +1314,14 @@ def register():
         bpy.utils.register_class(cls)
 
     bpy.types.WindowManager.stampinfo_vse_render = PointerProperty(type=StampInfo_Vse_Render)
+    bpy.app.handlers.save_pre.append(_purgeCompositingScenesBeforeSave)
 
 
 def unregister():
     _logger.debug_ext("       - Unregistering Utils VSE Render Package", form="UNREG")
 
+    if _purgeCompositingScenesBeforeSave in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(_purgeCompositingScenesBeforeSave)
     del bpy.types.WindowManager.stampinfo_vse_render
 
     for cls in reversed(_classes):
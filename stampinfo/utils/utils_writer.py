@@ -0,0 +1,123 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Background writing of the images, so that the encoding of the files and the latency of the file system
+(network shares...) don't block the thread that draws the images.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+
+from stampinfo.config import sm_logging
+
+_logger = sm_logging.getLogger(__name__)
+
+
+# Pillow releases the GIL while encoding the images so a few threads are enough to keep the disk busy
+_DEFAULT_NUM_THREADS = 2
+
+# each queued image is kept in memory until it is written, 4 images of 8K in RGBA are about 500 MB
+_DEFAULT_MAX_QUEUED_IMAGES = 4
+
+
+class ImageWriter:
+    """Write the images in background threads through a bounded queue.
+    submit() returns as soon as the image is queued, but blocks when maxQueuedImages images are already waiting
+    to be written so that the memory used by the queue is bounded. flush() waits until all the queued images are
+    written and must be called before the files are used, typically before compositing them.
+
+    Can be used as a context manager, the images being flushed at the end of the block:
+        with ImageWriter() as writer:
+            writer.submit(saveFunction, img, filepath)
+    """
+
+    def __init__(self, numThreads=_DEFAULT_NUM_THREADS, maxQueuedImages=_DEFAULT_MAX_QUEUED_IMAGES):
+        self._executor = ThreadPoolExecutor(max_workers=numThreads, thread_name_prefix="StampInfo_ImageWriter")
+        self._queueSlots = threading.BoundedSemaphore(maxQueuedImages)
+        self._futures = []
+
+        # directories already created by the writer, they are not checked again
+        self._createdDirs = set()
+        self._createdDirsLock = threading.Lock()
+
+    def _createDirectory(self, dirPath):
+        with self._createdDirsLock:
+            if dirPath in self._createdDirs:
+                return
+            try:
+                Path(dirPath).mkdir(parents=True, exist_ok=True)
+            except Exception:
+                _logger.error_ext(f"*** Creation of the directory failed: {dirPath}")
+                raise
+            self._createdDirs.add(dirPath)
+
+    def _write(self, saveFunction, img, filepath, args):
+        try:
+            self._createDirectory(str(Path(filepath).parent))
+            saveFunction(img, filepath, *args)
+        finally:
+            self._queueSlots.release()
+
+    def submit(self, saveFunction, img, filepath, *args):
+        """Queue the writing of the image. Blocks while the queue is full.
+        The image must not be modified after this call.
+
+        Args:
+            saveFunction: function called in a writer thread as saveFunction(img, filepath, *args). The directory
+                of filepath is created first if needed
+        """
+        self._queueSlots.acquire()
+        try:
+            future = self._executor.submit(self._write, saveFunction, img, filepath, args)
+        except BaseException:
+            self._queueSlots.release()
+            raise
+
+        # the futures of the images already written without error are not kept
+        self._futures = [f for f in self._futures if not f.done() or f.exception() is not None]
+        self._futures.append(future)
+
+    def flush(self):
+        """Wait until all the queued images are written.
+        Raises the first error that occurred while writing them, if any
+        """
+        futures = self._futures
+        self._futures = []
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """Flush the queued images and stop the writer threads"""
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            # the error of the block is the one to report, the images queued so far are still written
+            self._executor.shutdown()
+            self._futures = []
+        return False
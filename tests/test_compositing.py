@@ -0,0 +1,53 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the compositing of the stamped images over the rendered images with Pillow
+"""
+
+import pytest
+from PIL import Image, UnidentifiedImageError
+
+from stampinfo.utils.utils_compositing import compositeImageSequencesToStream, getSequenceFrameFilepath
+
+
+def _writeRenderedImages(dirPath, numFrames):
+    bgPattern = str(dirPath / "render.####.png")
+    bgFilepaths = [getSequenceFrameFilepath(bgPattern, frame) for frame in range(1, numFrames + 1)]
+    for frame, bgFilepath in enumerate(bgFilepaths, start=1):
+        Image.new("RGB", (8, 4), (frame, 0, 0)).save(bgFilepath)
+    return bgFilepaths
+
+
+def test_frames_streamed_in_order(tmp_path):
+    bgFilepaths = _writeRenderedImages(tmp_path, 12)
+    frames = []
+    compositeImageSequencesToStream(bgFilepaths, [[]] * 12, (8, 4), frames.append, numProcesses=2)
+
+    assert [bytes((frame, 0, 0)) * 32 for frame in range(1, 13)] == frames
+
+
+def test_unreadable_frame_raised(tmp_path):
+    bgFilepaths = _writeRenderedImages(tmp_path, 12)
+    with open(bgFilepaths[5], "wb") as f:
+        f.write(b"not an image")
+
+    frames = []
+    with pytest.raises(UnidentifiedImageError):
+        compositeImageSequencesToStream(bgFilepaths, [[]] * 12, (8, 4), frames.append, numProcesses=2)
+    # the frames are not composited again sequentially
+    assert 5 == len(frames)
@@ -0,0 +1,128 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the encoding of the movies by an FFmpeg process. FFmpeg itself is not required, the processes of the
+encoder tests are Python interpreters reading the frames
+"""
+
+import sys
+
+import pytest
+
+from stampinfo.utils.utils_ffmpeg import (
+    DEFAULT_ENCODING_PRESET,
+    ENCODING_PRESETS,
+    FFmpegPipeEncoder,
+    getEncodingPreset,
+    getFFmpegEncodeCommand,
+    getFFmpegFilepath,
+    getMovieFilepath,
+    isSupportedMovieFile,
+)
+
+
+def _getOption(command, option):
+    return command[command.index(option) + 1]
+
+
+def test_encode_command():
+    command = getFFmpegEncodeCommand("ffmpeg", "/renders/shot.mp4", (1920, 1080), 25)
+
+    assert "ffmpeg" == command[0]
+    assert "/renders/shot.mp4" == command[-1]
+    assert "rawvideo" == _getOption(command, "-f")
+    assert "1920x1080" == _getOption(command, "-s")
+    assert "25" == _getOption(command, "-r")
+    assert "-" == _getOption(command, "-i")
+    assert "-vf" not in command and "-map" not in command
+
+
+def test_encode_command_odd_resolution_with_audio():
+    command = getFFmpegEncodeCommand("ffmpeg", "shot.mov", (1281, 721), 24, audioFilepath="/renders/shot.wav")
+
+    assert "pad=ceil(iw/2)*2:ceil(ih/2)*2" == _getOption(command, "-vf")
+    # the video is read from the standard input, the sound from the audio file
+    assert ["-", "/renders/shot.wav"] == [command[i + 1] for i, arg in enumerate(command) if "-i" == arg]
+    assert ["0:v:0", "1:a:0"] == [command[i + 1] for i, arg in enumerate(command) if "-map" == arg]
+    assert "aac" == _getOption(command, "-c:a")
+
+
+@pytest.mark.parametrize("presetName", sorted(ENCODING_PRESETS))
+def test_encode_command_preset(presetName):
+    preset = ENCODING_PRESETS[presetName]
+    command = getFFmpegEncodeCommand(
+        "ffmpeg", "shot.mp4", (1920, 1080), 25, audioFilepath="shot.wav", encodingPreset=presetName
+    )
+
+    assert preset["codec"] == _getOption(command, "-c:v")
+    assert preset["speed"] == _getOption(command, "-preset")
+    assert str(preset["crf"]) == _getOption(command, "-crf")
+    assert str(preset["gopSize"]) == _getOption(command, "-g")
+    # the first pixel format is the one of the frames read from the standard input
+    assert preset["pixelFormat"] == command[len(command) - command[::-1].index("-pix_fmt")]
+    assert f"{preset['audioBitrate']}k" == _getOption(command, "-b:a")
+
+
+def test_unknown_encoding_preset():
+    assert ENCODING_PRESETS[DEFAULT_ENCODING_PRESET] is getEncodingPreset("UNKNOWN_PRESET")
+    assert ENCODING_PRESETS["REVIEW"] is getEncodingPreset("REVIEW")
+
+
+def test_movie_filepath():
+    assert "/renders/shot_0001-0250.mp4" == getMovieFilepath("/renders/shot_####.mp4", 1, 250)
+    assert "/renders/shot_101-120.mkv" == getMovieFilepath("/renders/shot_###.mkv", 101, 120)
+    assert "/renders/shot.mp4" == getMovieFilepath("/renders/shot.mp4", 1, 250)
+
+    assert isSupportedMovieFile("/renders/shot.MOV")
+    assert not isSupportedMovieFile("/renders/shot.avi")
+    assert not isSupportedMovieFile("/renders/shot_####.png")
+
+
+def test_ffmpeg_filepath(tmp_path):
+    ffmpegFilepath = tmp_path / "ffmpeg"
+    ffmpegFilepath.write_bytes(b"")
+    assert str(ffmpegFilepath) == getFFmpegFilepath(str(ffmpegFilepath))
+    assert getFFmpegFilepath(str(tmp_path / "missing_ffmpeg")) is None
+
+
+def test_pipe_encoder_writes_frames(tmp_path):
+    outputFilepath = tmp_path / "frames.raw"
+    readFrames = f"import sys; open({str(outputFilepath)!r}, 'wb').write(sys.stdin.buffer.read())"
+
+    with FFmpegPipeEncoder([sys.executable, "-c", readFrames]) as encoder:
+        encoder.write(b"\x01" * 12)
+        encoder.write(b"\x02" * 12)
+
+    assert 2 == encoder.numFrames
+    assert b"\x01" * 12 + b"\x02" * 12 == outputFilepath.read_bytes()
+
+
+def test_pipe_encoder_reports_errors():
+    failure = "import sys; sys.stdin.buffer.read(); sys.stderr.write('Unknown encoder'); sys.exit(1)"
+    encoder = FFmpegPipeEncoder([sys.executable, "-c", failure])
+    encoder.write(b"\x00" * 12)
+    with pytest.raises(RuntimeError, match="Unknown encoder"):
+        encoder.close()
+
+
+def test_pipe_encoder_aborted_on_error():
+    encoder = None
+    with pytest.raises(ValueError):
+        with FFmpegPipeEncoder([sys.executable, "-c", "import time; time.sleep(60)"]) as encoder:
+            raise ValueError("Compositing failed")
+    assert encoder._process.poll() is not None
@@ -0,0 +1,106 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the search of the files of the image sequences
+"""
+
+import os
+import time
+
+from stampinfo.utils.utils_filenames import (
+    formatFrameRanges,
+    getSequenceDirectoryIndex,
+    getSequenceElementNames,
+    getSequenceFrames,
+)
+
+
+def _touch(dirPath, *names):
+    for name in names:
+        (dirPath / name).write_bytes(b"")
+
+
+def test_sequence_frames(tmp_path):
+    _touch(tmp_path, "shot010_v02_0012.png", "shot010_v02_0010.png", "shot010_v02_0011.png", "shot010_v02_0010.jpg")
+    _touch(tmp_path, "shot010_v03_0010.png", "shot010_v02_010.png")
+
+    frames = getSequenceFrames(str(tmp_path / "shot010_v02_####.png"))
+    assert [10, 11, 12] == list(frames.keys())
+    assert str(tmp_path / "shot010_v02_0011.png") == frames[11]
+
+    # printf frame pattern
+    assert frames == getSequenceFrames(str(tmp_path / "shot010_v02_%04d.png"))
+    assert [10] == list(getSequenceFrames(str(tmp_path / "shot010_v02_###.png")).keys())
+
+
+def test_sequence_frames_next_to_digits(tmp_path):
+    # the frame digits follow other digits, the names are matched with a regular expression
+    _touch(tmp_path, "take2001.png", "take2002.png", "take3001.png")
+    assert [1, 2] == list(getSequenceFrames(str(tmp_path / "take2###.png")).keys())
+
+
+def test_sequence_frames_without_pattern(tmp_path):
+    _touch(tmp_path, "still.png")
+    assert {0: str(tmp_path / "still.png")} == getSequenceFrames(str(tmp_path / "still.png"))
+    assert {} == getSequenceFrames(str(tmp_path / "missing.png"))
+    assert {} == getSequenceFrames(str(tmp_path / "missing_dir" / "image_####.png"))
+
+
+def _setModificationTime(dirPath, modificationTime):
+    os.utime(dirPath, ns=(os.stat(dirPath).st_atime_ns, modificationTime))
+
+
+def test_sequence_directory_index_updated(tmp_path):
+    _touch(tmp_path, "image_0001.png")
+    _setModificationTime(tmp_path, time.time_ns() - 60_000_000_000)
+    index = getSequenceDirectoryIndex(str(tmp_path))
+    assert index is getSequenceDirectoryIndex(str(tmp_path))
+
+    _touch(tmp_path, "image_0002.png")
+    assert [1, 2] == list(getSequenceFrames(str(tmp_path / "image_####.png")).keys())
+
+
+def test_sequence_directory_index_not_cached_while_modified(tmp_path):
+    _touch(tmp_path, "image_0001.png")
+    modificationTime = os.stat(tmp_path).st_mtime_ns
+    assert [1] == list(getSequenceFrames(str(tmp_path / "image_####.png")).keys())
+
+    # with a coarse resolution of the modification times, the directory time doesn't change when a file is added
+    # in the same tick
+    _touch(tmp_path, "image_0002.png")
+    _setModificationTime(tmp_path, modificationTime)
+    assert [1, 2] == list(getSequenceFrames(str(tmp_path / "image_####.png")).keys())
+
+    # once the tick is over the index is cached
+    _setModificationTime(tmp_path, time.time_ns() - 60_000_000_000)
+    index = getSequenceDirectoryIndex(str(tmp_path))
+    assert index is getSequenceDirectoryIndex(str(tmp_path))
+
+
+def test_sequence_element_names(tmp_path):
+    _touch(tmp_path, "img_0003.png", "img_0004.png", "img_0007.png", "img_0009.png")
+    names, gaps = getSequenceElementNames(getSequenceFrames(str(tmp_path / "img_####.png")))
+
+    assert ["img_0003.png", "img_0004.png", "", "", "img_0007.png", "", "img_0009.png"] == names
+    assert [(5, 6), (8, 8)] == gaps
+    assert "5-6, 8" == formatFrameRanges(gaps)
+
+
+def test_sequence_element_names_without_gaps():
+    assert (["a.png"], []) == getSequenceElementNames({12: "/renders/a.png"})
+    assert ([], []) == getSequenceElementNames({})
@@ -0,0 +1,103 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the background writing of the images
+"""
+
+import threading
+
+import pytest
+
+from stampinfo.utils.utils_writer import ImageWriter
+
+
+def _writeText(text, filepath):
+    with open(filepath, "w") as f:
+        f.write(text)
+
+
+def _failOnError(text, filepath):
+    if "error" == text:
+        raise OSError(f"Cannot write {filepath}")
+    _writeText(text, filepath)
+
+
+def test_images_written_in_new_directories(tmp_path):
+    filepaths = [tmp_path / "sub" / f"image_{i}.txt" for i in range(10)]
+    with ImageWriter(maxQueuedImages=2) as writer:
+        for i, filepath in enumerate(filepaths):
+            writer.submit(_writeText, str(i), str(filepath))
+
+    assert [f.read_text() for f in filepaths] == [str(i) for i in range(10)]
+
+
+def test_flush_raises_write_error(tmp_path):
+    writer = ImageWriter()
+    writer.submit(_failOnError, "ok", str(tmp_path / "first.txt"))
+    writer.submit(_failOnError, "error", str(tmp_path / "second.txt"))
+    writer.submit(_failOnError, "ok", str(tmp_path / "third.txt"))
+
+    with pytest.raises(OSError, match="second.txt"):
+        writer.flush()
+    # the other images are still written
+    assert (tmp_path / "first.txt").is_file() and (tmp_path / "third.txt").is_file()
+
+    # the error is reported once
+    writer.flush()
+    writer.close()
+
+
+def test_close_raises_write_error(tmp_path):
+    with pytest.raises(OSError):
+        with ImageWriter() as writer:
+            writer.submit(_failOnError, "error", str(tmp_path / "image.txt"))
+
+
+def test_error_of_block_not_hidden(tmp_path):
+    # the error raised in the block is reported instead of the ones of the writer
+    with pytest.raises(ValueError):
+        with ImageWriter() as writer:
+            writer.submit(_failOnError, "error", str(tmp_path / "image.txt"))
+            raise ValueError("Drawing failed")
+
+
+def test_submit_blocks_when_queue_full(tmp_path):
+    release = threading.Event()
+
+    def _waitRelease(text, filepath):
+        release.wait(10)
+        _writeText(text, filepath)
+
+    writer = ImageWriter(numThreads=1, maxQueuedImages=1)
+    writer.submit(_waitRelease, "first", str(tmp_path / "first.txt"))
+
+    submitted = threading.Event()
+
+    def _submitSecond():
+        writer.submit(_writeText, "second", str(tmp_path / "second.txt"))
+        submitted.set()
+
+    thread = threading.Thread(target=_submitSecond)
+    thread.start()
+    assert not submitted.wait(0.2)
+
+    release.set()
+    thread.join(10)
+    assert submitted.is_set()
+    writer.close()
+    assert "second" == (tmp_path / "second.txt").read_text()
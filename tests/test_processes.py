@@ -0,0 +1,67 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the worker processes stamping and compositing the frames in parallel
+"""
+
+import os
+
+import pytest
+
+from stampinfo.utils.utils_processes import getNumProcesses, imapInProcesses
+
+
+def test_num_processes(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    assert 8 == getNumProcesses(0)
+    assert 8 == getNumProcesses(0, numFrames=100)
+    assert 3 == getNumProcesses(3, numFrames=100)
+    # at least 4 frames per process
+    assert 2 == getNumProcesses(0, numFrames=11)
+    assert 1 == getNumProcesses(0, numFrames=3)
+
+
+def test_results_in_order():
+    argsList = [(2, i) for i in range(20)]
+    assert [2**i for i in range(20)] == list(imapInProcesses(pow, argsList, 3))
+    assert [2**i for i in range(20)] == list(imapInProcesses(pow, argsList, 1))
+
+
+def _failInProcess(*args):
+    raise AssertionError("The calls are not made in the current process when the processes work")
+
+
+def test_errors_of_the_calls_raised():
+    argsList = [("1",), ("2",), ("not a number",), ("4",)]
+    with pytest.raises(ValueError, match="not a number"):
+        list(imapInProcesses(int, argsList, 2, fallback=_failInProcess))
+
+
+def test_calls_made_in_the_current_process_when_the_pool_is_broken():
+    calls = []
+
+    def _powInProcess(base, exponent):
+        calls.append(exponent)
+        return pow(base, exponent)
+
+    # the initializer fails, the processes end before running any call
+    results = imapInProcesses(
+        pow, [(2, i) for i in range(8)], 2, initializer=int, initargs=("x",), fallback=_powInProcess
+    )
+    assert [2**i for i in range(8)] == list(results)
+    assert list(range(8)) == calls
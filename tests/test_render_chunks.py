@@ -0,0 +1,92 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the split of an animation into chunks rendered by background processes
+"""
+
+import sys
+import time
+
+import os
+
+from stampinfo.utils.utils_render_chunks import (
+    ChunkWorkers,
+    getChunkWorkerCommand,
+    getFrameChunks,
+    getProcessesPerWorker,
+    runChunkWorkers,
+)
+
+
+def test_frame_chunks():
+    assert getFrameChunks(1, 13, 3) == [(1, 5), (6, 9), (10, 13)]
+    assert getFrameChunks(1, 100, 1) == [(1, 100)]
+    # the chunks have at least 4 frames
+    assert getFrameChunks(1, 10, 8) == [(1, 5), (6, 10)]
+    assert getFrameChunks(5, 6, 4) == [(5, 6)]
+    assert getFrameChunks(10, 1, 4) == []
+
+
+def test_processes_per_worker(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+    assert 4 == getProcessesPerWorker(4)
+    assert 5 == getProcessesPerWorker(3)
+    assert 1 == getProcessesPerWorker(32)
+    # the number of processes set in the preferences is shared too
+    assert 2 == getProcessesPerWorker(4, numProcesses=8)
+    assert 1 == getProcessesPerWorker(4, numProcesses=2)
+
+
+def test_chunk_worker_command():
+    command = getChunkWorkerCommand(
+        "blender", "shot.blend", "Scene", (11, 20), "/renders/shot_####.png", numThreads=4, numStampingProcesses=3
+    )
+
+    assert "4" == command[command.index("--threads") + 1]
+    pythonExpr = command[command.index("--python-expr") + 1]
+    assert "chunkFrameStart=11, chunkFrameEnd=20" in pythonExpr
+    assert "chunkNumProcesses=3" in pythonExpr
+
+    command = getChunkWorkerCommand("blender", "shot.blend", "Scene", (11, 20), "/renders/shot_####.png")
+    assert "--threads" not in command
+
+
+def test_run_chunk_workers(tmp_path):
+    commands = [[sys.executable, "-c", "print('chunk rendered')"], [sys.executable, "-c", "raise SystemExit(1)"]]
+    logFilepaths = [tmp_path / "chunk_1.log", tmp_path / "chunk_2.log"]
+
+    assert runChunkWorkers(commands, logFilepaths, pollInterval=0.05) == [0, 1]
+    assert "chunk rendered" == logFilepaths[0].read_text().strip()
+
+
+def test_chunk_workers_killed(tmp_path):
+    workers = ChunkWorkers([[sys.executable, "-c", "import time; time.sleep(60)"]], [tmp_path / "chunk.log"])
+    assert workers.poll()
+    assert [None] == workers.getReturnCodes()
+
+    workers.kill()
+    assert not workers.poll()
+    assert 1 == workers.numEnded
+    assert [0] != workers.getReturnCodes()
+
+
+def test_chunk_workers_not_launched(tmp_path):
+    workers = ChunkWorkers([[str(tmp_path / "missing_blender")]], [tmp_path / "chunk.log"])
+    time.sleep(0.05)
+    assert not workers.poll()
+    assert [None] == workers.getReturnCodes()
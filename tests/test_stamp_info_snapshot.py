@@ -0,0 +1,156 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the plain data description of a stamping job
+"""
+
+import ast
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from stampinfo.properties.stampInfoSnapshot import (
+    STAMP_INFO_DEFAULT_SETTINGS,
+    StampFrameContext,
+    StampInfoSnapshot,
+    getDefaultStampInfoSettings,
+    getLogoFilepath,
+    getStaticFrameContexts,
+)
+from stampinfo.utils.utils_ffmpeg import DEFAULT_ENCODING_PRESET
+
+# default value of a property that is computed when the add-on is registered, it cannot be checked
+_NOT_LITERAL = object()
+
+# default values of the properties that don't specify one
+_IMPLICIT_DEFAULTS = {"BoolProperty": False, "IntProperty": 0, "FloatProperty": 0.0, "StringProperty": ""}
+
+
+def _getPropertyDefaults():
+    """Return the default values of the properties of UAS_StampInfoSettings, read from the source of the class so
+    that bpy is not required, in the form {property name: default value}. The enum values are their identifiers
+    """
+    settingsFilepath = Path(__file__).parent.parent / "stampinfo" / "properties" / "stampInfoSettings.py"
+    module = ast.parse(settingsFilepath.read_text(encoding="utf-8"))
+    settingsClass = next(n for n in module.body if isinstance(n, ast.ClassDef) and "UAS_StampInfoSettings" == n.name)
+
+    defaults = dict()
+    for node in settingsClass.body:
+        if not isinstance(node, ast.AnnAssign) or not isinstance(node.annotation, ast.Call):
+            continue
+        propertyCall = node.annotation
+        propertyType = getattr(propertyCall.func, "attr", getattr(propertyCall.func, "id", ""))
+        keywords = {k.arg: k.value for k in propertyCall.keywords}
+
+        try:
+            default = (
+                ast.literal_eval(keywords["default"]) if "default" in keywords else _IMPLICIT_DEFAULTS[propertyType]
+            )
+            # the default value of an enum can be the index of an item
+            if "EnumProperty" == propertyType and isinstance(default, int):
+                default = ast.literal_eval(keywords["items"])[default][0]
+        except ValueError:
+            default = _NOT_LITERAL
+        defaults[node.target.id] = default
+
+    return defaults
+
+
+def test_default_settings_match_the_properties():
+    defaults = _getPropertyDefaults()
+    # state of the settings of a scene, not a setting
+    del defaults["isInitialized"]
+
+    assert sorted(STAMP_INFO_DEFAULT_SETTINGS) == sorted(defaults)
+    for name, default in defaults.items():
+        if default is not _NOT_LITERAL:
+            assert default == STAMP_INFO_DEFAULT_SETTINGS[name], name
+    assert DEFAULT_ENCODING_PRESET == STAMP_INFO_DEFAULT_SETTINGS["movieEncodingPreset"]
+
+
+def test_snapshot_round_trip():
+    settings = getDefaultStampInfoSettings(notesUsed=True, notesLine01="My note", textColor=(1.0, 0.5, 0.0, 1.0))
+    snapshot = StampInfoSnapshot(
+        settings,
+        "Shot_010",
+        24,
+        101,
+        250,
+        "/projects/shot_010.blend",
+        "/projects/logo.png",
+        renderResolution=(2048, 858),
+        resolutionPercentage=50,
+    )
+
+    # the dictionary is written as JSON, the tuples become lists
+    values = json.loads(json.dumps(snapshot.toDict()))
+    copy = StampInfoSnapshot.fromDict(values)
+
+    assert vars(copy.settings) == vars(snapshot.settings)
+    assert (1.0, 0.5, 0.0, 1.0) == copy.settings.textColor
+    for name in ("sceneName", "fps", "frameStart", "frameEnd", "filepath", "logoFilepath", "resolutionPercentage"):
+        assert getattr(copy, name) == getattr(snapshot, name)
+    assert (2048, 858) == copy.renderResolution
+
+
+def test_snapshot_from_partial_dict():
+    snapshot = StampInfoSnapshot.fromDict({"settings": {"projectUsed": True}, "fps": 30})
+
+    assert snapshot.settings.projectUsed
+    assert vars(snapshot.settings).keys() == STAMP_INFO_DEFAULT_SETTINGS.keys()
+    assert 30 == snapshot.fps
+    assert (1920, 1080) == snapshot.renderResolution
+    # the logo is deduced from the settings
+    assert snapshot.logoFilepath == getLogoFilepath(snapshot.settings)
+    assert os.path.isfile(snapshot.logoFilepath)
+
+
+def test_logo_filepath_relative_to_blend_file():
+    settings = getDefaultStampInfoSettings(logoMode="CUSTOM", logoFilepath="//logos/logo.png")
+    assert os.path.join("/projects", "logos/logo.png") == getLogoFilepath(settings, "/projects/shot.blend")
+    assert "" == getLogoFilepath(getDefaultStampInfoSettings(logoUsed=False))
+
+
+def test_stamped_image_resolution():
+    snapshot = StampInfoSnapshot.fromDict({"renderResolution": (1920, 1080), "resolutionPercentage": 50})
+    width, height, innerH = snapshot.getStampedImageResolution()
+    assert (960, 540) == (width, innerH)
+    # the borders are outside of the rendered image, the sizes are even
+    assert 540 < height and 0 == height % 2
+
+    snapshot.settings.stampInfoRenderMode = "OVER"
+    assert (960, 540, int(540 * 0.86)) == snapshot.getStampedImageResolution()
+
+
+def test_frame_context_round_trip():
+    context = StampFrameContext(12, "Cam_Main", 35.0, "Marker_A", datetime(2022, 5, 3, 10, 20, 30))
+    copy = StampFrameContext.fromDict(json.loads(json.dumps(context.toDict())))
+    for name in StampFrameContext.__slots__:
+        assert getattr(copy, name) == getattr(context, name)
+
+
+def test_static_frame_contexts():
+    timestamp = datetime(2022, 5, 3)
+    contexts = getStaticFrameContexts(5, 8, cameraName="Cam", lens=50.0, timestamp=timestamp)
+    assert [5, 6, 7, 8] == [c.frame for c in contexts]
+    assert all("Cam" == c.cameraName and timestamp == c.timestamp for c in contexts)
+
+    copy = contexts[0].withTimestamp(datetime(2022, 5, 4))
+    assert (5, "Cam", datetime(2022, 5, 4)) == (copy.frame, copy.cameraName, copy.timestamp)
+    assert timestamp == contexts[0].timestamp
@@ -0,0 +1,47 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the rendering of the stamped images of several frames in worker processes
+"""
+
+from datetime import datetime
+
+import pytest
+
+from stampinfo.properties.infoImage import getBorderStripsFilepaths, renderStampedImages
+from stampinfo.properties.stampInfoSnapshot import StampInfoSnapshot, getStaticFrameContexts
+
+
+@pytest.mark.parametrize("layout", ["FULL", "BORDER_STRIPS"])
+def test_images_of_the_worker_processes(tmp_path, layout):
+    snapshot = StampInfoSnapshot.fromDict({"frameStart": 1, "frameEnd": 12, "renderResolution": (320, 180)})
+    renderW, renderH, innerH = snapshot.getStampedImageResolution()
+    contexts = getStaticFrameContexts(1, 12, cameraName="Cam", lens=50.0, timestamp=datetime(2022, 5, 3, 10, 0, 0))
+
+    imagesPerProcesses = []
+    for numProcesses in (1, 2):
+        filepaths = [str(tmp_path / f"p{numProcesses}" / f"stamp.{frame:04d}.png") for frame in range(1, 13)]
+        stripsRows = renderStampedImages(
+            snapshot, renderW, renderH, innerH, contexts, filepaths, numProcesses=numProcesses, layout=layout
+        )
+        if stripsRows is not None:
+            filepaths = [f for filepath in filepaths for f in getBorderStripsFilepaths(filepath)]
+        imagesPerProcesses.append([open(f, "rb").read() for f in filepaths])
+
+    # the worker processes have written all the images before the function returns
+    assert imagesPerProcesses[0] == imagesPerProcesses[1]
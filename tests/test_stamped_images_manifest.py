@@ -0,0 +1,182 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the manifest of the stamped images, used to draw only the images whose content changed
+"""
+
+import os
+from datetime import datetime
+
+from stampinfo.properties.infoImage import renderStampedImages
+from stampinfo.properties.stampInfoManifest import (
+    StampedImagesManifest,
+    getFrameHash,
+    getManifestFilepath,
+    getStaticLayerHash,
+)
+from stampinfo.properties.stampInfoSnapshot import StampInfoSnapshot, getStaticFrameContexts
+
+
+def _getSnapshot(**settings):
+    return StampInfoSnapshot.fromDict(
+        {
+            "settings": dict(settings),
+            "frameStart": 1,
+            "frameEnd": 4,
+            "renderResolution": (320, 180),
+        }
+    )
+
+
+def _renderTwice(tmp_path, snapshot, secondSnapshot=None, secondContexts=None):
+    """Render the stamped images of frames 1 to 4 twice, and return the modification times of the images
+    after each render"""
+    renderW, renderH, innerH = snapshot.getStampedImageResolution()
+    dirPath = f"{tmp_path}{os.sep}"
+    filepaths = [f"{dirPath}stamp.{frame:04d}.png" for frame in range(1, 5)]
+    manifestFilepath = getManifestFilepath(dirPath)
+
+    contexts = getStaticFrameContexts(1, 4, cameraName="Cam", lens=50.0, timestamp=datetime(2022, 5, 3, 10, 0, 0))
+    renderStampedImages(
+        snapshot, renderW, renderH, innerH, contexts, filepaths, numProcesses=1, manifestFilepath=manifestFilepath
+    )
+    firstTimes = [os.stat(f).st_mtime_ns for f in filepaths]
+
+    if secondContexts is None:
+        # a render started later: its time must not make the images out of date
+        secondContexts = getStaticFrameContexts(
+            1, 4, cameraName="Cam", lens=50.0, timestamp=datetime(2022, 5, 3, 11, 30, 0)
+        )
+    renderStampedImages(
+        secondSnapshot or snapshot,
+        renderW,
+        renderH,
+        innerH,
+        secondContexts,
+        filepaths,
+        numProcesses=1,
+        manifestFilepath=manifestFilepath,
+    )
+    secondTimes = [os.stat(f).st_mtime_ns for f in filepaths]
+    return firstTimes, secondTimes
+
+
+def test_second_render_reuses_frames(tmp_path):
+    snapshot = _getSnapshot(dateUsed=True, timeUsed=True)
+    firstTimes, secondTimes = _renderTwice(tmp_path, snapshot)
+    assert firstTimes == secondTimes
+
+
+def test_changed_settings_redraw_frames(tmp_path):
+    snapshot = _getSnapshot()
+    firstTimes, secondTimes = _renderTwice(tmp_path, snapshot, secondSnapshot=_getSnapshot(projectUsed=True))
+    assert all(first != second for first, second in zip(firstTimes, secondTimes))
+
+
+def test_changed_frame_redrawn_with_job_timestamp(tmp_path):
+    snapshot = _getSnapshot()
+    secondContexts = getStaticFrameContexts(1, 4, cameraName="Cam", lens=50.0, timestamp=datetime(2022, 5, 4))
+    secondContexts[2].cameraName = "OtherCam"
+    firstTimes, secondTimes = _renderTwice(tmp_path, snapshot, secondContexts=secondContexts)
+
+    assert [first == second for first, second in zip(firstTimes, secondTimes)] == [True, True, False, True]
+    manifest = StampedImagesManifest(getManifestFilepath(f"{tmp_path}{os.sep}"))
+    renderW, renderH, innerH = snapshot.getStampedImageResolution()
+    staticLayerHash = getStaticLayerHash(snapshot, renderW, renderH, innerH)
+    assert manifest.getJobTimestamp(staticLayerHash) == datetime(2022, 5, 3, 10, 0, 0)
+
+
+def _getStaticLayerHash(snapshot, layout="FULL", fileFormat="PNG"):
+    return getStaticLayerHash(snapshot, *snapshot.getStampedImageResolution(), layout=layout, fileFormat=fileFormat)
+
+
+def test_static_layer_hash_of_drawn_settings():
+    reference = _getStaticLayerHash(_getSnapshot())
+    assert reference == _getStaticLayerHash(_getSnapshot())
+
+    # settings that change the drawing or the files
+    assert reference != _getStaticLayerHash(_getSnapshot(projectUsed=True))
+    assert reference != _getStaticLayerHash(_getSnapshot(textColor=(1.0, 0.0, 0.0, 1.0)))
+    assert reference != _getStaticLayerHash(_getSnapshot(), layout="BORDER_STRIPS")
+    assert reference != _getStaticLayerHash(_getSnapshot(), fileFormat="TGA")
+    snapshot = _getSnapshot()
+    snapshot.resolutionPercentage = 50
+    assert reference != _getStaticLayerHash(snapshot)
+
+    # settings that are not drawn, or only when a disabled toggle is enabled
+    assert reference == _getStaticLayerHash(_getSnapshot(movieEncodingPreset="REVIEW", proxyResolution="PROXY_50"))
+    assert reference == _getStaticLayerHash(_getSnapshot(projectName="Other Project", notesLine01="Other note"))
+
+
+def test_static_layer_hash_of_logo_content(tmp_path):
+    logoFilepath = tmp_path / "logo.png"
+    logoFilepath.write_bytes(b"logo v1")
+    snapshot = _getSnapshot(logoMode="CUSTOM")
+    snapshot.logoFilepath = str(logoFilepath)
+
+    reference = _getStaticLayerHash(snapshot)
+    logoFilepath.write_bytes(b"logo v2")
+    assert reference != _getStaticLayerHash(snapshot)
+
+    snapshot.settings.logoUsed = False
+    withoutLogo = _getStaticLayerHash(snapshot)
+    logoFilepath.write_bytes(b"logo v3")
+    assert withoutLogo == _getStaticLayerHash(snapshot)
+
+
+def test_frame_hash_ignores_timestamp():
+    settings = _getSnapshot().settings
+    first, second = (
+        getStaticFrameContexts(1, 1, cameraName="Cam", timestamp=datetime(2022, 5, 3, hour))[0] for hour in (9, 18)
+    )
+    assert getFrameHash("layer", settings, first) == getFrameHash("layer", settings, second)
+
+    second.cameraName = "OtherCam"
+    assert getFrameHash("layer", settings, first) != getFrameHash("layer", settings, second)
+    assert getFrameHash("layer", settings, first) != getFrameHash("otherLayer", settings, first)
+
+
+def test_frame_hash_ignores_values_not_drawn():
+    settings = _getSnapshot(cameraUsed=False, cameraLensUsed=False).settings
+    first = getStaticFrameContexts(1, 1, cameraName="Cam", lens=35.0)[0]
+    second = getStaticFrameContexts(1, 1, cameraName="OtherCam", lens=85.0)[0]
+    assert getFrameHash("layer", settings, first) == getFrameHash("layer", settings, second)
+
+
+def test_discard_keeps_other_chunks(tmp_path):
+    dirPath = f"{tmp_path}{os.sep}"
+    chunks = [(1, 10), (11, 20), (21, 30), (15, 25)]
+    for chunk in chunks:
+        StampedImagesManifest(getManifestFilepath(dirPath, chunk)).save("layer", datetime(2022, 5, 3))
+
+    StampedImagesManifest(getManifestFilepath(dirPath, (11, 20))).discard()
+    kept = [chunk for chunk in chunks if os.path.isfile(getManifestFilepath(dirPath, chunk))]
+    assert kept == [(1, 10), (21, 30)]
+
+
+def test_discard_whole_render(tmp_path):
+    dirPath = f"{tmp_path}{os.sep}"
+    StampedImagesManifest(getManifestFilepath(dirPath, (1, 10))).save("layer", datetime(2022, 5, 3))
+    StampedImagesManifest(getManifestFilepath(dirPath)).save("layer", datetime(2022, 5, 3))
+
+    StampedImagesManifest(getManifestFilepath(dirPath, (20, 30))).discard()
+    assert os.path.isfile(getManifestFilepath(dirPath, (1, 10)))
+    assert not os.path.isfile(getManifestFilepath(dirPath))
+
+    StampedImagesManifest(getManifestFilepath(dirPath)).discard()
+    assert not os.path.isfile(getManifestFilepath(dirPath, (1, 10)))
@@ -0,0 +1,47 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the rendering of the stamped images while the animation is being rendered
+"""
+
+import os
+
+from PIL import Image
+
+from stampinfo.properties.infoImage import StampedImagesStream
+from stampinfo.properties.stampInfoSnapshot import StampInfoSnapshot, getStaticFrameContexts
+
+
+def test_finish_stamps_frames_not_submitted(tmp_path):
+    snapshot = StampInfoSnapshot.fromDict({"frameStart": 1, "frameEnd": 4, "renderResolution": (320, 180)})
+    renderW, renderH, innerH = snapshot.getStampedImageResolution()
+    frameContexts = getStaticFrameContexts(1, 4)
+    filepaths = [str(tmp_path / f"stamp.{frame:04d}.png") for frame in range(1, 5)]
+    renderedFilepaths = [str(tmp_path / f"render.{frame:04d}.png") for frame in range(1, 5)]
+
+    # frame 1 is rendered and submitted, frames 2 and 3 were already rendered by a previous job and are not written
+    # again, frame 4 is not rendered
+    for renderedFilepath in renderedFilepaths[:3]:
+        Image.new("RGBA", (320, 180)).save(renderedFilepath)
+
+    stream = StampedImagesStream(snapshot, renderW, renderH, innerH, numProcesses=1)
+    stream.submit(frameContexts[0], filepaths[0])
+    stream.finish(frameContexts, filepaths, renderedFilepaths)
+
+    assert [os.path.isfile(f) for f in filepaths] == [True, True, True, False]
+    assert stream.missingFrames == [4]
@@ -0,0 +1,116 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the strip cache file holding the stamped border strips of a render job
+"""
+
+import os
+
+import pytest
+from PIL import Image
+
+from stampinfo.utils.utils_strip_cache import (
+    StripCache,
+    StripCacheSlot,
+    closeStripCaches,
+    getStripCacheFilepath,
+    readStripCacheImage,
+    writeStripCacheFrame,
+)
+
+# top and bottom strips of a 64x48 stamped image
+_IMAGES = [((64, 8), (0, 0)), ((64, 6), (0, 42))]
+
+
+@pytest.fixture
+def cacheFilepath(tmp_path):
+    yield str(tmp_path / "strips.sistrips")
+    # the mapped files must be closed before the temporary directory is deleted
+    closeStripCaches()
+
+
+def _getStrips(frame):
+    return [Image.new("RGBA", size, (frame, i, 255 - frame, 255)) for i, (size, _pos) in enumerate(_IMAGES)]
+
+
+def test_cache_filepath():
+    assert "/renders/_StampInfo_StripCache.sistrips" == getStripCacheFilepath("/renders/")
+    assert "/renders/_StampInfo_StripCache_1-50.sistrips" == getStripCacheFilepath("/renders/", chunk=(1, 50))
+
+
+def test_cache_layout(cacheFilepath):
+    StripCache.create(cacheFilepath, 101, 150, _IMAGES).close()
+
+    with StripCache(cacheFilepath) as cache:
+        assert (101, 50) == (cache.frameStart, cache.numFrames)
+        assert [(64, 8), (64, 6)] == cache.imageSizes
+        assert [(0, 0), (0, 42)] == cache.imagePositions
+        assert (64 * 8 + 64 * 6) * 4 == cache.slotSize
+        # the slots start on a page boundary
+        assert 0 == cache._slotsOffset % 4096
+        assert cache._slotsOffset + cache.slotSize * 50 == os.path.getsize(cacheFilepath)
+        assert not any(cache.hasFrame(frame) for frame in range(101, 151))
+
+    with open(cacheFilepath, "rb") as f:
+        assert b"SISTRIPS" == f.read(8)
+
+
+def test_not_a_cache_file(cacheFilepath):
+    with open(cacheFilepath, "wb") as f:
+        f.write(b"\x00" * 64)
+    with pytest.raises(ValueError):
+        StripCache(cacheFilepath)
+
+
+def test_frames_round_trip(cacheFilepath):
+    with StripCache.create(cacheFilepath, 1, 10, _IMAGES) as cache:
+        cache.writeFrame(3, _getStrips(3))
+        cache.writeFrame(10, _getStrips(10))
+
+    with StripCache(cacheFilepath) as cache:
+        assert [3, 10] == [frame for frame in range(1, 11) if cache.hasFrame(frame)]
+        assert cache.getFrameImages(4) is None
+
+        images = cache.getFrameImages(10)
+        assert [(8, 64, 4), (6, 64, 4)] == [img.shape for img in images]
+        assert [10, 0, 245, 255] == images[0][5, 20].tolist()
+        assert [10, 1, 245, 255] == images[1][5, 20].tolist()
+        del images
+
+
+def test_write_errors(cacheFilepath):
+    with StripCache.create(cacheFilepath, 1, 10, _IMAGES) as cache:
+        with pytest.raises(IndexError):
+            cache.writeFrame(11, _getStrips(11))
+        with pytest.raises(ValueError):
+            cache.writeFrame(1, [Image.new("RGBA", (64, 9)), Image.new("RGBA", (64, 6))])
+        with pytest.raises(ValueError):
+            cache.writeFrame(1, [Image.new("RGB", (64, 8)), Image.new("RGBA", (64, 6))])
+        assert not cache.hasFrame(11)
+
+
+def test_slots_read_by_the_compositor(cacheFilepath):
+    StripCache.create(cacheFilepath, 1, 10, _IMAGES).close()
+    for frame in (1, 2):
+        writeStripCacheFrame(_getStrips(frame), cacheFilepath, frame)
+
+    bottomStrip = StripCacheSlot(cacheFilepath, 1)
+    img = readStripCacheImage(bottomStrip.atFrame(2))
+    assert ("RGBA", (64, 6)) == (img.mode, img.size)
+    assert (2, 1, 253, 255) == img.getpixel((0, 0))
+    assert readStripCacheImage(bottomStrip.atFrame(5)) is None
@@ -0,0 +1,132 @@
+# GPLv3 License
+#
+# Copyright (C) 2022 Ubisoft
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests of the index of the VSE strips by channel. The RNA collection of the strips is replaced by a list
+"""
+
+from types import SimpleNamespace
+
+from stampinfo.utils.utils_vse_channels import ChannelIndex, discardChannelIndex, getChannelIndex
+
+
+class _Sequences(list):
+    """Subset of the RNA collection scene.sequence_editor.sequences used by the channel index"""
+
+    def new(self, name, channel):
+        strip = SimpleNamespace(name=name, channel=channel)
+        self.append(strip)
+        return strip
+
+    def get(self, name):
+        return next((seq for seq in self if name == seq.name), None)
+
+
+def _getNames(strips):
+    return [s.name for s in strips]
+
+
+def _getEdit():
+    sequences = _Sequences()
+    for name, channel in (("bg", 1), ("top", 2), ("bottom", 2), ("audio", 3)):
+        sequences.new(name, channel)
+    return sequences
+
+
+def test_strips_by_channel():
+    sequences = _getEdit()
+    channelIndex = ChannelIndex()
+
+    assert ["top", "bottom"] == _getNames(channelIndex.getStrips(sequences, 2))
+    assert [] == channelIndex.getStrips(sequences, 5)
+    assert [1, 2, 3] == channelIndex.getChannels(sequences)
+
+
+def _failRebuild(sequences):
+    raise AssertionError("The channel index is rebuilt")
+
+
+def test_index_updated_by_the_channel_operations(monkeypatch):
+    sequences = _getEdit()
+    channelIndex = ChannelIndex()
+    channelIndex.getStrips(sequences, 1)
+
+    channelIndex.added(sequences.new("over", 4))
+    channelIndex.remove(sequences, sequences.get("top"))
+    strip = sequences.get("audio")
+    strip.channel = 6
+    channelIndex.moved(strip, 3)
+
+    monkeypatch.setattr(channelIndex, "_build", _failRebuild)
+    assert ["over"] == _getNames(channelIndex.getStrips(sequences, 4))
+    assert ["bottom"] == _getNames(channelIndex.getStrips(sequences, 2))
+    assert ["audio"] == _getNames(channelIndex.getStrips(sequences, 6))
+    assert [1, 2, 4, 6] == channelIndex.getChannels(sequences)
+    assert sequences.get("top") is None
+
+    channelIndex.clear()
+    assert [] == channelIndex.getChannels(_Sequences())
+
+
+def test_strips_added_and_removed_out_of_the_index():
+    sequences = _getEdit()
+    channelIndex = ChannelIndex()
+    channelIndex.getStrips(sequences, 2)
+
+    sequences.new("added", 2)
+    assert ["top", "bottom", "added"] == _getNames(channelIndex.getStrips(sequences, 2))
+
+    sequences.remove(sequences.get("top"))
+    assert ["bottom", "added"] == _getNames(channelIndex.getStrips(sequences, 2))
+
+
+def test_strips_moved_out_of_the_index():
+    sequences = _getEdit()
+    channelIndex = ChannelIndex()
+    channelIndex.getStrips(sequences, 2)
+
+    # moved by Blender because it overlapped another strip
+    sequences.get("bottom").channel = 4
+    assert ["top"] == _getNames(channelIndex.getStrips(sequences, 2))
+    assert ["bottom"] == _getNames(channelIndex.getStrips(sequences, 4))
+
+    # the strip is not on the requested channel
+    strip = sequences.get("top")
+    strip.channel = 7
+    channelIndex.moved(strip, 2)
+    assert ["top"] == _getNames(channelIndex.getStrips(sequences, 7))
+    assert [] == channelIndex.getStrips(sequences, 2)
+
+
+def test_strips_renamed_out_of_the_index():
+    sequences = _getEdit()
+    channelIndex = ChannelIndex()
+    channelIndex.getStrips(sequences, 1)
+
+    sequences.get("bg").name = "background"
+    assert ["background"] == _getNames(channelIndex.getStrips(sequences, 1))
+
+
+def test_index_per_scene():
+    assert getChannelIndex(1) is getChannelIndex(1)
+    assert getChannelIndex(1) is not getChannelIndex(2)
+
+    channelIndex = getChannelIndex(1)
+    discardChannelIndex(1)
+    assert getChannelIndex(1) is not channelIndex
+    discardChannelIndex(1)
+    discardChannelIndex(2)